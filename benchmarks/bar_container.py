@@ -0,0 +1,72 @@
+"""
+Bar assembly and per-asset access: MultiIndex frames vs the Bars container.
+
+    python -m benchmarks.bar_container --assets 50 --hours 2000
+
+  assemble - per-ticker frames -> one block
+             frame: pd.concat -> swaplevel/sort_index (the old batch_download)
+             bars:  Bars.concat (one allocation)
+  access   - every asset's OHLCV block plus its Close series
+             frame: df.xs(tkr, level=0) + df[tkr, 'Close'] (copies)
+             bars:  Bars.asset(tkr) + Bars.series(tkr, 'Close') (views)
+  features - build_feature_matrix from the frame vs from Bars
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.bars import Bars
+from src.utils.feature_engineering import build_feature_matrix
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_bars(args.assets, args.hours)
+    tickers = list(dict.fromkeys(df.columns.get_level_values(0)))
+    # What providers return: one (Price, Ticker) frame per ticker
+    per_ticker = [df[[t]].swaplevel(axis=1) for t in tickers]
+    bars = Bars.from_frame(df)
+
+    def frame_access():
+        for t in tickers:
+            df.xs(t, level=0, axis=1)
+            df[t, 'Close']
+
+    def bars_access():
+        for t in tickers:
+            bars.asset(t)
+            bars.series(t, 'Close')
+
+    rows = [
+        ("assemble", lambda: pd.concat(per_ticker, axis=1).swaplevel(axis=1).sort_index(axis=1),
+         lambda: Bars.concat(per_ticker)),
+        ("access", frame_access, bars_access),
+        ("features", lambda: build_feature_matrix(df, None, None, features=["rsi14", "atr14"]),
+         lambda: build_feature_matrix(bars, None, None, features=["rsi14", "atr14"])),
+    ]
+    for name, frame_fn, bars_fn in rows:
+        frame_ms = best_ms(frame_fn, args.repeat)
+        bars_ms = best_ms(bars_fn, args.repeat)
+        print(f"{name:>9}: frame={frame_ms:8.2f}ms bars={bars_ms:8.2f}ms ({frame_ms / bars_ms:.1f}x)")
+    print(f"to_frame shares memory: {np.shares_memory(bars.to_frame().to_numpy(), bars.values)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+LightGBM Dataset construction: rebuilt from the feature rows every time vs the
+persisted binary DatasetCache.
+
+    python -m benchmarks.dataset_cache --assets 50 --hours 8000 --append 720
+
+Times train + validation Dataset construction only (no boosting), on panel
+rows from synthetic bars in the production column layout (panel_columns with
+weekly, intraday and exog columns), with the time-ordered 80/20 split
+ModelTrainer uses. Like the production downloads, the daily window is a
+fixed length and the intraday bars only cover the last `--intraday-hours`,
+so a later run sees a window slid forward by `--append` bars.
+
+  frames - the old ModelTrainer.train path: DataFrame split -> lgb.Dataset
+  arrays - lgb.Dataset from the float32 arrays (the cache-less path)
+  build  - DatasetCache with no cache: bins from scratch, then save_binary
+  hit    - DatasetCache, same rows: both binaries loaded
+  append - DatasetCache, both windows slid `--append` bars forward: dropped
+           rows are trimmed, revised and new rows are pushed through the
+           existing bin mappers, no bin boundary search
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.dataset_cache import DatasetCache
+from src.utils.feature_engineering import nan_free_rows, row_selector
+from src.utils.model_trainer import ModelTrainer
+from src.utils.panel import build_panel, ASSET_ID
+from src.utils.reference_data import EXOG, exog_column
+
+
+def synthetic_exog(n_rows):
+    """Random-walk closes under the EXOG column names."""
+    closes = synthetic_bars(len(EXOG), n_rows, seed=11).xs("Close", level=1, axis=1)
+    return pd.DataFrame({exog_column(t): closes.iloc[:, i].to_numpy() for i, t in enumerate(EXOG)},
+                        index=closes.index)
+
+
+def panel_rows(bars, exog, start, stop, intraday_hours):
+    """Panel rows (production columns) of the download window bars[start:stop]."""
+    assets = list(dict.fromkeys(bars.columns.get_level_values(0)))
+    daily = bars.iloc[start:stop]
+    intra = bars.iloc[max(start, stop - intraday_hours):stop]
+    panel = build_panel(daily, daily, intra, assets, {t: i for i, t in enumerate(assets)},
+                        exog=exog.iloc[start:stop])
+    rows = row_selector(nan_free_rows(panel.values) & np.isfinite(panel.y))
+    return panel.values[rows], panel.y[rows], panel.dates.repeat(len(assets))[rows], panel.columns
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=8000)
+    parser.add_argument("--append", type=int, default=720)
+    parser.add_argument("--intraday-hours", type=int, default=1440)
+    args = parser.parse_args()
+
+    n_rows = args.hours + args.append
+    bars = synthetic_bars(args.assets, n_rows)
+    exog = synthetic_exog(n_rows)
+    X_old, y_old, dates_old, columns = panel_rows(bars, exog, 0, args.hours, args.intraday_hours)
+    X, y, dates, _ = panel_rows(bars, exog, args.append, n_rows, args.intraday_hours)
+    params = ModelTrainer().lgb_params()
+    n_val = lambda n: int(np.ceil(n * 0.2))
+    print(f"rows={len(X_old)} (window slid by {args.append} bars: {len(X)} rows) columns={len(columns)}")
+
+    def frames():
+        df = pd.DataFrame(X_old, columns=columns)
+        X_train, X_val, y_train, y_val = train_test_split(df, y_old, test_size=0.2, shuffle=False)
+        train = lgb.Dataset(X_train, label=y_train, categorical_feature=[ASSET_ID], params=params).construct()
+        lgb.Dataset(X_val, label=y_val, categorical_feature=[ASSET_ID], reference=train, params=params).construct()
+
+    def arrays():
+        n_train = len(X_old) - n_val(len(X_old))
+        train = lgb.Dataset(X_old[:n_train], label=y_old[:n_train], feature_name=columns,
+                            categorical_feature=[ASSET_ID], params=params).construct()
+        lgb.Dataset(X_old[n_train:], label=y_old[n_train:], feature_name=columns,
+                    categorical_feature=[ASSET_ID], reference=train, params=params).construct()
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = DatasetCache(columns, [ASSET_ID], params, cache_dir)
+        status = {}
+        def cached(X, y, dates, name):
+            status[name] = cache.datasets(X, y, dates, n_val(len(X)))[2]
+        times = [
+            ("frames", timed(frames)),
+            ("arrays", timed(arrays)),
+            ("build", timed(lambda: cached(X_old, y_old, dates_old, "build"))),
+            ("hit", timed(lambda: cached(X_old, y_old, dates_old, "hit"))),
+            ("append", timed(lambda: cached(X, y, dates, "append"))),
+        ]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    base = times[0][1]
+    for name, took in times:
+        print(f"{name:>7}: {took:7.3f}s ({base / took:5.1f}x vs frames) {status.get(name, '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Latency of native per-feature contributions (pred_contrib) vs plain predict.
+
+    python -m benchmarks.explain_overhead --assets 50 --hours 2000
+
+Trains the pooled model on synthetic hourly bars, then times
+ModelTrainer.predict and ModelTrainer.predict_contrib on batches of the
+latest rows (median of --repeat runs).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.feature_engineering import nan_free_rows
+from src.utils.model_trainer import ModelTrainer
+from src.utils.panel import build_panel, panel_columns, ASSET_ID
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return np.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bars = synthetic_bars(args.assets, args.hours)
+    tickers = list(dict.fromkeys(bars.columns.get_level_values(0)))
+    panel = build_panel(bars, None, None, tickers, {t: i for i, t in enumerate(tickers)},
+                        columns=panel_columns(weekly=False, intraday=False))
+    keep = nan_free_rows(panel.values) & np.isfinite(panel.y)
+    X, y = panel.values[keep], panel.y[keep]
+    # A random walk is unlearnable and early-stops at one tree; add a weak
+    # feature-driven component so the model has a realistic number of trees
+    rsi = X[:, panel.columns.index("rsi14")]
+    y = y + 0.004 * np.tanh((rsi - 50) / 10)
+
+    trainer = ModelTrainer(model_path="artifacts/bench_explain_model.pkl")
+    t0 = time.perf_counter()
+    trainer.train(X, y, panel.columns, save_model=False, categorical_feature=[ASSET_ID])
+    train_ms = (time.perf_counter() - t0) * 1000
+    print(f"train: {train_ms:.0f} ms, {trainer.model.num_trees()} trees, {len(panel.columns)} features")
+
+    for n_rows in [1, 4, args.assets, 1000]:
+        batch = X[-n_rows:]
+        plain = median_ms(lambda: trainer.predict(batch), args.repeat)
+        contrib = median_ms(lambda: trainer.predict_contrib(batch), args.repeat)
+        print(f"rows={n_rows:>5} predict={plain:.3f}ms pred_contrib={contrib:.3f}ms "
+              f"overhead={contrib - plain:+.3f}ms ({contrib / plain:.1f}x, "
+              f"{(contrib - plain) / train_ms * 100:.2f}% of training)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Peak RSS of feature assembly + LightGBM Dataset construction.
+
+    python -m benchmarks.feature_memory --years 4 --assets 10
+
+Each mode runs in its own subprocess so ru_maxrss is not shared:
+  frame  - build_features_from_price -> join(y).dropna() -> drop -> lgb.Dataset
+  matrix - build_feature_matrix -> NaN row mask -> lgb.Dataset on the float32 array
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, years, n_assets):
+    import lightgbm as lgb
+    from benchmarks.synthetic import synthetic_bars
+    from src.utils import feature_engineering as fe
+
+    bars = synthetic_bars(n_assets, int(years * 365 * 24))
+    target = bars.columns.get_level_values(0)[0]
+    base = _peak_rss_mb()
+    t0 = time.perf_counter()
+
+    if mode == "frame":
+        feats = fe.build_features_from_price(bars, None, None)
+        y = np.log(bars[target, "Close"]).diff().shift(-1).rename("y")
+        data = feats.join(y).dropna()
+        X = data.drop(columns=["y"])
+        ds = lgb.Dataset(X, label=data["y"], params={"verbosity": -1}).construct()
+    else:
+        fm = fe.build_feature_matrix(bars, None, None)
+        y = np.log(bars[target, "Close"]).diff().shift(-1).to_numpy()
+        rows = fe.row_selector(fm.valid_rows() & np.isfinite(y))
+        ds = lgb.Dataset(fm.values[rows], label=y[rows], feature_name=fm.columns,
+                         params={"verbosity": -1}).construct()
+
+    elapsed = time.perf_counter() - t0
+    print(f"{mode}: rows={ds.num_data()} cols={ds.num_feature()} "
+          f"peak_rss={_peak_rss_mb():.0f}MB (+{_peak_rss_mb() - base:.0f}MB over input) "
+          f"time={elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=4)
+    parser.add_argument("--assets", type=int, default=10)
+    parser.add_argument("--mode", choices=["frame", "matrix"])
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.years, args.assets)
+        return
+    for mode in ["frame", "matrix"]:
+        subprocess.run([sys.executable, "-m", "benchmarks.feature_memory", "--mode", mode,
+                        "--years", str(args.years), "--assets", str(args.assets)], check=True)
+
+
+if __name__ == "__main__":
+    main()
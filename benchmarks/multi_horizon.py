@@ -0,0 +1,62 @@
+"""
+Multi-horizon training (one feature build, one binned Dataset, concurrent
+horizon models) vs one full single-horizon run per horizon.
+
+    python -m benchmarks.multi_horizon --rows 20000 --horizons 1 3 7
+
+  separate - per horizon: build_feature_matrix -> target -> ModelTrainer.train
+  shared   - build_feature_matrix once -> train_horizons (threads)
+  shared/1 - same, with the horizon models trained one after another
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.feature_engineering import build_feature_matrix, row_selector
+from src.utils.horizons import horizon_targets, train_horizons
+from src.utils.model_trainer import ModelTrainer
+
+
+def features_and_targets(bars, tkr, horizons):
+    fm = build_feature_matrix(bars, None, None, assets=[tkr])
+    targets = horizon_targets(bars[tkr, "Close"].to_numpy(), horizons)
+    rows = row_selector(fm.valid_rows() & np.isfinite(targets[min(horizons)]))
+    return fm, rows, {h: t[rows] for h, t in targets.items()}
+
+
+def run_separate(bars, tkr, horizons):
+    for h in horizons:
+        fm, rows, targets = features_and_targets(bars, tkr, [h])
+        X, y = fm.values[rows], targets[h]
+        ok = np.isfinite(y)
+        ModelTrainer().train(X[ok], y[ok], fm.columns, save_model=False)
+
+
+def run_shared(bars, tkr, horizons, max_workers=None):
+    fm, rows, targets = features_and_targets(bars, tkr, horizons)
+    train_horizons(fm.values[rows], targets, fm.columns, max_workers=max_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[1, 3, 7])
+    args = parser.parse_args()
+
+    bars = synthetic_bars(1, args.rows)
+    tkr = bars.columns.get_level_values(0)[0]
+    modes = [
+        ("separate", lambda: run_separate(bars, tkr, args.horizons)),
+        ("shared", lambda: run_shared(bars, tkr, args.horizons)),
+        ("shared/1", lambda: run_shared(bars, tkr, args.horizons, max_workers=1)),
+    ]
+    for name, fn in modes:
+        t0 = time.perf_counter()
+        fn()
+        print(f"{name:>9}: {time.perf_counter() - t0:.2f}s for horizons {args.horizons}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Peak RSS and wall-clock of pooled-model training as hourly history grows.
+
+    python -m benchmarks.out_of_core_training --assets 8 --years 1 2 4
+
+Synthetic hourly bars are written to a temporary local bar store. Each
+(mode, years) pair runs in its own subprocess so ru_maxrss is not shared:
+  memory - load all assets, build the full panel, ModelTrainer.train
+  ooc    - train_out_of_core (per-asset chunks on disk + lgb.Sequence)
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_store(root, n_assets, years):
+    from benchmarks.synthetic import synthetic_bars
+    os.makedirs(os.path.join(root, "1h"), exist_ok=True)
+    bars = synthetic_bars(n_assets, int(years * 365 * 24))
+    for tkr in bars.columns.get_level_values(0).unique():
+        df = bars[[tkr]].swaplevel(axis=1)
+        df.columns.names = ["Price", "Ticker"]
+        df.to_csv(os.path.join(root, "1h", f"{tkr}_{years}y_1h.csv"))
+
+
+def run_mode(mode, root):
+    from src.utils import data_loader
+    from src.utils.feature_engineering import nan_free_rows, row_selector
+    from src.utils.model_trainer import ModelTrainer
+    from src.utils.out_of_core import train_out_of_core
+    from src.utils.panel import build_panel, panel_columns, ASSET_ID
+
+    data_loader.DATA_DIR = root
+    tickers = list(data_loader.local_bar_files("1h"))
+    base = _peak_rss_mb()
+    t0 = time.perf_counter()
+    model_path = os.path.join(root, "model.pkl")
+
+    if mode == "memory":
+        bars = data_loader.load_local_bars(tickers, "1h")
+        columns = panel_columns(weekly=False, intraday=False)
+        panel = build_panel(bars, None, None, tickers, {t: i for i, t in enumerate(tickers)}, columns=columns)
+        rows = row_selector(nan_free_rows(panel.values) & np.isfinite(panel.y))
+        ModelTrainer(model_path=model_path).train(panel.values[rows], panel.y[rows], columns,
+                                                  categorical_feature=[ASSET_ID])
+    else:
+        train_out_of_core(tickers, "1h", model_path=model_path, chunk_dir=os.path.join(root, "chunks"))
+
+    print(f"RESULT {mode} peak_rss={_peak_rss_mb():.0f}MB (+{_peak_rss_mb() - base:.0f}MB) "
+          f"time={time.perf_counter() - t0:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=8)
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", choices=["memory", "ooc"])
+    parser.add_argument("--root")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.root)
+        return
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as root:
+            write_store(root, args.assets, years)
+            for mode in ["memory", "ooc"]:
+                out = subprocess.run([sys.executable, "-m", "benchmarks.out_of_core_training",
+                                      "--mode", mode, "--root", root],
+                                     check=True, capture_output=True, text=True).stdout
+                line = [l for l in out.splitlines() if l.startswith("RESULT")][0]
+                print(f"years={years:g} assets={args.assets} {line[len('RESULT '):]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Feature build scaling: serial build_feature_matrix vs the shared-memory
+process pool at 1..N workers.
+
+    python -m benchmarks.parallel_features --assets 200 --hours 2000
+
+The pool is started and warmed before timing, so the numbers are the
+steady-state cost of a build (shared-memory copy, sharding, workers, copy
+out), not process startup. Efficiency = speedup / workers, against the
+serial build. Every parallel result is checked against the serial one.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.bars import Bars
+from src.utils.feature_engineering import build_feature_matrix
+from src.utils.parallel_features import build_feature_matrix_parallel
+
+
+def best_s(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    worker_counts = args.workers or sorted({1, 2, 4, os.cpu_count() or 1})
+
+    daily = Bars.from_frame(synthetic_bars(args.assets, args.hours))
+    serial = build_feature_matrix(daily, daily, daily)
+    serial_s = best_s(lambda: build_feature_matrix(daily, daily, daily), args.repeat)
+    print(f"cpus={os.cpu_count()} assets={args.assets} rows={args.hours} columns={len(serial.columns)}")
+    print(f"serial: {serial_s:.2f}s")
+
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            run = lambda: build_feature_matrix_parallel(daily, daily, daily, workers=workers, executor=pool)
+            fm = run()
+            same = fm.columns == serial.columns and np.array_equal(fm.values, serial.values, equal_nan=True)
+            took = best_s(run, args.repeat)
+        speedup = serial_s / took
+        print(f"workers={workers:>2}: {took:6.2f}s speedup={speedup:4.2f}x "
+              f"efficiency={speedup / workers:4.0%} identical={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Load test of the HTTP prediction service (src/server.py).
+
+    python -m benchmarks.prediction_service --clients 200 --rounds 5
+
+Starts the service on a free local port with the replay market-data provider
+(data/raw fixtures, simulated upstream latency), then has `clients`
+concurrent clients request the tickers `rounds` times each. The first round
+hits a cold cache, so it measures coalescing; later rounds are cache hits.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("MARKET_DATA_PROVIDER", "replay")
+os.environ.setdefault("REPLAY_LATENCY_SEC", "0.2")
+
+from src.server import PredictionService, start_server  # noqa: E402
+
+TICKERS = ["BTC-USD", "ETH-USD", "XRP-USD", "BNB-USD"]
+
+
+async def fetch(port, path):
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    return status, time.perf_counter() - t0
+
+
+def summarize(label, latencies):
+    ms = np.asarray(latencies) * 1000
+    print(f"{label:>6}: n={len(ms)} p50={np.percentile(ms, 50):.1f}ms "
+          f"p99={np.percentile(ms, 99):.1f}ms max={ms.max():.1f}ms")
+
+
+async def run(clients, rounds, workers):
+    service = PredictionService(workers=workers)
+    server = await start_server(service, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    by_round = []
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*[
+            fetch(port, f"/predict/{TICKERS[i % len(TICKERS)]}") for i in range(clients)
+        ])
+        bad = [s for s, _ in results if s != 200]
+        if bad:
+            print(f"non-200 responses: {len(bad)}")
+        by_round.append([lat for _, lat in results])
+    elapsed = time.perf_counter() - t0
+
+    summarize("cold", by_round[0])
+    if rounds > 1:
+        summarize("warm", [lat for r in by_round[1:] for lat in r])
+    summarize("all", [lat for r in by_round for lat in r])
+    total = clients * rounds
+    print(f"requests={total} time={elapsed:.2f}s throughput={total / elapsed:,.0f} req/s stats={service.stats}")
+
+    server.close()
+    await server.wait_closed()
+    service.executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.rounds, args.workers))
+
+
+if __name__ == "__main__":
+    main()
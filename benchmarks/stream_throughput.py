@@ -0,0 +1,57 @@
+"""
+Throughput of the streaming signal service (src/stream.py) in bars/s.
+
+    python -m benchmarks.stream_throughput --assets 50 --hours 1000
+
+A pooled model is trained on the first `--train-hours` of synthetic hourly
+bars. The following `--hours` are then replayed through
+feed -> scorer -> alert sink as fast as the scorer accepts them.
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_bars
+from src.stream import SignalStream, bar_feed, run_stream
+from src.utils.feature_engineering import nan_free_rows
+from src.utils.model_trainer import ModelTrainer
+from src.utils.panel import build_panel, panel_columns, ASSET_ID
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=1000)
+    parser.add_argument("--train-hours", type=int, default=2000)
+    parser.add_argument("--sink-delay", type=float, default=0.0, help="Seconds per alert delivery")
+    args = parser.parse_args()
+
+    bars = synthetic_bars(args.assets, args.train_hours + args.hours)
+    tickers = list(dict.fromkeys(bars.columns.get_level_values(0)))
+    asset_ids = {t: i for i, t in enumerate(tickers)}
+
+    train = bars.iloc[:args.train_hours]
+    panel = build_panel(train, None, None, tickers, asset_ids,
+                        columns=panel_columns(weekly=False, intraday=False))
+    keep = nan_free_rows(panel.values) & np.isfinite(panel.y)
+    trainer = ModelTrainer(model_path="artifacts/bench_stream_model.pkl")
+    trainer.metadata = {"asset_ids": asset_ids}
+    trainer.train(panel.values[keep], panel.y[keep], panel.columns, save_model=False,
+                  categorical_feature=[ASSET_ID])
+
+    def sink(signal):
+        time.sleep(args.sink_delay)
+
+    stream = SignalStream(trainer)
+    stats = asyncio.run(run_stream(stream, bar_feed(bars.iloc[args.train_hours:]), sink))
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"assets={args.assets} bars={stats['bars']} batches={stats['batches']} "
+          f"alerts={stats['alerts']} max_queue={stats['max_queue']} "
+          f"throughput={stats['bars_per_sec']:,.0f} bars/s peak_rss={rss:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
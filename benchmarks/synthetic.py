@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Adj Close", "Close", "High", "Low", "Open", "Volume"]
+
+
+def synthetic_bars(n_assets, n_rows, freq="1h", seed=7, start="2020-01-01"):
+    """
+    Random-walk OHLCV bars in the (Ticker, Field) layout batch_download returns.
+    Used by the benchmarks so they run offline and deterministically.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_rows, freq=freq, name="Date")
+    frames = {}
+    for a in range(n_assets):
+        tkr = f"SYN{a:03d}-USD"
+        rets = rng.normal(0.0, 0.01, n_rows)
+        close = 100.0 * np.exp(np.cumsum(rets))
+        spread = np.abs(rng.normal(0.0, 0.005, n_rows)) * close
+        open_ = close * np.exp(rng.normal(0.0, 0.003, n_rows))
+        frames[tkr] = pd.DataFrame({
+            "Adj Close": close,
+            "Close": close,
+            "High": np.maximum(close, open_) + spread,
+            "Low": np.minimum(close, open_) - spread,
+            "Open": open_,
+            "Volume": rng.integers(1_000, 1_000_000, n_rows).astype("float64"),
+        }, index=index)
+    return pd.concat(frames, axis=1).sort_index(axis=1)
@@ -2,6 +2,54 @@ from agno.agent import Agent
 from agno.models.google import Gemini
 from agno.tools.reasoning import ReasoningTools
 import feedparser
+import random
+import re
+import time
+
+# Constants
+RSS_FEEDS = {
+    "https://www.coindesk.com/arc/outboundfeeds/rss/?outputType=xml": "CoinDesk",
+    "https://cointelegraph.com/rss": "CoinTelegraph",
+    "https://cryptoslate.com/feed/": "CryptoSlate",
+    "https://finance.yahoo.com/news/rssindex": "Yahoo",
+    "https://decrypt.co/feed": "Decrypt",
+    "https://thedefiant.io/feed": "Defiant",
+}
+FEEDS_PER_RUN = 3 # Fewer feeds to save tokens
+ENTRIES_PER_FEED = 10 # Kept for the local scorer (it costs no tokens)
+PROMPT_ENTRIES_PER_FEED = 2 # Sent to the LLM
+NEWS_CACHE_SEC = 600 # The local scorer and the agent tool share one fetch
+
+_news_cache = {"time": 0.0, "entries": []}
+
+
+def fetch_news_entries():
+    """
+    Latest entries from FEEDS_PER_RUN random RSS feeds as dicts with source,
+    rank (position in its feed), title and HTML-free summary. Cached for
+    NEWS_CACHE_SEC, so a run scores and (if needed) prompts on the same news.
+    """
+    if _news_cache["entries"] and time.time() - _news_cache["time"] < NEWS_CACHE_SEC:
+        return _news_cache["entries"]
+
+    entries = []
+    for url in random.sample(list(RSS_FEEDS), min(FEEDS_PER_RUN, len(RSS_FEEDS))):
+        try:
+            feed = feedparser.parse(url)
+            for rank, entry in enumerate(feed.entries[:ENTRIES_PER_FEED]):
+                # Clean HTML, newlines and extra spaces
+                summary = re.sub('<[^<]+?>', '', entry.get('summary', 'No Summary'))
+                entries.append({
+                    "source": RSS_FEEDS[url],
+                    "rank": rank,
+                    "title": entry.get('title', 'No Title'),
+                    "summary": " ".join(summary.split()),
+                })
+        except Exception:
+            continue
+
+    _news_cache.update(time=time.time(), entries=entries)
+    return entries
 
 def get_crypto_news(query: str = "latest") -> str:
     """
@@ -13,55 +61,17 @@ def get_crypto_news(query: str = "latest") -> str:
     Returns:
         str: A summary of the latest news from CoinDesk.
     """
-    import random
-    import re
-    
-    # List of high-quality RSS feeds
-    rss_feeds = [
-        "https://www.coindesk.com/arc/outboundfeeds/rss/?outputType=xml",
-        "https://cointelegraph.com/rss",
-        "https://cryptoslate.com/feed/",
-        "https://finance.yahoo.com/news/rssindex",
-        "https://decrypt.co/feed",
-        "https://thedefiant.io/feed"
-    ]
-    
     try:
-        # Select fewer feeds to save tokens (3 instead of 4)
-        selected_feeds = random.sample(rss_feeds, min(3, len(rss_feeds)))
         news_summary = ""
-        
-        for url in selected_feeds:
-            try:
-                feed = feedparser.parse(url)
-                if not feed.entries: continue
-                
-                source_name = "Unknown"
-                if "coindesk" in url: source_name = "CoinDesk"
-                elif "cointelegraph" in url: source_name = "CoinTelegraph"
-                elif "cryptoslate" in url: source_name = "CryptoSlate"
-                elif "yahoo" in url: source_name = "Yahoo"
-                elif "decrypt" in url: source_name = "Decrypt"
-                elif "thedefiant" in url: source_name = "Defiant"
-                
-                # Get top 2 entries per feed (was 3)
-                for entry in feed.entries[:2]:
-                    title = entry.get('title', 'No Title')
-                    summary = entry.get('summary', 'No Summary')
-                    
-                    # Clean HTML
-                    summary = re.sub('<[^<]+?>', '', summary)
-                    # Remove newlines and extra spaces
-                    summary = " ".join(summary.split())
-                    
-                    # Truncate aggressively (120 chars)
-                    if len(summary) > 120:
-                        summary = summary[:120] + "..."
-                        
-                    # Compact format
-                    news_summary += f"- [{source_name}] {title}: {summary}\n"
-            except:
+        for entry in fetch_news_entries():
+            if entry["rank"] >= PROMPT_ENTRIES_PER_FEED:
                 continue
+            summary = entry["summary"]
+            # Truncate aggressively (120 chars)
+            if len(summary) > 120:
+                summary = summary[:120] + "..."
+            # Compact format
+            news_summary += f"- [{entry['source']}] {entry['title']}: {summary}\n"
                 
         return news_summary if news_summary else "No news found."
     except Exception as e:
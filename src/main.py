@@ -1,29 +1,34 @@
-import os
 import time
+import argparse
 from dotenv import load_dotenv
-from agno.agent import Agent
-from src.agents.news_agent import news_agent
+from src.agents.news_agent import news_agent, fetch_news_entries
 from src.agents.telegram_agent import send_telegram_message
 from src.train_model import train_and_predict
 from src.utils.db_manager import DBManager
+from src.utils.explain import format_drivers
+from src.utils.horizons import HORIZONS
+from src.utils.checkpoints import RunCheckpoints, resume_or_new, gc_checkpoints, RESUME_WINDOW_SEC
+from src.utils.news_scoring import local_pick, tone_label
 
 # Load environment variables
 load_dotenv()
 
-def main():
-    print("Starting Dynamic Crypto Agent Pipeline...")
-    
-    # Initialize database
-    db = DBManager()
-    recent_picks = db.get_recent_picks(10)
-    history_summary = db.get_history_summary(3)
-    print(f"📜 {history_summary}")
-    
-    # 1. Get Trending Asset from News Agent
+# Constants
+RATE_LIMIT_SLEEP_SEC = 20 # Pause after a News Agent call to prevent 429
+LLM_CANDIDATES = 3 # Leading local candidates passed to the News Agent when the scan is ambiguous
+
+def consult_news_agent(recent_picks, candidates=()):
+    """Ask the News Agent (LLM) for the pick. Returns (ticker, reason); BTC-USD if it fails."""
     print("Consulting News Agent for the best pick...")
     
     # Format recent picks for context
     recent_list = "\n".join([f"- {p['ticker']} ({p['direction']})" for p in recent_picks]) if recent_picks else "None"
+    # The local scan was ambiguous; pass its leading candidates along
+    candidates_text = ""
+    if candidates:
+        candidates_text = "\n\nLocal headline scan (no clear winner):\n" + "\n".join(
+            f"- {c['ticker']}: {c['entries']} headlines, {tone_label(c['sentiment'])}" for c in candidates
+        )
     
     try:
         prompt = f"""Find the best crypto asset to buy for tomorrow.
@@ -31,29 +36,29 @@ def main():
 IMPORTANT: Avoid these recently picked assets (aim for diversity):
 {recent_list}
 
-Pick a NEW asset with strong market-moving news."""
-        
+Pick a NEW asset with strong market-moving news.{candidates_text}"""
+    
         news_response = news_agent.run(prompt)
         content = news_response.content.strip()
-        
+    
         # Debug: Show raw response
         print(f"\n🔍 News Agent Raw Response:\n{content}\n")
-        
+    
         # Parse TICKER and REASON (case-insensitive, handle markdown)
         ticker = None
         reason = None
-        
+    
         lines = content.split('\n')
         for line in lines:
             # Remove markdown formatting (**, *, etc.)
             clean_line = line.replace("**", "").replace("*", "").strip()
             line_upper = clean_line.upper()
-            
+        
             if line_upper.startswith("TICKER:"):
                 ticker = clean_line.split(":", 1)[1].strip().upper()
             elif line_upper.startswith("REASON:"):
                 reason = clean_line.split(":", 1)[1].strip()
-        
+    
         # Fallback to defaults if parsing failed
         if not ticker:
             print("⚠️ WARNING: Could not parse TICKER from response, using default BTC-USD")
@@ -61,36 +66,106 @@ Pick a NEW asset with strong market-moving news."""
         if not reason:
             print("⚠️ WARNING: Could not parse REASON from response")
             reason = "Market analysis."
-        
+    
         # Basic validation
         if not ticker.endswith("-USD"):
             if len(ticker) <= 5 and ticker.isalpha():
                 ticker = f"{ticker}-USD"
-        
+    
         print(f"✅ Selected Asset: {ticker}")
         print(f"✅ Reason: {reason}")
-        
+    
     except Exception as e:
         print(f"❌ News Agent failed with error: {e}")
         print("Defaulting to BTC-USD due to News Agent failure.")
         ticker = "BTC-USD"
         reason = "Automated fallback selection due to News Agent error."
+    return ticker, reason
 
-    # Throttle to prevent 429
-    print("Sleeping for 20s to respect rate limits...")
-    time.sleep(20)
+def main(run_id=None):
+    """
+    One pipeline run. Every stage is checkpointed under the run id, so a run
+    that failed part-way is resumed from its last completed stage (the latest
+    unfinished run is picked up automatically unless `run_id` is given).
+    Returns True once the run has completed.
+    """
+    print("Starting Dynamic Crypto Agent Pipeline...")
+    run = RunCheckpoints(run_id) if run_id else resume_or_new()
+    print(f"Run id: {run.run_id}")
+    removed = gc_checkpoints(exclude=[run.run_id])
+    if removed:
+        print(f"Removed {len(removed)} old run checkpoint(s)")
+    if run.finished:
+        print("Run already completed; nothing to do.")
+        return True
+    
+    # Initialize database
+    db = DBManager()
+    recent_picks = db.get_recent_picks(10)
+    history_summary = db.get_history_summary(3)
+    print(f"📜 {history_summary}")
+    
+    # 1. Get Trending Asset from News Agent
+    if run.has("news_pick"):
+        ticker, reason = run.load("news_pick")
+        print(f"✅ Resumed pick: {ticker}")
+    else:
+        # Local fast path: score the RSS headlines and only consult the LLM
+        # when no single asset clearly dominates
+        entries = fetch_news_entries()
+        start = time.perf_counter()
+        ticker, reason, ranked = local_pick(entries, exclude=[p['ticker'] for p in recent_picks])
+        local_sec = time.perf_counter() - start
+
+        llm_sec = None
+        if ticker:
+            print(f"✅ Local pick: {ticker} (score {ranked[0]['score']:.1f}, {ranked[0]['entries']} headlines); skipping News Agent")
+            print(f"✅ Reason: {reason}")
+            db.add_selection("local", ticker, local_sec)
+        else:
+            llm_start = time.perf_counter()
+            ticker, reason = consult_news_agent(recent_picks, ranked[:LLM_CANDIDATES])
+            llm_sec = time.perf_counter() - llm_start
+            db.add_selection("llm", ticker, local_sec, llm_sec, RATE_LIMIT_SLEEP_SEC)
+
+        stats = db.get_selection_stats()
+        saved = stats['saved_sec_per_run']
+        print(f"📊 News Agent skipped in {stats['skipped']}/{stats['runs']} runs ({stats['skip_rate']:.0%})"
+              + (f", ~{saved:.1f}s saved per run" if saved is not None else ""))
+
+        # The pick is fixed for the run so later stages stay consistent on resume
+        run.save("news_pick", (ticker, reason))
+
+        if llm_sec is not None:
+            # Throttle to prevent 429
+            print(f"Sleeping for {RATE_LIMIT_SLEEP_SEC}s to respect rate limits...")
+            time.sleep(RATE_LIMIT_SLEEP_SEC)
 
     # 2. Dynamic Training & Prediction
     print(f"Training model and predicting for {ticker}...")
-    result = train_and_predict(ticker)
+    if run.has("result"):
+        result = run.load("result")
+    else:
+        result = train_and_predict(ticker, horizons=HORIZONS, checkpoints=run)
+        # Failed analyses are not checkpointed, so a retry runs them again
+        if "error" not in result:
+            run.save("result", result)
     
     if "error" in result:
         error_msg = f"Analysis failed for {ticker}: {result['error']}"
         print(error_msg)
-        send_telegram_message(f"⚠️ Error: {error_msg}")
-        return
+        # Alert once per run: scheduler retries resume this run and fail the same way
+        if not run.has("error_notified"):
+            send_telegram_message(f"⚠️ Error: {error_msg}")
+            run.save("error_notified", True)
+        return False
 
     # 3. Construct Message
+    drivers_text = format_drivers(result.get('drivers', [])) or "n/a"
+    horizons_text = "\n".join(
+        f"*   {h}d: {f['direction']} {f['pred_pct']:+.2f}% (Rp {f['predicted_price_idr']:,.0f})"
+        for h, f in result.get('horizons', {}).items()
+    ) or "n/a"
     direction_emoji = "🚀" if result['direction'] == "BULLISH" else "🔻"
     
     if result['direction'] == "BULLISH":
@@ -106,6 +181,12 @@ Pick a NEW asset with strong market-moving news."""
 *   **Stop Loss**: Rp {result['sl_idr']:,.0f} ($ {result['sl_usd']:.2f})
 *   **Take Profit**: Rp {result['tp_idr']:,.0f} ($ {result['tp_usd']:.2f})
 
+📅 **Multi-Horizon Forecast**:
+{horizons_text}
+
+🔍 **Top Model Drivers**:
+{drivers_text}
+
 📰 **Why this coin?**
 {reason}
 
@@ -124,6 +205,12 @@ Pick a NEW asset with strong market-moving news."""
 The model predicts a price drop to **Rp {result['predicted_price_idr']:,.0f}** ($ {result['predicted_price_usd']:.2f}) tomorrow.
 No long trade recommended at this time.
 
+📅 **Multi-Horizon Forecast**:
+{horizons_text}
+
+🔍 **Top Model Drivers**:
+{drivers_text}
+
 📰 **News Context**:
 {reason}
 
@@ -142,6 +229,12 @@ No long trade recommended at this time.
 The market is expected to be choppy or flat tomorrow.
 No clear trade setup recommended. Wait for volatility.
 
+📅 **Multi-Horizon Forecast**:
+{horizons_text}
+
+🔍 **Top Model Drivers**:
+{drivers_text}
+
 📰 **News Context**:
 {reason}
 
@@ -156,16 +249,18 @@ No clear trade setup recommended. Wait for volatility.
 *DYOR.*
         """
     
-    # Log pick to database
-    db.add_pick(
-        ticker=result['ticker'],
-        direction=result['direction'],
-        pred_pct=result['pred_pct'],
-        volatility=result.get('volatility', 0.0),
-        current_price_usd=result['current_price_usd'],
-        reason=reason
-    )
-    print(f"✅ Logged {result['ticker']} ({result['direction']}) to database")
+    # Log pick to database (once per run, even if the run is resumed)
+    if not run.has("logged"):
+        db.add_pick(
+            ticker=result['ticker'],
+            direction=result['direction'],
+            pred_pct=result['pred_pct'],
+            volatility=result.get('volatility', 0.0),
+            current_price_usd=result['current_price_usd'],
+            reason=reason
+        )
+        run.save("logged", True)
+        print(f"✅ Logged {result['ticker']} ({result['direction']}) to database")
 
     # Throttle before sending telegram
     print("Sleeping for 20s before sending Telegram...")
@@ -176,5 +271,15 @@ No clear trade setup recommended. Wait for volatility.
     telegram_status = send_telegram_message(final_message)
     print(f"Telegram Status: {telegram_status}")
 
+    if telegram_status == "Message sent successfully.":
+        run.finish()
+        return True
+    print(f"Run {run.run_id} left unfinished; resume it with --run-id {run.run_id} "
+          f"(the scheduler retries it within {RESUME_WINDOW_SEC // 3600} hours).")
+    return False
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--run-id", default=None, help="Resume (or start) this run id")
+    args = parser.parse_args()
+    main(run_id=args.run_id)
@@ -4,17 +4,35 @@ import pytz
 from datetime import datetime
 from src.main import main as run_agent
 from src.train_model import train as run_training
+from src.utils.drift import load_drift_monitor
+from src.utils.prediction_snapshot import read_snapshot, refresh_snapshot
+from src.utils.checkpoints import RESUME_WINDOW_SEC
+
+# Settings
+SNAPSHOT_RETRY_SEC = 600 # Wait between failed snapshot refreshes
+PREDICTION_RETRIES = 3 # Retries of an unfinished prediction run
+# Spaced so every retry still falls in the resume window and picks up the failed run
+PREDICTION_RETRY_SEC = RESUME_WINDOW_SEC // (PREDICTION_RETRIES + 1)
+PREDICTION_TIMES = ["07:00", "14:00"] # Daily, Jakarta time
+TRAINING_TIME = "02:00" # 1st of the month, Jakarta time
+JOB_GRACE_SEC = 3600 # A job still runs this long after its time (e.g. if another job was running)
 
 # Timezone
 JAKARTA_TZ = pytz.timezone('Asia/Jakarta')
 
 def job_prediction():
+    """Run the prediction pipeline. Returns False if the run did not complete."""
     print(f"\n[Scheduler] Starting Prediction Job at {datetime.now(JAKARTA_TZ)}")
     try:
-        run_agent()
-        print(f"[Scheduler] Prediction Job finished at {datetime.now(JAKARTA_TZ)}")
+        finished = run_agent()
     except Exception as e:
         print(f"[Scheduler] Prediction Job failed: {e}")
+        return False
+    if not finished:
+        print(f"[Scheduler] Prediction Job left its run unfinished at {datetime.now(JAKARTA_TZ)}")
+        return False
+    print(f"[Scheduler] Prediction Job finished at {datetime.now(JAKARTA_TZ)}")
+    return True
 
 def job_training():
     print(f"\n[Scheduler] Starting Monthly Training Job at {datetime.now(JAKARTA_TZ)}")
@@ -23,29 +41,86 @@ def job_training():
         print(f"[Scheduler] Training Job finished at {datetime.now(JAKARTA_TZ)}")
     except Exception as e:
         print(f"[Scheduler] Training Job failed: {e}")
+        return
+    # Predictions from the old model are outdated
+    job_snapshot()
+
+def job_snapshot():
+    """Write a new prediction snapshot for the crypto_agent tool. Returns False on failure."""
+    try:
+        snapshot = refresh_snapshot()
+    except Exception as e:
+        snapshot = {"error": str(e)}
+    if "error" in snapshot:
+        print(f"[Scheduler] Snapshot failed: {snapshot['error']}")
+        return False
+    return True
+
+def job_drift():
+    """Check the drift state (updated by each snapshot refresh); retrain early instead of waiting for the monthly job if needed."""
+    try:
+        monitor = load_drift_monitor()
+        reasons = monitor.retrain_reasons() if monitor is not None else []
+    except Exception as e:
+        print(f"[Scheduler] Drift check failed: {e}")
+        return
+    if reasons:
+        print(f"[Scheduler] Drift detected ({'; '.join(reasons)}). Retraining early.")
+        job_training()
+
+def _due(now, hhmm, last_run, grace_sec=JOB_GRACE_SEC):
+    """
+    True once per day for the `hhmm` slot: when `now` is within `grace_sec`
+    after it and it has not run yet. Marks the slot as run in `last_run`.
+    """
+    hour, minute = map(int, hhmm.split(":"))
+    slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if not 0 <= (now - slot).total_seconds() < grace_sec or last_run.get(hhmm) == slot:
+        return False
+    last_run[hhmm] = slot
+    return True
 
 def start_scheduler():
     print(f"[Scheduler] Service started. Timezone: {JAKARTA_TZ}")
-    print("[Scheduler] Scheduled for 07:00 and 14:00 daily (Prediction).")
-    print("[Scheduler] Scheduled for 1st of month at 02:00 (Training).")
+    print(f"[Scheduler] Scheduled for {' and '.join(PREDICTION_TIMES)} daily (Prediction).")
+    print(f"[Scheduler] Scheduled for 1st of month at {TRAINING_TIME} (Training).")
+    print("[Scheduler] Prediction snapshot after each daily bar close.")
+    print("[Scheduler] Drift check after each snapshot (early retrain on drift).")
+    print(f"[Scheduler] Unfinished prediction runs retried up to {PREDICTION_RETRIES}x, "
+          f"every {PREDICTION_RETRY_SEC // 60} min.")
+    last_snapshot_attempt = 0.0
+    retry_at, retries_left = None, 0
+    last_run = {} # slot -> datetime it last ran for
     
     while True:
+        # Scheduled jobs go first, and run any time within JOB_GRACE_SEC of their
+        # slot, so a long snapshot refresh (the bar closes at 07:00 Jakarta) cannot skip them
         now_jakarta = datetime.now(JAKARTA_TZ)
-        current_time = now_jakarta.strftime("%H:%M")
-        day_of_month = now_jakarta.day
-        
+
         # Daily Prediction
-        if current_time == "07:00":
-            job_prediction()
-            time.sleep(61)
-        elif current_time == "14:00":
-            job_prediction()
-            time.sleep(61)
+        due = [slot for slot in PREDICTION_TIMES if _due(now_jakarta, slot, last_run)]
+        if due:
+            if job_prediction():
+                retry_at = None
+            else:
+                retry_at, retries_left = time.time() + PREDICTION_RETRY_SEC, PREDICTION_RETRIES
+        elif retry_at is not None and time.time() >= retry_at:
+            # The retry resumes the unfinished run from its last completed stage
+            retries_left -= 1
+            retry_at = None if job_prediction() or not retries_left else time.time() + PREDICTION_RETRY_SEC
             
-        # Monthly Training (1st day of month at 02:00 AM)
-        if day_of_month == 1 and current_time == "02:00":
+        # Monthly Training (1st day of month)
+        if now_jakarta.day == 1 and _due(now_jakarta, TRAINING_TIME, last_run):
             job_training()
-            time.sleep(61)
+
+        # Snapshot once a new bar has closed (the current one has expired)
+        if time.time() - last_snapshot_attempt >= SNAPSHOT_RETRY_SEC:
+            snapshot = read_snapshot()
+            if snapshot is None or snapshot["stale"]:
+                if job_snapshot():
+                    job_drift()
+                else:
+                    last_snapshot_attempt = time.time()
             
         time.sleep(30)
 
@@ -0,0 +1,145 @@
+from src.utils.data_loader import load_local_bars, DAILY_INTERVAL, WEEKLY_INTERVAL, INTRADAY_INTERVAL
+from src.utils.reference_data import reference_data
+from src.train_model import predict_from_bars
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import time
+
+# Constants
+SCREEN_TOP_K = int(os.getenv("SCREEN_TOP_K", 5))
+SCREEN_STAGE2_BUDGET_SEC = float(os.getenv("SCREEN_STAGE2_BUDGET_SEC", 300))
+MOMENTUM_WINDOW = 20
+RSI_WINDOW = 14
+MIN_HISTORY = 60 # Fewer daily bars than this cannot feed the model stage
+
+def _zscore(x):
+    """Cross-sectional z-score, NaN-aware."""
+    std = np.nanstd(x)
+    if not std > 0:
+        return np.zeros_like(x)
+    return (x - np.nanmean(x)) / std
+
+def prefilter_scores(close):
+    """
+    Stage 1: cheap vectorized signals for every asset at once.
+    `close` is a (time x ticker) frame; all statistics are column-wise array ops.
+
+    Returns a frame indexed by ticker, sorted by `score` (strongest first):
+      momentum       - log return over MOMENTUM_WINDOW bars
+      vol_adj_return - momentum / (daily vol * sqrt(window))
+      rsi14          - Wilder RSI on the latest bar
+      score          - |z(momentum) + z(vol_adj_return)| + z(|rsi14 - 50|)
+    Bullish and bearish extremes both rank high, as the news pick can go either way.
+    """
+    close = close.sort_index().ffill()
+    history = close.notna().sum().to_numpy()
+    prices = close.to_numpy(dtype=np.float64)
+    log_p = np.log(prices)
+    rets = np.diff(log_p, axis=0)
+    w = MOMENTUM_WINDOW
+
+    momentum = log_p[-1] - log_p[-1 - w] if len(log_p) > w else np.full(log_p.shape[1], np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vol = np.nanstd(rets[-w:], axis=0, ddof=1)
+        vol_adj = momentum / (vol * np.sqrt(w))
+
+    # Wilder RSI for all columns in one ewm pass (same smoothing as ta's RSIIndicator)
+    delta = pd.DataFrame(np.diff(prices, axis=0))
+    gain = delta.clip(lower=0).ewm(alpha=1 / RSI_WINDOW, min_periods=RSI_WINDOW, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / RSI_WINDOW, min_periods=RSI_WINDOW, adjust=False).mean()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100 - 100 / (1 + gain.iloc[-1].to_numpy() / loss.iloc[-1].to_numpy())
+
+    score = np.abs(_zscore(momentum) + _zscore(vol_adj)) + _zscore(np.abs(rsi - 50))
+    out = pd.DataFrame({
+        "momentum": momentum,
+        "vol_adj_return": vol_adj,
+        "rsi14": rsi,
+        "score": score,
+    }, index=close.columns)
+    out = out[(history >= MIN_HISTORY) & np.isfinite(score)]
+    return out.sort_values("score", ascending=False)
+
+def _ticker_bars(bars, ticker):
+    if bars is None or bars.empty or ticker not in bars.columns.get_level_values(0):
+        return None
+    return bars.loc[:, [ticker]].dropna(how="all")
+
+def screen_universe(tickers=None, top_k=SCREEN_TOP_K, budget_sec=SCREEN_STAGE2_BUDGET_SEC,
+                    daily=None, exog_close=None):
+    """
+    Two-stage screen over the local bar store.
+
+    Stage 1 scores the whole universe with prefilter_scores. Stage 2 runs the
+    full predict_from_bars model on the top_k candidates only, and stops
+    starting new models once budget_sec has elapsed.
+    """
+    # Stage 1: cheap vectorized prefilter
+    t0 = time.perf_counter()
+    if daily is None:
+        daily = load_local_bars(tickers, DAILY_INTERVAL)
+    if daily.empty:
+        return {"error": "No local bars found."}
+    close = daily.xs('Close', level=1, axis=1)
+    candidates = prefilter_scores(close)
+    stage1_sec = time.perf_counter() - t0
+    n_universe = close.shape[1]
+    print(f"Stage 1: scored {n_universe} tickers in {stage1_sec:.2f}s "
+          f"({n_universe / max(stage1_sec, 1e-9):,.0f} tickers/s)")
+
+    # Stage 2: full model on the top K
+    t1 = time.perf_counter()
+    top = candidates.index[:top_k].tolist()
+    weekly = load_local_bars(top, WEEKLY_INTERVAL)
+    intra = load_local_bars(top, INTRADAY_INTERVAL)
+    if exog_close is None:
+        try:
+            exog_close = reference_data.exog_close()
+        except Exception as e:
+            print(f"Warning: Exogenous features failed: {e}")
+            exog_close = pd.DataFrame()
+
+    results = []
+    skipped = []
+    for ticker in top:
+        if time.perf_counter() - t1 > budget_sec:
+            skipped.append(ticker)
+            continue
+        result = predict_from_bars(
+            ticker, _ticker_bars(daily, ticker), _ticker_bars(weekly, ticker),
+            _ticker_bars(intra, ticker), exog_close=exog_close,
+        )
+        result["screen_score"] = float(candidates.loc[ticker, "score"])
+        results.append(result)
+    stage2_sec = time.perf_counter() - t1
+    print(f"Stage 2: modeled {len(results)} tickers in {stage2_sec:.2f}s "
+          f"({len(results) / max(stage2_sec, 1e-9):,.2f} tickers/s), skipped {len(skipped)} over budget")
+
+    return {
+        "candidates": candidates,
+        "results": results,
+        "skipped": skipped,
+        "stats": {
+            "universe": n_universe,
+            "stage1_sec": stage1_sec,
+            "stage1_tickers_per_sec": n_universe / max(stage1_sec, 1e-9),
+            "stage2_sec": stage2_sec,
+            "stage2_tickers_per_sec": len(results) / max(stage2_sec, 1e-9),
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen the local bar store.")
+    parser.add_argument("--top-k", type=int, default=SCREEN_TOP_K)
+    parser.add_argument("--budget", type=float, default=SCREEN_STAGE2_BUDGET_SEC, help="Stage 2 budget in seconds")
+    args = parser.parse_args()
+
+    out = screen_universe(top_k=args.top_k, budget_sec=args.budget)
+    if "error" in out:
+        print(out["error"])
+    else:
+        print(out["candidates"].head(args.top_k))
+        for r in out["results"]:
+            print({k: r.get(k) for k in ("ticker", "direction", "pred_pct", "screen_score", "error")})
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from src.train_model import train_and_predict
+from src.utils.data_loader import next_bar_close
+
+# Settings
+PORT = int(os.getenv("PORT", 8080))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", 2)) # Processes running train_and_predict
+HEADER_TIMEOUT_SEC = 10
+ERROR_TTL_SEC = int(os.getenv("ERROR_TTL_SEC", 300)) # Error results (e.g. an unknown ticker) are cached this long
+TICKER_RE = re.compile(r"^[A-Z0-9^=.\-]{1,20}$")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class PredictionService:
+    """
+    Async HTTP front end for train_and_predict.
+
+    - Results are cached per ticker until the next bar close. Error results
+      (e.g. a well-formed ticker with no data) are cached for ERROR_TTL_SEC,
+      so repeated requests do not re-run the download retries; exceptions
+      are not cached.
+    - Concurrent requests for a ticker that is already being computed await the
+      same future instead of starting another run.
+    - Computations run in a process pool, so model training never blocks the
+      event loop and at most `workers` run at once.
+    """
+
+    def __init__(self, compute=train_and_predict, workers=SERVE_WORKERS, executor=None):
+        self.compute = compute
+        # forkserver: forked workers would inherit open client sockets and hold
+        # connections open after the server closes them
+        self.executor = executor or ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+        self._cache = {} # ticker -> (expires_at, result)
+        self._inflight = {} # ticker -> asyncio.Future
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "computed": 0, "errors": 0}
+
+    def _finish(self, ticker, started_at, fut):
+        """Done-callback of a computation: clear the in-flight slot and cache the result."""
+        self._inflight.pop(ticker, None)
+        self.stats["computed"] += 1
+        if fut.cancelled() or fut.exception() is not None:
+            self.stats["errors"] += 1
+            return
+        result = fut.result()
+        if "error" in result:
+            self.stats["errors"] += 1
+            expires_at = started_at + pd.Timedelta(seconds=ERROR_TTL_SEC)
+        else:
+            expires_at = next_bar_close(started_at)
+        # Drop expired entries so the cache stays bounded by the active tickers
+        self._cache = {t: e for t, e in self._cache.items() if e[0] > started_at}
+        self._cache[ticker] = (expires_at, result)
+
+    async def predict(self, ticker):
+        """Prediction dict for `ticker` from the cache, an in-flight run, or a new run."""
+        self.stats["requests"] += 1
+        now = pd.Timestamp.now(tz="UTC")
+        entry = self._cache.get(ticker)
+        if entry is not None and now < entry[0]:
+            self.stats["cache_hits"] += 1
+            return entry[1]
+
+        fut = self._inflight.get(ticker)
+        if fut is not None:
+            self.stats["coalesced"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(self.executor, self.compute, ticker)
+            fut.add_done_callback(lambda f: self._finish(ticker, now, f))
+            self._inflight[ticker] = fut
+        # shield: a client disconnecting must not cancel the shared computation
+        return await asyncio.shield(fut)
+
+    async def route(self, method, path):
+        """Return (status, payload) for one request."""
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+        parts = [p for p in path.split("?", 1)[0].split("/") if p]
+        if parts == ["health"]:
+            return 200, {"status": "ok", "cached": len(self._cache),
+                         "inflight": len(self._inflight), **self.stats}
+        if len(parts) == 2 and parts[0] == "predict":
+            ticker = parts[1].upper()
+            if not TICKER_RE.match(ticker):
+                return 400, {"error": f"invalid ticker: {parts[1]}"}
+            try:
+                result = await self.predict(ticker)
+            except Exception as e:
+                return 500, {"error": f"prediction failed: {e}"}
+            return (502 if "error" in result else 200), result
+        return 404, {"error": "not found"}
+
+    async def handle(self, reader, writer):
+        """One HTTP/1.1 request per connection (Connection: close)."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), HEADER_TIMEOUT_SEC)
+            method, path, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            status, payload = await self.route(method, path)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+            status, payload = 400, {"error": "bad request"}
+        body = json.dumps(payload, default=float).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def start_server(service, host="0.0.0.0", port=PORT):
+    """Start listening; returns the asyncio Server (port 0 picks a free port)."""
+    return await asyncio.start_server(service.handle, host, port, backlog=1024)
+
+async def serve(host="0.0.0.0", port=PORT, workers=SERVE_WORKERS):
+    service = PredictionService(workers=workers)
+    server = await start_server(service, host, port)
+    print(f"[Server] Listening on {host}:{port} with {workers} prediction workers")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP prediction service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.workers))
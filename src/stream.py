@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.utils.data_loader import load_local_bars, local_bar_files, INTRADAY_INTERVAL
+from src.utils.feature_engineering import PRICE_FEATURES, RELATIVE_PRICE_FEATURES
+from src.utils.model_trainer import ModelTrainer
+from src.utils.out_of_core import OOC_MODEL_PATH
+from src.utils.panel import build_panel, exog_feature_names
+from src.utils.reference_data import reference_data, align_to_calendar
+
+# Settings
+STREAM_WINDOW = int(os.getenv("STREAM_WINDOW", 500)) # Bars of history per asset for the indicators
+STREAM_MAX_BATCH = int(os.getenv("STREAM_MAX_BATCH", 1024)) # Bars scored together when the feed is ahead
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 4096)) # Bars buffered between feed and scorer
+STREAM_ALERT_QUEUE_SIZE = int(os.getenv("STREAM_ALERT_QUEUE_SIZE", 100))
+THRESHOLD_STD = 0.5 # Same rule as train_and_predict: signal if |pred| > 0.5 * volatility
+DEFAULT_VOLATILITY = 0.02
+MIN_BARS = 50 # Indicators are undefined (NaN) on shorter histories
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class AssetWindow:
+    """
+    Rolling bar history of one asset in a preallocated buffer. The buffer is
+    compacted in place when full, so memory per asset is fixed.
+    """
+
+    def __init__(self, ticker, keep):
+        self.ticker = ticker
+        self.keep = keep
+        self.values = np.empty((2 * keep, len(FIELDS)))
+        self.ts = np.empty(2 * keep, dtype=np.int64)
+        self.stop = 0
+
+    def append(self, ts, row):
+        if self.stop == len(self.ts):
+            self.values[:self.keep] = self.values[self.stop - self.keep:self.stop]
+            self.ts[:self.keep] = self.ts[self.stop - self.keep:self.stop]
+            self.stop = self.keep
+        self.values[self.stop] = row
+        self.ts[self.stop] = ts
+        self.stop += 1
+
+    def frame(self, n_rows):
+        """Last n_rows bars as a (Ticker, Field) frame."""
+        start = max(self.stop - n_rows, 0)
+        columns = pd.MultiIndex.from_product([[self.ticker], FIELDS])
+        index = pd.DatetimeIndex(self.ts[start:self.stop], tz="UTC")
+        return pd.DataFrame(self.values[start:self.stop], index=index, columns=columns)
+
+
+class SignalStream:
+    """
+    Scorer for a live bar feed by windowed recomputation. Each asset keeps
+    its last STREAM_WINDOW bars; when new bars arrive, that asset's
+    indicators are rebuilt from scratch over the window (no recursive
+    indicator state is carried between batches) and every new bar is scored
+    with the pooled model. A batch therefore costs O(STREAM_WINDOW) per
+    asset, not O(new bars). A signal is emitted only when an asset crosses
+    into BULLISH or BEARISH.
+    """
+
+    def __init__(self, trainer, exog_close=None, window=STREAM_WINDOW, max_batch=STREAM_MAX_BATCH):
+        self.trainer = trainer
+        self.columns = trainer.selected_features
+        # Exog columns would otherwise be all-NaN, silently unlike training
+        missing = [c for c in exog_feature_names(self.columns)
+                   if exog_close is None or c not in exog_close.columns]
+        if missing:
+            raise ValueError(f"The model uses exogenous features {missing}; pass their closes as exog_close.")
+        self.asset_ids = trainer.metadata.get("asset_ids", {})
+        self.exog_close = exog_close
+        self.window = window
+        self.max_batch = max_batch
+        self._windows = {}
+        self._direction = {}
+        # Rows are scored once their price indicators are warmed up
+        price_features = set(PRICE_FEATURES) | set(RELATIVE_PRICE_FEATURES)
+        self._required = [i for i, c in enumerate(self.columns) if c in price_features]
+        self.stats = {"bars": 0, "batches": 0, "scored": 0, "alerts": 0, "max_queue": 0}
+
+    def _features(self, tkr, n_new):
+        """
+        Feature rows, closes and threshold for the n_new most recent bars of
+        one asset, from a full build_panel over its window plus those bars.
+        """
+        frame = self._windows[tkr].frame(self.window + n_new)
+        exog = align_to_calendar(self.exog_close, frame.index) if self.exog_close is not None else None
+        panel = build_panel(frame, None, None, [tkr], self.asset_ids, exog=exog, columns=self.columns)
+        close = frame[tkr, 'Close'].to_numpy()
+        # Volatility from the history before this batch, so no bar sees its successors
+        history = np.diff(np.log(close[:len(close) - n_new + 1]))
+        volatility = np.std(history, ddof=1) if len(history) > 1 else np.nan
+        if np.isnan(volatility) or volatility == 0:
+            volatility = DEFAULT_VOLATILITY
+        return panel.values[-n_new:], frame.index[-n_new:], close[-n_new:], THRESHOLD_STD * volatility
+
+    def update(self, bars):
+        """Ingest (ts_ns, ticker, ohlcv) bars; return the threshold-crossing signals in time order."""
+        new = {}
+        for ts, tkr, row in bars:
+            if tkr not in self._windows:
+                self._windows[tkr] = AssetWindow(tkr, self.window + self.max_batch)
+            self._windows[tkr].append(ts, row)
+            new[tkr] = new.get(tkr, 0) + 1
+        self.stats["bars"] += len(bars)
+        self.stats["batches"] += 1
+
+        blocks, meta = [], []
+        for tkr, n_new in new.items():
+            if self._windows[tkr].stop < MIN_BARS:
+                continue
+            values, times, close, threshold = self._features(tkr, n_new)
+            blocks.append(values)
+            meta += [(tkr, t, c, threshold) for t, c in zip(times, close)]
+        if not blocks:
+            return []
+        values = np.vstack(blocks)
+        ready = np.flatnonzero(np.isfinite(values[:, self._required]).all(axis=1))
+        if not len(ready):
+            return []
+        preds = self.trainer.predict(values[ready])
+        self.stats["scored"] += len(ready)
+
+        signals = []
+        for i, pred in zip(ready, preds):
+            tkr, t, price, threshold = meta[i]
+            if pred > threshold:
+                direction = "BULLISH"
+            elif pred < -threshold:
+                direction = "BEARISH"
+            else:
+                direction = "NEUTRAL"
+            previous = self._direction.get(tkr, "NEUTRAL")
+            self._direction[tkr] = direction
+            if direction != previous and direction != "NEUTRAL":
+                signals.append({
+                    "ticker": tkr,
+                    "time": t,
+                    "direction": direction,
+                    "pred_return": float(pred),
+                    "threshold": threshold,
+                    "price_usd": float(price),
+                })
+        self.stats["alerts"] += len(signals)
+        return sorted(signals, key=lambda s: s["time"])
+
+
+def bar_feed(bars, tickers=None):
+    """Replay a (Ticker, Field) frame as a time-ordered stream of (ts_ns, ticker, ohlcv) bars."""
+    available = list(dict.fromkeys(bars.columns.get_level_values(0)))
+    tickers = [t for t in tickers if t in available] if tickers else available
+    cube = np.stack([bars[t][FIELDS].to_numpy(dtype=np.float64) for t in tickers], axis=1)
+    ts = np.asarray(bars.index.values, dtype="datetime64[ns]").view(np.int64)
+    for i in range(len(ts)):
+        for a, tkr in enumerate(tickers):
+            if not np.isnan(cube[i, a, 3]):
+                yield ts[i], tkr, cube[i, a]
+
+def format_alert(signal):
+    return (f"{signal['ticker']} turned {signal['direction']} at {signal['time']:%Y-%m-%d %H:%M} UTC\n"
+            f"Price: ${signal['price_usd']:,.2f}\n"
+            f"Predicted next-bar return: {signal['pred_return']:.4f} (threshold {signal['threshold']:.4f})")
+
+def print_alert(signal):
+    print(f"[Stream] {format_alert(signal)}")
+
+
+async def _produce(feed, queue, rate):
+    for bar in feed:
+        await queue.put(bar) # Suspends while the scorer is QUEUE_SIZE bars behind
+        if rate:
+            await asyncio.sleep(1.0 / rate)
+    await queue.put(None)
+
+async def _score(stream, bars_q, alerts_q):
+    done = False
+    while not done:
+        batch = [await bars_q.get()]
+        while len(batch) < stream.max_batch and not bars_q.empty():
+            batch.append(bars_q.get_nowait())
+        stream.stats["max_queue"] = max(stream.stats["max_queue"], bars_q.qsize() + len(batch))
+        if batch[-1] is None:
+            done = True
+            batch.pop()
+        if batch:
+            for signal in stream.update(batch):
+                await alerts_q.put(signal) # Suspends while the sink is behind
+        await asyncio.sleep(0) # Let the feed refill the queue
+    await alerts_q.put(None)
+
+async def _deliver(alerts_q, sink):
+    loop = asyncio.get_running_loop()
+    while (signal := await alerts_q.get()) is not None:
+        # Sinks may block (HTTP); keep them off the event loop
+        await loop.run_in_executor(None, sink, signal)
+
+async def run_stream(stream, feed, sink=print_alert, queue_size=STREAM_QUEUE_SIZE,
+                     alert_queue_size=STREAM_ALERT_QUEUE_SIZE, rate=0.0):
+    """
+    Feed -> scorer -> alert sink over bounded queues. A slow stage makes the
+    stage before it wait instead of buffering, so memory stays bounded.
+    `rate` paces the feed in bars/s (0 = as fast as possible).
+    Returns the stream stats including bars_per_sec.
+    """
+    bars_q = asyncio.Queue(maxsize=queue_size)
+    alerts_q = asyncio.Queue(maxsize=alert_queue_size)
+    t0 = time.perf_counter()
+    await asyncio.gather(_produce(feed, bars_q, rate), _score(stream, bars_q, alerts_q),
+                         _deliver(alerts_q, sink))
+    elapsed = time.perf_counter() - t0
+    stream.stats["elapsed_sec"] = elapsed
+    stream.stats["bars_per_sec"] = stream.stats["bars"] / elapsed if elapsed > 0 else 0.0
+    return stream.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming signals over a replay of the local bar store")
+    parser.add_argument("--tickers", nargs="*", help="Defaults to every ticker in data/raw/<interval>")
+    parser.add_argument("--interval", default=INTRADAY_INTERVAL)
+    parser.add_argument("--model", default=OOC_MODEL_PATH, help="Pooled model trained on this interval")
+    parser.add_argument("--rate", type=float, default=0.0, help="Replay speed in bars/s (0 = max)")
+    parser.add_argument("--telegram", action="store_true", help="Send alerts to Telegram")
+    args = parser.parse_args()
+
+    trainer = ModelTrainer(model_path=args.model)
+    if not trainer.load_model():
+        print(f"Model not found at {args.model}. Train it first with src.utils.out_of_core.train_out_of_core().")
+        return
+
+    # A model trained with exog_close (e.g. reference_data.exog_close()) needs the same series
+    exog_close = None
+    if exog_feature_names(trainer.selected_features):
+        try:
+            exog_close = reference_data.exog_close()
+        except Exception as e:
+            print(f"The model uses exogenous features, but they could not be loaded: {e}")
+            return
+
+    tickers = args.tickers or list(local_bar_files(args.interval))
+    bars = load_local_bars(tickers, args.interval)
+    sink = print_alert
+    if args.telegram:
+        from src.agents.telegram_agent import send_telegram_message
+        sink = lambda signal: print(send_telegram_message(format_alert(signal)))
+
+    print(f"[Stream] Replaying {len(bars)} {args.interval} timestamps for {len(tickers)} assets...")
+    try:
+        stream = SignalStream(trainer, exog_close)
+    except ValueError as e:
+        print(e)
+        return
+    stats = asyncio.run(run_stream(stream, bar_feed(bars, tickers), sink, rate=args.rate))
+    print(f"[Stream] {stats['bars']} bars, {stats['alerts']} alerts, "
+          f"{stats['bars_per_sec']:,.0f} bars/s (max queue {stats['max_queue']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,143 @@
-from src.utils.data_loader import batch_download, PERIOD_DAILY, PERIOD_WEEKLY, PERIOD_INTRADAY, DAILY_INTERVAL, WEEKLY_INTERVAL, INTRADAY_INTERVAL
-from src.utils.feature_engineering import build_features_from_price
+from src.utils.data_loader import batch_download, ASSETS, PERIOD_DAILY, PERIOD_WEEKLY, PERIOD_INTRADAY, DAILY_INTERVAL, WEEKLY_INTERVAL, INTRADAY_INTERVAL
+from src.utils.feature_engineering import build_feature_matrix, row_selector, nan_free_rows
 from src.utils.model_trainer import ModelTrainer
-import pandas as pd
-import yfinance as yf
+from src.utils.panel import build_panel, ASSET_ID, PANEL_MODEL_PATH
+from src.utils.feature_selection import (
+    select_features, gain_shares, mean_gain_shares, keeps_accuracy, IMPORTANCE_RUNS,
+)
+from src.utils.reference_data import reference_data, align_to_calendar
+from src.utils.explain import split_contrib, top_drivers
+from src.utils.horizons import horizon_targets, train_horizons
+from src.utils.checkpoints import run_stage
+from src.utils.drift import feature_snapshot
+from src.utils.dataset_cache import DATASET_CACHE_DIR
+from src.utils.bars import as_bars
 import numpy as np
-import os
 
-# Constants
-EXOG = ["^VIX", "UUP", "GC=F", "^TNX"]
-
-def train_and_predict(ticker: str):
+def train_and_predict(ticker: str, horizons=None, checkpoints=None):
     """
     Downloads data, trains a model, and predicts for a specific ticker.
+    Pass `horizons` (e.g. HORIZONS) to also forecast several days ahead.
+    With `checkpoints` (a RunCheckpoints), the feature matrix and trained
+    models are persisted as stages and reused when the run is resumed.
     """
     print(f"Starting Dynamic Analysis for {ticker}...")
     assets = [ticker]
-    
-    # 1. Download Data
-    print(f"Downloading data for {ticker}...")
+
+    def load_features():
+        # 1. Download Data
+        print(f"Downloading data for {ticker}...")
+        try:
+            daily = batch_download(assets, PERIOD_DAILY, DAILY_INTERVAL, as_bars=True)
+            weekly = batch_download(assets, PERIOD_WEEKLY, WEEKLY_INTERVAL, as_bars=True)
+            intra = batch_download(assets, PERIOD_INTRADAY, INTRADAY_INTERVAL, as_bars=True)
+        except Exception as e:
+            raise ValueError(f"Data download failed: {e}") from e
+        return ticker_features(ticker, daily, weekly, intra)
+
     try:
-        daily = batch_download(assets, PERIOD_DAILY, DAILY_INTERVAL)
-        weekly = batch_download(assets, PERIOD_WEEKLY, WEEKLY_INTERVAL)
-        intra = batch_download(assets, PERIOD_INTRADAY, INTRADAY_INTERVAL)
-    except Exception as e:
-        return {"error": f"Data download failed: {e}"}
-    
-    # 2. Feature Engineering
-    print("Building features...")
+        fm, close_series = run_stage(checkpoints, "features", load_features)
+    except ValueError as e:
+        return {"error": str(e)}
+    return forecast(ticker, fm, close_series, horizons=horizons, checkpoints=checkpoints)
+
+def predict_from_bars(ticker: str, daily, weekly=None, intra=None, exog_close=None, features=None,
+                      horizons=None):
+    """
+    Trains a model and predicts for a specific ticker from already-loaded bars
+    in (Ticker, Field) layout. `exog_close` overrides the shared EXOG copy.
+    `features` restricts the indicators built (default: all). With
+    `horizons`, one model per horizon is
+    trained from the same feature matrix and binned Dataset, and the result
+    gets a "horizons" dict of {h: forecast}.
+    """
     try:
-        features_df = build_features_from_price(daily, weekly, intra, assets=assets)
-    except Exception as e:
-        return {"error": f"Feature engineering failed: {e}"}
-    
-    # Add Exogenous Features
+        fm, close_series = ticker_features(ticker, daily, weekly, intra, exog_close, features)
+    except ValueError as e:
+        return {"error": str(e)}
+    return forecast(ticker, fm, close_series, horizons=horizons)
+
+def ticker_features(ticker: str, daily, weekly=None, intra=None, exog_close=None, features=None):
+    """
+    Feature matrix and float64 closes (aligned with it) for one ticker.
+    Bars are Bars or (Ticker, Field) frames. Raises ValueError with the
+    pipeline's error message on failure.
+    """
+    assets = [ticker]
+    daily, weekly, intra = as_bars(daily), as_bars(weekly), as_bars(intra)
+
+    # 2. Exogenous Features
+    # Shared cached copy, forward-filled onto the 24/7 crypto calendar
+    exog_df = None
     try:
-        exog = yf.download(EXOG, period=PERIOD_DAILY, interval=DAILY_INTERVAL, group_by='column', progress=False, auto_adjust=False)
-        exog_close = {}
-        for t in EXOG:
-             if isinstance(exog.columns, pd.MultiIndex):
-                exog_close[f"EXOG_{t.replace('^','').replace('=','')}"] = exog['Close'][t].rename(f"EXOG_{t}")
-        
-        if exog_close:
-            exog_df = pd.concat(exog_close.values(), axis=1)
-            features_df = features_df.join(exog_df)
+        if exog_close is None:
+            exog_df = reference_data.exog_features(daily.index)
+        else:
+            exog_df = align_to_calendar(exog_close, daily.index)
     except Exception as e:
         print(f"Warning: Exogenous features failed: {e}")
 
-    # 3. Prepare Target
+    # 3. Feature Engineering
+    # One preallocated float32 matrix; exog columns are written into their slots
+    print("Building features...")
+    try:
+        fm = build_feature_matrix(daily, weekly, intra, assets=assets, exog=exog_df, features=features)
+    except Exception as e:
+        raise ValueError(f"Feature engineering failed: {e}") from e
+
+    # Target from the float64 source prices (the close feature may be pruned)
+    if not daily.has(ticker, 'Close') or not fm.columns:
+        raise ValueError(f"Target column for {ticker} not found.")
+    return fm, daily.series(ticker, 'Close').reindex(fm.index)
+
+def forecast(ticker: str, fm, close_series, horizons=None, checkpoints=None):
+    """
+    Trains on `fm` (next-day target plus any `horizons`) and forecasts the
+    latest row. The trained models are the "model" stage of `checkpoints`.
+    """
+    # 4. Prepare Target
     # We predict for the specific ticker
     try:
-        # Ticker column name might vary depending on how data_loader normalized it
-        # But build_features renames them to {ticker}_close
-        target_col = f"{ticker}_close"
-        if target_col not in features_df.columns:
-             # Try finding the close column
-             cols = [c for c in features_df.columns if "close" in c and ticker in c]
-             if cols:
-                 target_col = cols[0]
-             else:
-                 return {"error": f"Target column for {ticker} not found."}
-
-        close_series = features_df[target_col]
-        y_logret_ahead = np.log(close_series).diff().shift(-1).rename("y_log_return_t+1")
-        
-        # Filter for target
-        y = y_logret_ahead
+        # Next-day target plus any longer horizons, all from the same closes
+        horizons = sorted(set(horizons or []) | {1})
+        targets = horizon_targets(close_series.to_numpy(), horizons)
+        y_all = targets[1]
         
-        # Join and DropNA
-        data = features_df.join(y).dropna()
-        X = data.drop(columns=[y.name])
-        y = data[y.name]
+        # Drop NaN rows with a mask instead of join/dropna/drop frame copies
+        rows = row_selector(fm.valid_rows() & np.isfinite(y_all))
+        X = fm.values[rows]
+        y = y_all[rows]
         
-        if X.empty:
+        if len(X) == 0:
             return {"error": "Not enough data to train."}
 
-        # 4. Feature Selection
+        # 5. Feature Selection
         # Use all available features for this specific asset
-        selected_features = X.columns.tolist()
+        selected_features = fm.columns
         
-        # 5. Train Model
+        # 6. Train Model
         print(f"Training model on {len(X)} samples...")
-        trainer = ModelTrainer()
-        # We don't need to save the model artifact for this dynamic run
-        trainer.train(X, y, selected_features, task="regression", save_model=False)
-        
-        # 6. Predict Next Day
-        latest_features = features_df.iloc[[-1]][selected_features]
-        
-        if latest_features.isnull().values.any():
-             latest_features = latest_features.fillna(method='ffill')
+        # Bins persist across runs; each day's run only appends the new rows
+        dates = fm.index[rows]
+        def fit():
+            if len(horizons) > 1:
+                # Binned once; the horizon models train concurrently
+                return train_horizons(X, {h: t[rows] for h, t in targets.items()}, selected_features,
+                                      dates=dates, cache_dir=DATASET_CACHE_DIR)
+            trainer = ModelTrainer()
+            # We don't need to save the model artifact for this dynamic run
+            trainer.train(X, y, selected_features, task="regression", save_model=False,
+                          dates=dates, cache_dir=DATASET_CACHE_DIR)
+            return {1: trainer}
+
+        trainers = run_stage(checkpoints, "model", fit)
+        trainer = trainers[1]
         
-        pred_log_return = trainer.predict_next_day(latest_features)
+        # 7. Predict Next Day
+        # One pred_contrib call gives the prediction and its per-feature drivers
+        preds, contrib = split_contrib(trainer.predict_contrib(fm.values[-1:]))
+        pred_log_return = preds[0]
+        drivers = top_drivers(contrib[0], fm.columns, fm.values[-1])
         
         # Convert Log Return to Percentage
         pred_pct = (np.exp(pred_log_return) - 1) * 100
@@ -99,16 +146,13 @@ def train_and_predict(ticker: str):
         current_price = close_series.iloc[-1]
         
         # Get USD/IDR
-        try:
-            usd_idr = yf.Ticker("IDR=X").history(period="1d")['Close'].iloc[-1]
-        except:
-            usd_idr = 15000.0
+        usd_idr = reference_data.usd_idr()
             
         current_price_idr = current_price * usd_idr
         
         # Calculate Volatility (Standard Deviation of Log Returns)
         # This gives us a baseline for what constitutes a "significant" move for this specific asset
-        volatility = y.std()
+        volatility = np.std(y, ddof=1)
         if np.isnan(volatility) or volatility == 0:
             volatility = 0.02 # Default to 2% if calculation fails
             
@@ -122,8 +166,8 @@ def train_and_predict(ticker: str):
 
         # ATR for SL/TP
         atr_col = f"{ticker}_atr14"
-        if atr_col in features_df.columns:
-            atr = features_df[atr_col].iloc[-1]
+        if atr_col in fm.col_index:
+            atr = float(fm.column(atr_col)[-1])
         else:
             atr = current_price * 0.05
             
@@ -145,7 +189,7 @@ def train_and_predict(ticker: str):
         predicted_price_usd = current_price * np.exp(pred_log_return)
         predicted_price_idr = predicted_price_usd * usd_idr
 
-        return {
+        result = {
             "ticker": ticker,
             "direction": direction,
             "pred_return": pred_log_return,
@@ -159,12 +203,107 @@ def train_and_predict(ticker: str):
             "sl_idr": sl * usd_idr,
             "tp_idr": tp * usd_idr,
             "sl_usd": sl,
-            "tp_usd": tp
+            "tp_usd": tp,
+            "drivers": drivers
         }
 
+        # Multi-horizon forecasts; the signal threshold scales with sqrt(h)
+        if len(trainers) > 1:
+            latest = fm.values[-1:]
+            result["horizons"] = {}
+            for h, horizon_trainer in trainers.items():
+                pred_h = pred_log_return if h == 1 else float(horizon_trainer.predict(latest)[0])
+                threshold_h = threshold * np.sqrt(h)
+                if pred_h > threshold_h:
+                    direction_h = "BULLISH"
+                elif pred_h < -threshold_h:
+                    direction_h = "BEARISH"
+                else:
+                    direction_h = "NEUTRAL"
+                result["horizons"][h] = {
+                    "direction": direction_h,
+                    "pred_return": pred_h,
+                    "pred_pct": (np.exp(pred_h) - 1) * 100,
+                    "threshold": threshold_h,
+                    "predicted_price_usd": current_price * np.exp(pred_h),
+                    "predicted_price_idr": current_price * np.exp(pred_h) * usd_idr,
+                }
+        return result
+
     except Exception as e:
         return {"error": f"Training/Prediction failed: {e}"}
 
+def train(assets=None, model_path=PANEL_MODEL_PATH):
+    """
+    Trains the pooled cross-asset panel model once and saves it.
+    Run by the monthly scheduler job; predictions then only need a batched predict.
+    """
+    assets = list(assets or ASSETS)
+    print(f"Starting Panel Training for {assets}...")
+
+    # 1. Download Data
+    daily = batch_download(assets, PERIOD_DAILY, DAILY_INTERVAL, as_bars=True)
+    weekly = batch_download(assets, PERIOD_WEEKLY, WEEKLY_INTERVAL, as_bars=True)
+    intra = batch_download(assets, PERIOD_INTRADAY, INTRADAY_INTERVAL, as_bars=True)
+
+    # 2. Exogenous Features
+    exog_df = None
+    try:
+        exog_df = reference_data.exog_features(daily.index)
+    except Exception as e:
+        print(f"Warning: Exogenous features failed: {e}")
+
+    # 3. Long-format panel with asset-agnostic names and an asset id
+    asset_ids = {t: i for i, t in enumerate(assets)}
+    panel = build_panel(daily, weekly, intra, assets, asset_ids, exog=exog_df)
+    rows = row_selector(nan_free_rows(panel.values) & np.isfinite(panel.y))
+    X = panel.values[rows]
+    y = panel.y[rows]
+    if len(X) == 0:
+        raise ValueError("Not enough data to train the panel model.")
+    dates = panel.dates.repeat(len(assets))[rows]
+    last_date = dates.max()
+
+    # 4. Train once and persist
+    # The binned Datasets are cached, so a monthly retrain only bins the new rows
+    print(f"Training panel model on {len(X)} samples across {len(assets)} assets...")
+    trainer = ModelTrainer(model_path=model_path)
+    trainer.metadata = {"asset_ids": asset_ids}
+    trainer.train(X, y, panel.columns, task="regression", save_model=False, categorical_feature=[ASSET_ID],
+                  dates=dates, cache_dir=DATASET_CACHE_DIR)
+
+    # 5. Prune redundant features (gain + correlation clusters) and retrain on the rest.
+    # Gain is averaged over the last IMPORTANCE_RUNS full-spec runs, and the
+    # pruned model replaces the full one only if its validation RMSE is not worse.
+    # The kept columns are the model's selected_features, which build_panel
+    # passes through as the spec, so panel builds skip dropped indicators.
+    # Per-ticker models (train_and_predict, screener, API) keep all features.
+    best_rmse = lambda t: t.model.best_score["valid_1"]["rmse"]
+    history = ModelTrainer(model_path=model_path).load_metadata().get("gain_history", [])
+    history = history[-(IMPORTANCE_RUNS - 1):] + [gain_shares(trainer)]
+    trainer.metadata["gain_history"] = history
+    spec = select_features(mean_gain_shares(history), X, panel.columns)
+    if len(spec) < len(panel.columns):
+        X_pruned = X[:, [panel.columns.index(c) for c in spec]]
+        pruned = ModelTrainer(model_path=model_path)
+        pruned.metadata = trainer.metadata
+        pruned.train(X_pruned, y, spec, task="regression", save_model=False, categorical_feature=[ASSET_ID],
+                     dates=dates, cache_dir=DATASET_CACHE_DIR)
+        if keeps_accuracy(best_rmse(trainer), best_rmse(pruned)):
+            trainer, X = pruned, X_pruned
+        else:
+            print(f"Pruned spec raises validation RMSE ({best_rmse(pruned):.6f} vs {best_rmse(trainer):.6f}); "
+                  f"keeping all features")
+            spec = list(panel.columns)
+    print(f"Feature spec: keeping {len(spec)}/{len(panel.columns)} features "
+          f"(gain averaged over {len(history)} runs)")
+
+    # 6. Training distribution for the drift monitor (src/utils/drift.py)
+    val_rmse = best_rmse(trainer)
+    trainer.metadata["drift_snapshot"] = feature_snapshot(X, spec, trainer.predict(X), val_rmse, last_date)
+    trainer.save_model()
+    return trainer
+
 if __name__ == "__main__":
     # Test
     print(train_and_predict("BTC-USD"))
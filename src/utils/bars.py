@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+# Constants
+OHLCV_FIELDS = {"Open", "High", "Low", "Close", "Adj Close", "Volume"}
+UNKNOWN_TICKER = "UNKNOWN"
+
+
+class Bars:
+    """
+    Canonical in-memory OHLCV block: one float64 array of shape
+    (n_rows, n_assets * n_fields) with a shared timestamp index, columns in
+    (Ticker, Field) order (assets and fields sorted).
+
+    The array is column-major, so each (asset, field) series and each asset's
+    field block are contiguous views. Layout detection happens once, in
+    from_frame/concat; everything downstream indexes by position instead of
+    re-checking, swapping and re-sorting MultiIndex levels.
+    """
+
+    __slots__ = ("values", "index", "assets", "fields", "_asset_pos", "_field_pos")
+
+    def __init__(self, values, index, assets, fields):
+        self.values = values
+        self.index = index
+        self.assets = list(assets)
+        self.fields = list(fields)
+        self._asset_pos = {a: i for i, a in enumerate(self.assets)}
+        self._field_pos = {f: i for i, f in enumerate(self.fields)}
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 0)), pd.DatetimeIndex([]), [], [])
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Outer-join Bars (or frames) on the timestamp index into one new block,
+        allocated once. A ticker present in several parts keeps the last one.
+        """
+        parts = [as_bars(p) for p in parts if p is not None]
+        parts = [p for p in parts if p.assets]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        index = parts[0].index
+        for p in parts[1:]:
+            if not p.index.equals(index):
+                index = index.union(p.index)
+        assets = sorted({a for p in parts for a in p.assets})
+        fields = sorted({f for p in parts for f in p.fields})
+        out = cls(np.full((len(index), len(assets) * len(fields)), np.nan, order="F"), index, assets, fields)
+        for p in parts:
+            rows = slice(None) if p.index.equals(index) else index.get_indexer(p.index)
+            for tkr in p.assets:
+                for field in p.fields:
+                    out.values[rows, out._pos(tkr, field)] = p.values[:, p._pos(tkr, field)]
+        return out
+
+    @classmethod
+    def from_frame(cls, df, ticker=None):
+        """
+        Canonicalize a bar frame in (Ticker, Field), (Field, Ticker) or flat
+        field columns. A single-asset frame is named `ticker` when given. A
+        frame already in the canonical layout (e.g. from to_frame) is wrapped
+        without copying.
+        """
+        if df is None or df.empty:
+            return cls.empty()
+        if not isinstance(df.columns, pd.MultiIndex):
+            pairs = [(ticker or UNKNOWN_TICKER, f) for f in df.columns]
+        elif set(df.columns.get_level_values(0)) <= OHLCV_FIELDS:
+            pairs = [(a, f) for f, a in df.columns]
+        else:
+            pairs = list(df.columns)
+        assets = sorted({a for a, _ in pairs})
+        if ticker is not None and len(assets) == 1:
+            pairs = [(ticker, f) for _, f in pairs]
+            assets = [ticker]
+        fields = sorted({f for _, f in pairs})
+
+        # Column-major, so a single float64 block comes back as a view
+        source = df.to_numpy(dtype=np.float64)
+        if pairs == [(a, f) for a in assets for f in fields]:
+            return cls(source, df.index, assets, fields)
+        bars = cls(np.full((len(df), len(assets) * len(fields)), np.nan, order="F"), df.index, assets, fields)
+        for j, (a, f) in enumerate(pairs):
+            bars.values[:, bars._pos(a, f)] = source[:, j]
+        return bars
+
+    def _pos(self, tkr, field):
+        return self._asset_pos[tkr] * len(self.fields) + self._field_pos[field]
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def is_empty(self):
+        return len(self.index) == 0 or not self.assets
+
+    def has(self, tkr, field="Close"):
+        return tkr in self._asset_pos and field in self._field_pos
+
+    def series(self, tkr, field):
+        """One (asset, field) column as a Series view."""
+        return pd.Series(self.values[:, self._pos(tkr, field)], index=self.index, name=field, copy=False)
+
+    def asset(self, tkr):
+        """One asset's fields as a DataFrame view, or None if it is not held."""
+        if tkr not in self._asset_pos:
+            return None
+        start = self._asset_pos[tkr] * len(self.fields)
+        return pd.DataFrame(self.values[:, start:start + len(self.fields)], index=self.index,
+                            columns=self.fields, copy=False)
+
+    def field(self, field):
+        """(n_rows, n_assets) strided view of one field across assets."""
+        return self.values[:, self._field_pos[field]::len(self.fields)]
+
+    def select(self, assets=None, start=None, stop=None):
+        """
+        Bars restricted to `assets` and timestamps in [start, stop). Time
+        slicing and a single asset are views; other asset subsets copy.
+        """
+        lo = 0 if start is None else self.index.searchsorted(start, side="left")
+        hi = len(self.index) if stop is None else self.index.searchsorted(stop, side="left")
+        values, index = self.values[lo:hi], self.index[lo:hi]
+        if assets is None:
+            return Bars(values, index, self.assets, self.fields)
+        assets = [a for a in self.assets if a in set(assets)]
+        nf = len(self.fields)
+        if len(assets) == 1:
+            start_col = self._asset_pos[assets[0]] * nf
+            return Bars(values[:, start_col:start_col + nf], index, assets, self.fields)
+        cols = [self._asset_pos[a] * nf + f for a in assets for f in range(nf)]
+        return Bars(np.asfortranarray(values[:, cols]), index, assets, self.fields)
+
+    def to_frame(self):
+        """(Ticker, Field) DataFrame over the same memory (no copy)."""
+        columns = pd.MultiIndex.from_product([self.assets, self.fields])
+        return pd.DataFrame(self.values, index=self.index, columns=columns, copy=False)
+
+
+def as_bars(data, ticker=None):
+    """Bars as-is; frames are canonicalized once (None stays None)."""
+    if data is None or isinstance(data, Bars):
+        return data
+    return Bars.from_frame(data, ticker)
@@ -0,0 +1,94 @@
+import os
+import secrets
+import shutil
+import time
+import joblib
+from datetime import datetime
+from pathlib import Path
+
+# Constants
+CHECKPOINT_DIR = "data/checkpoints"
+RESUME_WINDOW_SEC = 6 * 3600 # An unfinished run newer than this is resumed instead of restarted
+KEEP_RUNS = 20 # Most recent runs kept by gc_checkpoints
+MAX_AGE_DAYS = 7 # Older runs are removed regardless of KEEP_RUNS
+DONE = "done"
+
+
+class RunCheckpoints:
+    """
+    Stage outputs of one pipeline run, persisted as
+    CHECKPOINT_DIR/<run_id>/<stage>.pkl. A resumed run loads the stages that
+    already completed instead of recomputing them.
+    """
+
+    def __init__(self, run_id, base_dir=CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.path = Path(base_dir) / run_id
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, stage):
+        return self.path / f"{stage}.pkl"
+
+    def has(self, stage):
+        return self._file(stage).exists()
+
+    def load(self, stage):
+        return joblib.load(self._file(stage))
+
+    def save(self, stage, value):
+        # Write-then-rename so a crash never leaves a truncated checkpoint
+        tmp = self.path / f"{stage}.tmp"
+        joblib.dump(value, tmp)
+        os.replace(tmp, self._file(stage))
+
+    def stage(self, stage, fn):
+        """Checkpointed output of `stage`, or fn() (then checkpointed) if it has not completed."""
+        if self.has(stage):
+            print(f"[Checkpoint] {self.run_id}: reusing '{stage}'")
+            return self.load(stage)
+        value = fn()
+        self.save(stage, value)
+        return value
+
+    def finish(self):
+        self.save(DONE, time.time())
+
+    @property
+    def finished(self):
+        return self.has(DONE)
+
+
+def run_stage(checkpoints, stage, fn):
+    """fn() through `checkpoints` when given, else a plain call."""
+    return fn() if checkpoints is None else checkpoints.stage(stage, fn)
+
+def _runs(base_dir):
+    """Run directories, newest first (by last write)."""
+    base = Path(base_dir)
+    if not base.exists():
+        return []
+    return sorted((p for p in base.iterdir() if p.is_dir()), key=os.path.getmtime, reverse=True)
+
+def resume_or_new(base_dir=CHECKPOINT_DIR, window_sec=RESUME_WINDOW_SEC):
+    """RunCheckpoints of the latest unfinished recent run, or of a new run."""
+    for path in _runs(base_dir):
+        if time.time() - os.path.getmtime(path) > window_sec:
+            break
+        if not (path / f"{DONE}.pkl").exists():
+            print(f"[Checkpoint] Resuming unfinished run {path.name}")
+            return RunCheckpoints(path.name, base_dir)
+        break
+    # Random suffix: two runs started within the same second get distinct ids
+    return RunCheckpoints(f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}", base_dir)
+
+def gc_checkpoints(base_dir=CHECKPOINT_DIR, keep=KEEP_RUNS, max_age_days=MAX_AGE_DAYS, exclude=()):
+    """Delete runs beyond the newest `keep` or older than `max_age_days`. Returns the removed run ids."""
+    removed = []
+    cutoff = time.time() - max_age_days * 86400
+    for i, path in enumerate(_runs(base_dir)):
+        if path.name in exclude:
+            continue
+        if i >= keep or os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path.name)
+    return removed
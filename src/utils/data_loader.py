@@ -1,7 +1,8 @@
 import time
 import pandas as pd
-import yfinance as yf
 from pathlib import Path
+from src.utils.market_data import get_provider
+from src.utils.bars import Bars
 
 # Constants
 ASSETS = ["BTC-USD", "ETH-USD", "XRP-USD", "BNB-USD"]
@@ -12,78 +13,44 @@ DAILY_INTERVAL = "1d"
 WEEKLY_INTERVAL = "1wk"
 INTRADAY_INTERVAL = "1h"
 PERIOD_FORECAST = "90d"
+DATA_DIR = "data/raw"
+BAR_PERIOD = pd.Timedelta("1D") # Daily crypto bars close at 00:00 UTC
 
 def ensure_dirs():
     """Ensure data directories exist."""
     for interval in [DAILY_INTERVAL, WEEKLY_INTERVAL, INTRADAY_INTERVAL]:
-        Path(f"data/raw/{interval}").mkdir(parents=True, exist_ok=True)
+        Path(f"{DATA_DIR}/{interval}").mkdir(parents=True, exist_ok=True)
+
+def next_bar_close(now=None, period=BAR_PERIOD):
+    """First bar close strictly after `now` (UTC)."""
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    return now.floor(period) + period
 
 def normalize_columns_to_field_ticker(df):
     """Normalize DataFrame columns to (Ticker, Field) format."""
-    if isinstance(df.columns, pd.MultiIndex) and df.columns.nlevels == 2:
-        lvl0 = df.columns.get_level_values(0)
-        # If level 0 contains Tickers, we are good.
-        if any(x in ASSETS for x in lvl0):
-            pass # Already (Ticker, Field)
-        # If level 1 contains Tickers, swap.
-        elif any(x in ASSETS for x in df.columns.get_level_values(1)):
-            df = df.swaplevel(axis=1)
-        df = df.sort_index(axis=1)
-        return df
-    return pd.concat({ "UNKNOWN": df }, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    return Bars.from_frame(df).to_frame()
 
-def safe_download_one(ticker:str, period:str, interval:str, sleep_sec:float=1.2, retries:int=4, backoff:float=1.6):
-    """Download data for a single ticker with retries."""
+def safe_download_one(ticker:str, period:str, interval:str, sleep_sec:float=None, retries:int=4, backoff:float=1.6):
+    """Download data for a single ticker with retries, via the active market data provider."""
+    provider = get_provider()
+    if sleep_sec is None:
+        sleep_sec = provider.request_delay
     last_exc = None
     for i in range(retries):
         try:
-            df = yf.download(
-                tickers=ticker,
-                period=period,
-                interval=interval,
-                auto_adjust=False,
-                group_by="column",
-                threads=False,
-                progress=False,
-            )
+            df = provider.download(ticker, period, interval)
             if df is None or df.empty:
                 raise ValueError("empty dataframe")
             
-            # Ensure directory exists before saving
-            ensure_dirs()
-            
-            out_path = Path(f"data/raw/{interval}/{ticker}_{period}_{interval}.csv")
-            df.to_csv(out_path)
+            if provider.writes_store:
+                # Ensure directory exists before saving
+                ensure_dirs()
+                
+                out_path = Path(f"{DATA_DIR}/{interval}/{ticker}_{period}_{interval}.csv")
+                df.to_csv(out_path)
             
-            # Handle yfinance return structure
-            # If yfinance returns MultiIndex (e.g. Price, Ticker), we want to standardize to (Ticker, Field)
-            if isinstance(df.columns, pd.MultiIndex):
-                # Check if we have (Price, Ticker)
-                if df.columns.nlevels == 2:
-                    # If level 1 is ticker, swap to (Ticker, Price)
-                    # We assume level 0 is Price (Close, Open, etc)
-                    # But we need to be careful.
-                    # Let's just flatten and rebuild to be safe.
-                    # Or check if ticker is in level 1
-                    if ticker in df.columns.get_level_values(1):
-                         df = df.swaplevel(axis=1)
-                    # If ticker is in level 0, it is (Ticker, Price), good.
-                else:
-                    # > 2 levels? Drop extra levels?
-                    # For now, let's try to just grab the Price level and wrap
-                    pass
-            else:
-                # Flat columns (Open, Close...), wrap with Ticker
-                df = pd.concat({ticker: df}, axis=1)
-
-            # Final check: Ensure we have (Ticker, Field)
-            # If we still have (Price, Ticker), swap
-            if df.columns.nlevels == 2:
-                 # If level 0 is NOT ticker, swap
-                 if ticker not in df.columns.get_level_values(0):
-                      df = df.swaplevel(axis=1)
-            
-            df = df.sort_index(axis=1)
+            # yfinance returns (Price, Ticker) or flat columns; canonicalize once
+            df = Bars.from_frame(df, ticker).to_frame()
             time.sleep(sleep_sec)
             return df
         except Exception as e:
@@ -91,11 +58,56 @@ def safe_download_one(ticker:str, period:str, interval:str, sleep_sec:float=1.2,
             time.sleep(sleep_sec * (backoff ** i))
     raise RuntimeError(f"failed to download {ticker} {period} {interval}: {last_exc}")
 
-def batch_download(tickers, period, interval):
-    """Download data for multiple tickers."""
-    frames = []
-    for t in tickers:
-        frames.append(safe_download_one(t, period, interval))
-    out = pd.concat(frames, axis=1)
-    out = normalize_columns_to_field_ticker(out)
-    return out
+def batch_download(tickers, period, interval, as_bars=False):
+    """
+    Download data for multiple tickers into one (Ticker, Field) block.
+    Returns the Bars container with `as_bars`, else a zero-copy DataFrame view of it.
+    """
+    bars = Bars.concat([safe_download_one(t, period, interval) for t in tickers])
+    return bars if as_bars else bars.to_frame()
+
+def _period_days(period):
+    """Approximate length of a yfinance period string in days (for ranking files)."""
+    units = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+    for unit, days in units.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return int(period[:-len(unit)]) * days
+    return 0
+
+def local_bar_file(ticker, period, interval):
+    """Path of the stored CSV for exactly this ticker/period/interval, or None."""
+    path = Path(f"{DATA_DIR}/{interval}/{ticker}_{period}_{interval}.csv")
+    return path if path.exists() else None
+
+def local_bar_files(interval, tickers=None):
+    """
+    Map ticker -> CSV path in the local bar store (data/raw/{interval}), which
+    safe_download_one fills. If a ticker has several periods, the longest wins.
+    """
+    best = {}
+    for path in Path(f"{DATA_DIR}/{interval}").glob(f"*_{interval}.csv"):
+        parts = path.stem.rsplit("_", 2)
+        if len(parts) != 3:
+            continue
+        ticker, period, _ = parts
+        if tickers is not None and ticker not in tickers:
+            continue
+        if ticker not in best or _period_days(period) > best[ticker][0]:
+            best[ticker] = (_period_days(period), path)
+    return {t: p for t, (_, p) in sorted(best.items())}
+
+def read_local_bars(path, ticker):
+    """Read one stored CSV into (Ticker, Field) columns."""
+    df = pd.read_csv(path, header=[0, 1], index_col=0, parse_dates=True)
+    return Bars.from_frame(df, ticker).to_frame()
+
+def load_local_bars(tickers=None, interval=DAILY_INTERVAL, as_bars=False):
+    """
+    Load bars for many tickers from the local bar store, no network access.
+    Returns the Bars container with `as_bars`, else a zero-copy DataFrame view of it.
+    """
+    files = local_bar_files(interval, tickers)
+    if not files:
+        return Bars.empty() if as_bars else pd.DataFrame()
+    bars = Bars.concat([read_local_bars(path, t) for t, path in files.items()])
+    return bars if as_bars else bars.to_frame()
@@ -0,0 +1,238 @@
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import time
+import numpy as np
+import lightgbm as lgb
+from contextlib import contextmanager
+from pathlib import Path
+
+# Constants
+DATASET_CACHE_DIR = "data/datasets"
+REBIN_FRACTION = 0.25 # Re-find bin boundaries once this share of rows was appended since the last binning
+REVISED_FRACTION = 0.5 # ...or when this share of the cached rows was revised at once (e.g. a different data source)
+MAX_AGE_DAYS = 60 # Specs unused for this long are removed by gc_datasets (the panel retrains monthly)
+MAX_CACHE_BYTES = 2 * 1024**3 # Least recently used specs are removed beyond this total size
+DIGEST_ROWS = 65_536 # Rows fingerprinted per block (bounds the temporary uint64 copy)
+DIGEST_MANTISSA_BITS = 12 # float32 mantissa bits fingerprinted (~2e-4 relative)
+TRAIN_BIN = "train.bin"
+VALID_BIN = "valid.bin"
+ROWS = "rows.npz"
+META = "meta.json"
+LOCK_SUFFIX = ".lock"
+
+
+def _row_digests(X):
+    """
+    uint64 fingerprint of each row's float32 values, to detect revised history.
+    The low mantissa bits are dropped: recursive indicators (EMA, RSI, ATR)
+    shift in the last bits whenever the download window moves, which is not
+    a revision worth re-binning for.
+    """
+    keep = np.uint32(~((1 << (23 - DIGEST_MANTISSA_BITS)) - 1) & 0xFFFFFFFF)
+    bits = np.ascontiguousarray(X, dtype=np.float32).view(np.uint32) & keep
+    weights = np.random.default_rng(0).integers(1, 2**63, bits.shape[1], dtype=np.uint64) | np.uint64(1)
+    out = np.empty(len(bits), dtype=np.uint64)
+    for start in range(0, len(bits), DIGEST_ROWS):
+        # uint64 products wrap, which is fine for a fingerprint
+        out[start:start + DIGEST_ROWS] = (bits[start:start + DIGEST_ROWS].astype(np.uint64) * weights).sum(axis=1)
+    return out
+
+def spec_key(feature_names, categorical_feature, params):
+    """Cache key of a feature spec: the columns, categorical columns and binning params."""
+    spec = json.dumps([list(feature_names), categorical_feature, params], sort_keys=True, default=str)
+    return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+@contextmanager
+def _spec_lock(base_dir, key, blocking=True):
+    """
+    Exclusive lock on one spec across processes (the scheduler and the API
+    share ./data). Yields False if `blocking` is off and the lock is held.
+    Lock files live next to the spec dirs and are never deleted, so every
+    process locks the same inode.
+    """
+    Path(base_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(base_dir) / f"{key}{LOCK_SUFFIX}", "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _replace_atomically(path, write):
+    """write(tmp_path) into a uniquely named temp file next to `path`, then rename it over `path`."""
+    # Only a unique name: LightGBM refuses to save a binary over an existing file
+    tmp = str(path.parent / f"{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class DatasetCache:
+    """
+    Binned train/validation Datasets of one feature spec, persisted in
+    LightGBM's binary format (bin mappers included) under
+    DATASET_CACHE_DIR/<spec key>/, with the dates and row fingerprints of the
+    data range they hold.
+
+    datasets() compares the rows it is given against that range:
+      hit    - same rows: both binaries are loaded, nothing is re-binned
+      append - the cached dates (minus any dropped from the front) followed by
+               new ones, and/or some rows revised (e.g. indicator warm-up and
+               intraday coverage moving with the download windows): all rows
+               are pushed through the existing bin mappers, skipping bin
+               boundary search
+      build  - no cache, different dates, REBIN_FRACTION of the rows
+               appended since the last binning, or REVISED_FRACTION of them
+               revised: bins are found from scratch
+    Calls for the same spec are serialized across processes by a file lock.
+    """
+
+    def __init__(self, feature_names, categorical_feature="auto", params=None, base_dir=DATASET_CACHE_DIR):
+        self.feature_names = list(feature_names)
+        self.categorical_feature = categorical_feature
+        self.params = dict(params or {})
+        self.base_dir = base_dir
+        self.key = spec_key(self.feature_names, categorical_feature, self.params)
+        self.path = Path(base_dir) / self.key
+
+    def _meta(self):
+        try:
+            meta = json.loads((self.path / META).read_text())
+            rows = np.load(self.path / ROWS)
+            return meta, rows["dates"], rows["digests"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _match(self, cached, dates, digests):
+        """(status, rows appended since the last binning) for the given rows."""
+        if cached is None:
+            return "build", 0
+        meta, cached_dates, cached_digests = cached
+        offset = int(np.searchsorted(cached_dates, dates[0], side="left"))
+        overlap = len(cached_dates) - offset
+        if overlap <= 0 or overlap > len(dates) or not np.array_equal(cached_dates[offset:], dates[:overlap]):
+            return "build", 0
+        revised = int(np.count_nonzero(cached_digests[offset:] != digests[:overlap]))
+        appended = meta["appended"] + len(dates) - overlap
+        if offset == 0 and overlap == len(dates) and not revised:
+            return "hit", appended
+        if revised > REVISED_FRACTION * overlap:
+            print(f"[Dataset] {self.key}: {revised}/{overlap} cached rows revised; rebinning")
+            return "build", 0
+        if appended > REBIN_FRACTION * meta["binned_rows"]:
+            print(f"[Dataset] {self.key}: {appended} rows appended since binning; rebinning")
+            return "build", 0
+        if revised:
+            print(f"[Dataset] {self.key}: {revised}/{overlap} cached rows revised; reusing the bins")
+        return "append", appended
+
+    def _load(self, name, label, reference=None):
+        data = lgb.Dataset(str(self.path / name), reference=reference, params=self.params).construct()
+        data.set_label(label)
+        return data
+
+    def datasets(self, X, y, dates, n_val):
+        """
+        (train, validation, status) for a time-ordered split with the last
+        `n_val` rows as validation. `dates` are the row timestamps,
+        non-decreasing. Labels are always taken from `y`.
+        """
+        dates = np.asarray(dates, dtype="datetime64[ns]").view(np.int64)
+        digests = _row_digests(X)
+        with _spec_lock(self.base_dir, self.key):
+            result = self._datasets(X, y, dates, digests, n_val)
+        gc_datasets(self.base_dir, exclude=[self.key])
+        return result
+
+    def _datasets(self, X, y, dates, digests, n_val):
+        n_train = len(X) - n_val
+        cached = self._meta()
+        status, appended = self._match(cached, dates, digests)
+
+        if status == "hit":
+            try:
+                train = self._load(TRAIN_BIN, y[:n_train])
+                # Referencing train lets lgb.train accept it as a validation set
+                val = self._load(VALID_BIN, y[n_train:], reference=train)
+                if train.num_data() == n_train and val.num_data() == n_val:
+                    print(f"[Dataset] {self.key}: loaded {len(X)} binned rows")
+                    os.utime(self.path)
+                    return train, val, status
+            except lgb.basic.LightGBMError as e:
+                print(f"[Dataset] {self.key}: unreadable binary ({e})")
+            status, appended = "build", 0
+
+        reference = None
+        if status == "append":
+            reference = lgb.Dataset(str(self.path / TRAIN_BIN), params=self.params).construct()
+        train = lgb.Dataset(X[:n_train], label=y[:n_train], feature_name=self.feature_names,
+                            categorical_feature=self.categorical_feature, reference=reference,
+                            params=self.params).construct()
+        val = lgb.Dataset(X[n_train:], label=y[n_train:], feature_name=self.feature_names,
+                          categorical_feature=self.categorical_feature, reference=train,
+                          params=self.params).construct()
+        binned_rows = cached[0]["binned_rows"] if status == "append" else len(X)
+        self._save(train, val, dates, digests, binned_rows, appended)
+        print(f"[Dataset] {self.key}: {status} ({len(X)} rows, {appended} appended since binning)")
+        return train, val, status
+
+    def _save(self, train, val, dates, digests, binned_rows, appended):
+        # Meta goes first and comes back last, so a crash mid-save leaves no
+        # meta and the next call rebuilds instead of trusting mixed files
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / META).unlink(missing_ok=True)
+        for data, name in ((train, TRAIN_BIN), (val, VALID_BIN)):
+            _replace_atomically(self.path / name, lambda tmp, data=data: data.save_binary(tmp))
+        def write_rows(tmp):
+            with open(tmp, "wb") as f:
+                np.savez(f, dates=dates, digests=digests)
+        _replace_atomically(self.path / ROWS, write_rows)
+        meta = {
+            "start": str(dates[0].astype("datetime64[ns]")),
+            "end": str(dates[-1].astype("datetime64[ns]")),
+            "n_rows": len(dates),
+            "binned_rows": int(binned_rows),
+            "appended": int(appended),
+        }
+        _replace_atomically(self.path / META, lambda tmp: Path(tmp).write_text(json.dumps(meta, indent=1)))
+
+
+def _dir_bytes(path):
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+def gc_datasets(base_dir=DATASET_CACHE_DIR, max_age_days=MAX_AGE_DAYS, max_bytes=MAX_CACHE_BYTES, exclude=()):
+    """
+    Delete cached specs unused for `max_age_days`, then the least recently
+    used ones until the rest fit in `max_bytes`. Specs in `exclude` or locked
+    by another process are kept. Returns the removed keys.
+    """
+    base = Path(base_dir)
+    if not base.exists():
+        return []
+    # Newest first: the size budget is spent on the most recently used specs
+    specs = sorted((p for p in base.iterdir() if p.is_dir()), key=os.path.getmtime, reverse=True)
+    cutoff = time.time() - max_age_days * 86400
+    removed = []
+    total = 0
+    for path in specs:
+        size = _dir_bytes(path)
+        total += size
+        if path.name in exclude or (os.path.getmtime(path) >= cutoff and total <= max_bytes):
+            continue
+        with _spec_lock(base_dir, path.name, blocking=False) as locked:
+            if locked:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path.name)
+                total -= size
+    return removed
@@ -25,6 +25,17 @@ class DBManager:
                 reason TEXT
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS news_selection (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                source TEXT NOT NULL,
+                ticker TEXT,
+                local_sec REAL,
+                llm_sec REAL,
+                sleep_sec REAL
+            )
+        """)
         conn.commit()
         conn.close()
     
@@ -73,3 +84,47 @@ class DBManager:
         symbols = {"BULLISH": "↑", "BEARISH": "↓", "NEUTRAL": "→"}
         summary = ", ".join([f"{p['ticker']}{symbols.get(p['direction'], '?')}" for p in picks])
         return f"Last {len(picks)} picks: {summary}"
+
+    def add_selection(self, source: str, ticker: str, local_sec: float,
+                      llm_sec: Optional[float] = None, sleep_sec: float = 0.0):
+        """Log how a run's asset was selected ('local' or 'llm') and what it cost"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO news_selection (source, ticker, local_sec, llm_sec, sleep_sec)
+            VALUES (?, ?, ?, ?, ?)
+        """, (source, ticker, local_sec, llm_sec, sleep_sec))
+        conn.commit()
+        conn.close()
+
+    def get_selection_stats(self, limit: int = 100) -> Dict:
+        """
+        Skip rate of the LLM over the last `limit` selections, and the latency
+        a local pick saves: the mean LLM call plus its rate-limit sleep, minus
+        the mean local scoring time.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT source, local_sec, llm_sec, sleep_sec
+            FROM news_selection
+            ORDER BY id DESC
+            LIMIT ?
+        """, (limit,))
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+
+        local = [r for r in rows if r['source'] == 'local']
+        llm = [r for r in rows if r['source'] == 'llm' and r['llm_sec'] is not None]
+        saved = None
+        if local and llm:
+            llm_cost = sum(r['llm_sec'] + (r['sleep_sec'] or 0.0) for r in llm) / len(llm)
+            saved = llm_cost - sum(r['local_sec'] for r in local) / len(local)
+        return {
+            "runs": len(rows),
+            "skipped": len(local),
+            "skip_rate": len(local) / len(rows) if rows else 0.0,
+            "saved_sec_per_skip": saved,
+            "saved_sec_per_run": saved * len(local) / len(rows) if saved is not None else None,
+        }
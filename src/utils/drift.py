@@ -0,0 +1,232 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from src.utils.data_loader import batch_download, PERIOD_FORECAST, DAILY_INTERVAL, WEEKLY_INTERVAL, INTRADAY_INTERVAL
+from src.utils.feature_engineering import nan_free_rows
+from src.utils.panel import scoring_panel, load_panel_model, PANEL_MODEL_PATH
+from src.utils.reference_data import reference_data
+
+# Constants
+DRIFT_STATE_PATH = "artifacts/drift_state.pkl"
+DRIFT_BINS = 10 # Training-quantile bins per feature
+DRIFT_HALF_LIFE_DAYS = 30 # Older bars fade out of the live histograms
+PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", 0.25)) # > 0.25 is the usual "significant shift"
+KS_THRESHOLD = float(os.getenv("DRIFT_KS_THRESHOLD", 0.2))
+DRIFT_FEATURE_SHARE = 0.25 # Retrain when this share of features has drifted
+RMSE_RATIO = 1.5 # ...or when live error exceeds validation RMSE by this factor
+DRIFT_MIN_ROWS = 50 # Effective live rows needed before either test is trusted
+MIN_RETRAIN_DAYS = 7 # Minimum model age before an early retrain
+PREDICTION = "prediction" # Extra monitored column: the model's own output
+_EPS = 1e-4
+
+
+def _histograms(X, edges):
+    """(n_columns, DRIFT_BINS) bin counts of X against per-column interior edges."""
+    counts = np.zeros((X.shape[1], edges.shape[1] + 1))
+    for j in range(X.shape[1]):
+        counts[j] = np.bincount(np.searchsorted(edges[j], X[:, j], side="right"),
+                                minlength=edges.shape[1] + 1)
+    return counts
+
+def feature_snapshot(X, columns, preds, val_rmse, last_date):
+    """
+    Training distribution stored in the model metadata: per-column quantile
+    bin edges and bin proportions (features plus the model's predictions),
+    means/stds, the validation RMSE, and the last training date.
+    """
+    X = np.column_stack([X, preds]).astype(np.float64)
+    quantiles = np.linspace(0, 1, DRIFT_BINS + 1)[1:-1]
+    edges = np.quantile(X, quantiles, axis=0).T
+    counts = _histograms(X, edges)
+    return {
+        "columns": list(columns) + [PREDICTION],
+        "edges": edges,
+        "expected": counts / counts.sum(axis=1, keepdims=True),
+        "mean": X.mean(axis=0),
+        "std": X.std(axis=0),
+        "val_rmse": float(val_rmse),
+        "last_date": pd.Timestamp(last_date),
+        "trained_at": datetime.now(timezone.utc),
+    }
+
+def psi(expected, actual):
+    """Population stability index per row of two (n, bins) proportion arrays."""
+    e = np.clip(expected, _EPS, None)
+    a = np.clip(actual, _EPS, None)
+    return ((a - e) * np.log(a / e)).sum(axis=1)
+
+def binned_ks(expected, actual):
+    """Kolmogorov-Smirnov distance per row, on the binned CDFs."""
+    return np.abs(np.cumsum(actual, axis=1) - np.cumsum(expected, axis=1)).max(axis=1)
+
+
+class DriftMonitor:
+    """
+    Live feature/prediction distributions of the panel model, updated
+    incrementally from bars newer than the last update.
+
+    State is fixed-size: exponentially decayed histograms on the training
+    bins, decayed mean/variance sketches per column, and a decayed squared
+    error of realized predictions, persisted to `state_path`. It resets when
+    the model (snapshot) changes.
+    """
+
+    def __init__(self, snapshot, state_path=DRIFT_STATE_PATH):
+        self.snapshot = snapshot
+        self.state_path = state_path
+        n = len(snapshot["columns"])
+        self.state = {
+            "trained_at": snapshot["trained_at"],
+            "counts": np.zeros((n, DRIFT_BINS)),
+            "weight": 0.0,
+            "sum": np.zeros(n),
+            "sum_sq": np.zeros(n),
+            "sq_err": 0.0,
+            "err_weight": 0.0,
+            "feature_date": snapshot["last_date"],
+            "error_date": snapshot["last_date"],
+        }
+
+    @classmethod
+    def load(cls, snapshot, state_path=DRIFT_STATE_PATH):
+        monitor = cls(snapshot, state_path)
+        if os.path.exists(state_path):
+            state = joblib.load(state_path)
+            if state.get("trained_at") == snapshot["trained_at"]:
+                monitor.state = state
+        return monitor
+
+    def save(self):
+        # The scheduler and the API both refresh snapshots; write-then-rename
+        # so neither reads a half-written state
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        joblib.dump(self.state, tmp)
+        os.replace(tmp, self.state_path)
+
+    def _decay(self, keys, since, until):
+        days = max((until - since) / pd.Timedelta(days=1), 0.0)
+        factor = 0.5 ** (days / DRIFT_HALF_LIFE_DAYS)
+        for key in keys:
+            self.state[key] = self.state[key] * factor
+
+    def update(self, X, dates, preds, y):
+        """
+        Fold in rows dated after the previous update. Features and predictions
+        are counted as soon as a bar exists; errors once its next bar (y) is known.
+        """
+        st = self.state
+        X = np.column_stack([X, preds]).astype(np.float64)
+        new = np.asarray(dates > st["feature_date"])
+        if new.any():
+            newest = dates[new].max()
+            self._decay(["counts", "weight", "sum", "sum_sq"], st["feature_date"], newest)
+            st["counts"] += _histograms(X[new], self.snapshot["edges"])
+            st["weight"] += int(new.sum())
+            st["sum"] += X[new].sum(axis=0)
+            st["sum_sq"] += (X[new] ** 2).sum(axis=0)
+            st["feature_date"] = newest
+
+        realized = np.asarray(dates > st["error_date"]) & np.isfinite(y)
+        if realized.any():
+            newest = dates[realized].max()
+            self._decay(["sq_err", "err_weight"], st["error_date"], newest)
+            st["sq_err"] += float(((preds[realized] - y[realized]) ** 2).sum())
+            st["err_weight"] += int(realized.sum())
+            st["error_date"] = newest
+        return int(new.sum()), int(realized.sum())
+
+    def report(self):
+        """PSI, binned KS and mean shift (in training stds) per monitored column."""
+        st = self.state
+        actual = st["counts"] / max(st["weight"], _EPS)
+        mean = st["sum"] / max(st["weight"], _EPS)
+        std = np.where(self.snapshot["std"] > 0, self.snapshot["std"], 1.0)
+        return pd.DataFrame({
+            "psi": psi(self.snapshot["expected"], actual),
+            "ks": binned_ks(self.snapshot["expected"], actual),
+            "mean_shift": (mean - self.snapshot["mean"]) / std,
+        }, index=self.snapshot["columns"])
+
+    def live_rmse(self):
+        st = self.state
+        return float(np.sqrt(st["sq_err"] / st["err_weight"])) if st["err_weight"] > 0 else float("nan")
+
+    def retrain_reasons(self):
+        """Why the model should be retrained now (empty list if it should not)."""
+        st = self.state
+        reasons = []
+        if st["weight"] >= DRIFT_MIN_ROWS:
+            report = self.report()
+            drifted = report[(report["psi"] >= PSI_THRESHOLD) | (report["ks"] >= KS_THRESHOLD)]
+            if len(drifted) >= DRIFT_FEATURE_SHARE * len(report):
+                reasons.append(f"{len(drifted)}/{len(report)} columns drifted "
+                               f"(max PSI {report['psi'].max():.2f} on {report['psi'].idxmax()})")
+        if st["err_weight"] >= DRIFT_MIN_ROWS:
+            rmse = self.live_rmse()
+            if rmse >= RMSE_RATIO * self.snapshot["val_rmse"]:
+                reasons.append(f"live RMSE {rmse:.4f} vs validation {self.snapshot['val_rmse']:.4f}")
+        age_days = (datetime.now(timezone.utc) - self.snapshot["trained_at"]).days
+        if reasons and age_days < MIN_RETRAIN_DAYS:
+            print(f"[Drift] {'; '.join(reasons)}, but the model is only {age_days}d old")
+            return []
+        return reasons
+
+
+def _drift_snapshot(trainer):
+    snapshot = trainer.metadata.get("drift_snapshot") if trainer is not None else None
+    if snapshot is None:
+        print("[Drift] No panel model with a training snapshot; retrain to enable monitoring.")
+    return snapshot
+
+def update_drift(trainer, panel, state_path=DRIFT_STATE_PATH):
+    """
+    Fold a panel already built for `trainer` (e.g. the one the prediction
+    snapshot just scored) into the persisted drift state. Returns the
+    DriftMonitor, or None if the model has no training snapshot.
+    """
+    snapshot = _drift_snapshot(trainer)
+    if snapshot is None:
+        return None
+    # Same row filter as training, so live and training histograms are comparable
+    ok = nan_free_rows(panel.values)
+    dates = panel.dates.repeat(len(panel.assets))[ok]
+    X = panel.values[ok]
+    preds = trainer.predict(X)
+
+    monitor = DriftMonitor.load(snapshot, state_path)
+    n_new, n_realized = monitor.update(X, dates, preds, panel.y[ok])
+    monitor.save()
+    print(f"[Drift] +{n_new} rows (+{n_realized} realized); "
+          f"max PSI {monitor.report()['psi'].max():.3f}, live RMSE {monitor.live_rmse():.4f}")
+    return monitor
+
+def load_drift_monitor(model_path=PANEL_MODEL_PATH, state_path=DRIFT_STATE_PATH):
+    """The persisted drift state of the panel model, without new data (None if there is no model)."""
+    snapshot = _drift_snapshot(load_panel_model(model_path))
+    return DriftMonitor.load(snapshot, state_path) if snapshot is not None else None
+
+def check_drift(model_path=PANEL_MODEL_PATH, state_path=DRIFT_STATE_PATH):
+    """
+    Download the latest bars and update the drift state of the panel model.
+    For manual checks; scheduled updates reuse the snapshot's panel instead.
+    Returns the DriftMonitor, or None if there is no model with a snapshot.
+    """
+    trainer = load_panel_model(model_path)
+    if _drift_snapshot(trainer) is None:
+        return None
+
+    assets = list(trainer.metadata.get("asset_ids", {}))
+    daily = batch_download(assets, PERIOD_FORECAST, DAILY_INTERVAL, as_bars=True)
+    weekly = batch_download(assets, PERIOD_FORECAST, WEEKLY_INTERVAL, as_bars=True)
+    intra = batch_download(assets, PERIOD_FORECAST, INTRADAY_INTERVAL, as_bars=True)
+    exog_df = None
+    try:
+        exog_df = reference_data.exog_features(daily.index)
+    except Exception as e:
+        print(f"Warning: Exogenous features failed: {e}")
+
+    panel = scoring_panel(trainer, daily, weekly, intra, assets, exog=exog_df)
+    return update_drift(trainer, panel, state_path)
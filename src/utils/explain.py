@@ -0,0 +1,30 @@
+import numpy as np
+
+# Constants
+TOP_DRIVERS = 3 # Features reported per prediction
+
+
+def split_contrib(contrib):
+    """(predictions, per-feature contributions) from a predict_contrib matrix."""
+    contrib = np.asarray(contrib)
+    return contrib.sum(axis=1), contrib[:, :-1]
+
+def top_drivers(contrib_row, names, values_row=None, k=TOP_DRIVERS):
+    """
+    The k features with the largest absolute contribution to one prediction,
+    as [{"feature", "contribution", "value"}] (value is the feature's input).
+    """
+    order = np.argsort(-np.abs(contrib_row), kind="stable")[:k]
+    return [{
+        "feature": names[i],
+        "contribution": float(contrib_row[i]),
+        "value": float(values_row[i]) if values_row is not None else None,
+    } for i in order]
+
+def format_drivers(drivers):
+    """Bullet lines for reports, e.g. `*   BTC-USD_rsi14 = 71.3 (+0.0042)`."""
+    lines = []
+    for d in drivers:
+        value = f" = {d['value']:.4g}" if d.get("value") is not None and np.isfinite(d["value"]) else ""
+        lines.append(f"*   {d['feature']}{value} ({d['contribution']:+.4f})")
+    return "\n".join(lines)
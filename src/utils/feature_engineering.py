@@ -1,109 +1,331 @@
 import pandas as pd
 import numpy as np
+from functools import cached_property
 from ta.momentum import RSIIndicator
 from ta.trend import MACD, SMAIndicator, EMAIndicator
-from ta.volatility import BollingerBands, AverageTrueRange
+from ta.volatility import BollingerBands
+from src.utils.intraday_features import INTRADAY_STATS, OBSERVED, intraday_features, fill_missing
+from src.utils.bars import as_bars
+
+# Per-ticker price features, in column order. Optional blocks (weekly, intraday)
+# are appended after these when the source data is available.
+PRICE_FEATURES = [
+    "close", "high", "low", "volume", "logret",
+    "roll_mean_7", "roll_std_7", "roll_mean_21", "roll_std_21", "autocorr_1",
+    "macd", "macd_signal", "macd_hist", "bb_high", "bb_low",
+    "rsi14", "sma20", "ema20", "atr14",
+]
+WEEKLY_FEATURES = ["w_close"]
+INTRADAY_FEATURES = [f"i_{s}" for s in INTRADAY_STATS + [OBSERVED]]
+# Scale-free versions of the price-level features, for models pooled across
+# assets: positive levels as log ratios to close, Bollinger bands (the lower
+# one can go negative) and signed series (MACD, ATR) as a fraction of close,
+# volume relative to its own 20-bar mean. Only built when a feature spec asks
+# for them.
+RELATIVE_PRICE_FEATURES = [
+    "high_rel", "low_rel", "volume_rel", "roll_mean_7_rel", "roll_mean_21_rel",
+    "macd_rel", "macd_signal_rel", "macd_hist_rel", "bb_high_rel", "bb_low_rel",
+    "sma20_rel", "ema20_rel", "atr14_rel",
+]
+RELATIVE_WEEKLY_FEATURES = ["w_close_rel"]
+SCALE_FREE_PRICE_FEATURES = ["logret", "roll_std_7", "roll_std_21", "autocorr_1", "rsi14"]
+
+FEATURE_DTYPE = np.float32
+_MASK_CHUNK_ROWS = 65536
+
+
+class FeatureMatrix:
+    """
+    Feature block stored as one preallocated, C-contiguous float32 array.
+    Indicators are written straight into their column slot, so assembling the
+    matrix never goes through intermediate DataFrame concat/join copies.
+    """
+
+    def __init__(self, values, index, columns):
+        self.values = values
+        self.index = index
+        self.columns = list(columns)
+        self.col_index = {c: i for i, c in enumerate(self.columns)}
+
+    @classmethod
+    def allocate(cls, index, columns):
+        """Allocate an all-NaN matrix for the given row index and columns."""
+        values = np.full((len(index), len(columns)), np.nan, dtype=FEATURE_DTYPE)
+        return cls(values, index, columns)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def set(self, name, values):
+        """Write a column into its slot (cast to float32 on assignment)."""
+        self.values[:, self.col_index[name]] = np.asarray(values)
+
+    def column(self, name):
+        """Return a (strided) view of one column."""
+        return self.values[:, self.col_index[name]]
+
+    def valid_rows(self):
+        """Boolean mask of rows without any NaN."""
+        return nan_free_rows(self.values)
+
+    def to_frame(self):
+        """Wrap the matrix in a DataFrame without copying the values."""
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+
+
+def nan_free_rows(values):
+    """Boolean mask of rows without any NaN, computed in bounded chunks."""
+    n_rows = values.shape[0]
+    mask = np.empty(n_rows, dtype=bool)
+    for start in range(0, n_rows, _MASK_CHUNK_ROWS):
+        stop = start + _MASK_CHUNK_ROWS
+        mask[start:stop] = ~np.isnan(values[start:stop]).any(axis=1)
+    return mask
+
+def row_selector(mask):
+    """
+    Turn a row mask into an indexer. A contiguous run of valid rows (the usual
+    case: indicator warm-up at the top, unknown target at the bottom) becomes a
+    slice, so indexing returns a view instead of a copy.
+    """
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return slice(0, 0)
+    if rows[-1] - rows[0] + 1 == len(rows):
+        return slice(rows[0], rows[-1] + 1)
+    return rows
+
 
 def compute_log_returns(df_multi):
-    """Compute log returns for multi-index DataFrame."""
+    """Compute log returns for multi-index DataFrame (or Bars)."""
+    bars = as_bars(df_multi)
     rets = {}
-    for tkr in df_multi.columns.get_level_values(1).unique():
-        # Check if 'Close' exists for this ticker
-        if (tkr, 'Close') in df_multi.columns:
-            close = df_multi[tkr, 'Close'].dropna()
-        elif ('Close', tkr) in df_multi.columns:
-             close = df_multi['Close', tkr].dropna()
-        else:
+    for tkr in bars.assets:
+        if not bars.has(tkr, 'Close'):
             continue
-            
+        close = bars.series(tkr, 'Close').dropna()
         rets[tkr] = np.log(close).diff()
     out = pd.DataFrame(rets)
     out.index.name = "Date"
     return out
 
-def build_features_from_price(df_daily, df_weekly, df_intra=None, assets=None):
-    """Build features from daily, weekly, and intraday price data."""
-    if assets is None:
-        # Try to infer assets from columns
-        if df_daily.columns.nlevels > 1:
-             assets = df_daily.columns.get_level_values(0).unique()
-        else:
-             return pd.DataFrame()
-
-    features = {}
-    
+def _rolling_autocorr(logret, window):
+    """Rolling lag-1 autocorrelation; same values as rolling(window).apply(autocorr)."""
+    return logret.rolling(window - 1).corr(logret.shift(1))
+
+def _average_true_range(high, low, close, window=14):
+    """
+    Same values as ta's AverageTrueRange (SMA-seeded Wilder smoothing, zeros
+    before the first full window), without its per-row .iloc loop.
+    """
+    prev_close = close.shift(1)
+    true_range = pd.concat(
+        [high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1
+    ).max(axis=1)
+    tr = true_range.to_numpy(dtype=np.float64).tolist()
+    atr = [0.0] * len(tr)
+    if len(tr) >= window:
+        prev = atr[window - 1] = float(true_range.iloc[:window].mean())
+        for i in range(window, len(tr)):
+            prev = atr[i] = (prev * (window - 1) + tr[i]) / float(window)
+    return pd.Series(atr, index=true_range.index, name="atr")
+
+class _PriceInputs:
+    """Per-ticker inputs shared by several indicators, computed on first use."""
+
+    def __init__(self, df_tkr):
+        self.close = df_tkr['Close']
+        self.high = df_tkr['High']
+        self.low = df_tkr['Low']
+        self.volume = df_tkr['Volume']
+
+    @cached_property
+    def logret(self):
+        return np.log(self.close).diff()
+
+    @cached_property
+    def macd(self):
+        return MACD(close=self.close, window_slow=26, window_fast=12, window_sign=9)
+
+    @cached_property
+    def bb(self):
+        return BollingerBands(close=self.close, window=20, window_dev=2)
+
+
+# name -> indicator; only the names requested in build_feature_matrix are computed
+_PRICE_INDICATORS = {
+    "close": lambda p: p.close,
+    "high": lambda p: p.high,
+    "low": lambda p: p.low,
+    "volume": lambda p: p.volume,
+    # lagged returns
+    "logret": lambda p: p.logret,
+    # rolling stats
+    "roll_mean_7": lambda p: p.close.rolling(7).mean(),
+    "roll_std_7": lambda p: p.logret.rolling(7).std(),
+    "roll_mean_21": lambda p: p.close.rolling(21).mean(),
+    "roll_std_21": lambda p: p.logret.rolling(21).std(),
+    "autocorr_1": lambda p: _rolling_autocorr(p.logret, 30),
+    # technical indicators
+    "macd": lambda p: p.macd.macd(),
+    "macd_signal": lambda p: p.macd.macd_signal(),
+    "macd_hist": lambda p: p.macd.macd_diff(),
+    "bb_high": lambda p: p.bb.bollinger_hband(),
+    "bb_low": lambda p: p.bb.bollinger_lband(),
+    "rsi14": lambda p: RSIIndicator(close=p.close, window=14).rsi(),
+    "sma20": lambda p: SMAIndicator(close=p.close, window=20).sma_indicator(),
+    "ema20": lambda p: EMAIndicator(close=p.close, window=20).ema_indicator(),
+    "atr14": lambda p: _average_true_range(p.high, p.low, p.close, window=14),
+}
+
+def _log_ratio_to_close(name):
+    return lambda p: np.log(_PRICE_INDICATORS[name](p) / p.close)
+
+def _fraction_of_close(name):
+    return lambda p: _PRICE_INDICATORS[name](p) / p.close
+
+def _distance_to_close(name):
+    return lambda p: _PRICE_INDICATORS[name](p) / p.close - 1
+
+def _relative_volume(p, window=20):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = p.volume / p.volume.rolling(window).mean()
+    return ratio.replace([np.inf, -np.inf], np.nan)
+
+_PRICE_INDICATORS.update({
+    "high_rel": _log_ratio_to_close("high"),
+    "low_rel": _log_ratio_to_close("low"),
+    "volume_rel": _relative_volume,
+    "roll_mean_7_rel": _log_ratio_to_close("roll_mean_7"),
+    "roll_mean_21_rel": _log_ratio_to_close("roll_mean_21"),
+    "macd_rel": _fraction_of_close("macd"),
+    "macd_signal_rel": _fraction_of_close("macd_signal"),
+    "macd_hist_rel": _fraction_of_close("macd_hist"),
+    "bb_high_rel": _distance_to_close("bb_high"),
+    "bb_low_rel": _distance_to_close("bb_low"),
+    "sma20_rel": _log_ratio_to_close("sma20"),
+    "ema20_rel": _log_ratio_to_close("ema20"),
+    "atr14_rel": _fraction_of_close("atr14"),
+})
+
+def _write_price_features(fm, tkr, df_tkr, names):
+    inputs = _PriceInputs(df_tkr)
+    for name in names:
+        fm.set(f"{tkr}_{name}", _PRICE_INDICATORS[name](inputs))
+
+def _write_weekly_features(fm, tkr, weekly, close, names):
+    # weekly trend features
+    w_close = weekly.series(tkr, 'Close').reindex(fm.index).ffill()
+    if "w_close" in names:
+        fm.set(f"{tkr}_w_close", w_close)
+    if "w_close_rel" in names:
+        fm.set(f"{tkr}_w_close_rel", np.log(w_close / close))
+
+def _write_intraday_features(fm, tkr, intra, names):
+    # intraday microstructure, aggregated to the daily index by integer day code
+    stats = intraday_features(intra.asset(tkr), fm.index)
+    for name in names:
+        # Fill missing values (for dates older than 60d) with a fixed constant
+        # This prevents dropna() from discarding 10 months of daily data;
+        # i_observed marks which days are filled
+        fm.set(f"{tkr}_{name}", fill_missing(stats[name[len("i_"):]]))
+
+def _feature_names(features):
+    """(price, weekly, intraday) indicator names kept by a feature spec (None = all)."""
+    if features is None:
+        return list(PRICE_FEATURES), list(WEEKLY_FEATURES), list(INTRADAY_FEATURES)
+    wanted = set(features)
+    keep = lambda names: [n for n in names if n in wanted]
+    return (keep(PRICE_FEATURES + RELATIVE_PRICE_FEATURES), keep(WEEKLY_FEATURES + RELATIVE_WEEKLY_FEATURES),
+            keep(INTRADAY_FEATURES))
+
+def _exog_columns(exog, features):
+    """Exog columns kept by a feature spec, in exog order."""
+    if exog is None:
+        return []
+    wanted = None if features is None else set(features)
+    return [c for c in exog.columns if wanted is None or c in wanted]
+
+def _resolve_layout(daily, weekly, intra, assets, names):
+    """
+    Per-asset (ticker, has_weekly, has_intra) for the assets with usable daily
+    bars, and the feature columns they produce, in output order.
+    """
+    price_names, weekly_names, intra_names = names
+    layout = []
+    columns = []
     for tkr in assets:
-        try:
-            # Use xs to extract data for the specific ticker, assuming level 0 is Ticker
-            # We check if Ticker is in level 0
-            if tkr in df_daily.columns.get_level_values(0):
-                df_tkr = df_daily.xs(tkr, level=0, axis=1)
-            elif tkr in df_daily.columns.get_level_values(1):
-                df_tkr = df_daily.xs(tkr, level=1, axis=1)
-            else:
-                # Ticker not found
-                continue
-                
-            close = df_tkr['Close'].rename(f"{tkr}_close")
-            high = df_tkr['High'].rename(f"{tkr}_high")
-            low = df_tkr['Low'].rename(f"{tkr}_low")
-            vol = df_tkr['Volume'].rename(f"{tkr}_volume")
-
-        except KeyError:
+        if not all(daily.has(tkr, f) for f in ('Close', 'High', 'Low', 'Volume')):
             continue
-
-        # lagged returns
-        logret = np.log(close).diff().rename(f"{tkr}_logret")
-        feats = pd.concat([close, high, low, vol, logret], axis=1)
-
-        # rolling stats
-        feats[f"{tkr}_roll_mean_7"] = close.rolling(7).mean()
-        feats[f"{tkr}_roll_std_7"] = logret.rolling(7).std()
-        feats[f"{tkr}_roll_mean_21"] = close.rolling(21).mean()
-        feats[f"{tkr}_roll_std_21"] = logret.rolling(21).std()
-        feats[f"{tkr}_autocorr_1"] = logret.rolling(30).apply(
-            lambda x: pd.Series(x).autocorr(lag=1), raw=False
+        has_weekly = bool(weekly_names) and weekly is not None and weekly.has(tkr, 'Close')
+        has_intra = bool(intra_names) and intra is not None and all(
+            intra.has(tkr, f) for f in ('Open', 'High', 'Low', 'Close')
         )
 
-        # technical indicators
-        rsi = RSIIndicator(close=close, window=14).rsi().rename(f"{tkr}_rsi14")
-        macd = MACD(close=close, window_slow=26, window_fast=12, window_sign=9)
-        feats[f"{tkr}_macd"] = macd.macd()
-        feats[f"{tkr}_macd_signal"] = macd.macd_signal()
-        feats[f"{tkr}_macd_hist"] = macd.macd_diff()
-        sma20 = SMAIndicator(close=close, window=20).sma_indicator().rename(f"{tkr}_sma20")
-        ema20 = EMAIndicator(close=close, window=20).ema_indicator().rename(f"{tkr}_ema20")
-        bb = BollingerBands(close=close, window=20, window_dev=2)
-        feats[f"{tkr}_bb_high"] = bb.bollinger_hband()
-        feats[f"{tkr}_bb_low"] = bb.bollinger_lband()
-        atr = AverageTrueRange(
-            high=high, low=low, close=close, window=14
-        ).average_true_range().rename(f"{tkr}_atr14")
-
-        feats = pd.concat([feats, rsi, sma20, ema20, atr], axis=1)
-
-        # weekly trend features
-        if df_weekly is not None and (tkr, 'Close') in df_weekly.columns:
-            w_close = df_weekly[tkr, 'Close'].rename(f"{tkr}_w_close")
-            feats = feats.join(w_close.reindex(feats.index).ffill())
-
-        # intraday microstructure
-        if df_intra is not None and (tkr, 'Close') in df_intra.columns:
-            intra_close = df_intra[tkr, 'Close'].dropna()
-            i_rets = np.log(intra_close).diff()
-            i_df = (
-                i_rets.groupby(i_rets.index.date)
-                .std()
-                .rename(f"{tkr}_i_vol_std")
-                .to_frame()
-            )
-            i_df.index = pd.to_datetime(i_df.index)
-            # Join and fill missing values (for dates older than 60d) with the mean volatility
-            # This prevents dropna() from discarding 10 months of daily data
-            feats = feats.join(i_df)
-            feats[f"{tkr}_i_vol_std"] = feats[f"{tkr}_i_vol_std"].fillna(feats[f"{tkr}_i_vol_std"].mean())
-
-        features[tkr] = feats
-
-    all_feats = pd.concat(features.values(), axis=1)
-    return all_feats
+        asset_names = list(price_names)
+        if has_weekly:
+            asset_names += weekly_names
+        if has_intra:
+            asset_names += intra_names
+        columns += [f"{tkr}_{n}" for n in asset_names]
+        layout.append((tkr, has_weekly, has_intra))
+    return layout, columns
+
+def _write_asset_features(fm, daily, weekly, intra, entry, names):
+    """Compute one asset's indicators and write them into their slots of fm."""
+    tkr, has_weekly, has_intra = entry
+    price_names, weekly_names, intra_names = names
+    _write_price_features(fm, tkr, daily.asset(tkr), price_names)
+    if has_weekly:
+        _write_weekly_features(fm, tkr, weekly, daily.series(tkr, 'Close'), weekly_names)
+    if has_intra:
+        _write_intraday_features(fm, tkr, intra, intra_names)
+
+def build_feature_matrix(df_daily, df_weekly, df_intra=None, assets=None, exog=None, features=None):
+    """
+    Build features into a single preallocated float32 FeatureMatrix.
+
+    The column layout is resolved first so the output array is allocated once;
+    each indicator is then computed in float64 and written into its slot.
+    `exog` (optional DataFrame) is aligned onto the daily index and appended.
+    `features` (optional feature spec of generic names, e.g. ["rsi14", "atr14"])
+    restricts the build to those indicators; the others are never computed.
+    Price inputs may be Bars or (Ticker, Field) frames; frames are
+    canonicalized once and each ticker is then read as a view.
+    """
+    names = _feature_names(features)
+
+    if assets is None and isinstance(df_daily, pd.DataFrame) and df_daily.columns.nlevels == 1:
+        # Flat columns carry no ticker to name the features after
+        return FeatureMatrix.allocate(df_daily.index, [])
+    daily, weekly, intra = as_bars(df_daily), as_bars(df_weekly), as_bars(df_intra)
+    if assets is None:
+        assets = daily.assets
+
+    # 1. Resolve layout
+    layout, columns = _resolve_layout(daily, weekly, intra, assets, names)
+    exog_cols = _exog_columns(exog, features)
+
+    # 2. Allocate once and fill slots
+    fm = FeatureMatrix.allocate(daily.index, columns + exog_cols)
+    for entry in layout:
+        _write_asset_features(fm, daily, weekly, intra, entry, names)
+
+    for col in exog_cols:
+        fm.set(col, exog[col].reindex(fm.index))
+
+    return fm
+
+def build_features_from_price(df_daily, df_weekly, df_intra=None, assets=None, features=None, workers=None):
+    """
+    Build features from daily, weekly, and intraday price data.
+    `workers` > 1 shards the assets across processes (parallel_features).
+    """
+    if workers is not None and workers > 1:
+        from src.utils.parallel_features import build_feature_matrix_parallel
+        fm = build_feature_matrix_parallel(df_daily, df_weekly, df_intra, assets=assets,
+                                           features=features, workers=workers)
+    else:
+        fm = build_feature_matrix(df_daily, df_weekly, df_intra, assets=assets, features=features)
+    return fm.to_frame()
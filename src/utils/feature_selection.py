@@ -0,0 +1,84 @@
+import numpy as np
+
+# Constants
+CORR_THRESHOLD = 0.95 # |corr| above this puts two features in the same cluster
+MIN_GAIN_SHARE = 0.001 # Features below this share of total gain are dropped
+SAMPLE_ROWS = 5000 # Rows used for the correlation matrix
+PROTECTED_FEATURES = ["atr14", "atr14_rel"] # Needed for SL/TP even if the model ignores it
+NON_PRUNABLE = ["asset_id"]
+IMPORTANCE_RUNS = 5 # Training runs whose gain shares are averaged before pruning
+MAX_RMSE_INCREASE = 0.0 # Relative validation RMSE increase a pruned spec may cost
+
+
+def feature_gain(trainer):
+    """Total split gain per feature of a trained ModelTrainer, as {name: gain}."""
+    booster = trainer.model
+    gains = booster.feature_importance(importance_type="gain")
+    return dict(zip(booster.feature_name(), gains))
+
+def gain_shares(trainer):
+    """feature_gain normalized to shares of the total, so runs can be averaged."""
+    gain = feature_gain(trainer)
+    total = sum(gain.values()) or 1.0
+    return {name: float(g / total) for name, g in gain.items()}
+
+def mean_gain_shares(history):
+    """
+    Mean gain share per feature over a list of gain_shares runs. A feature
+    is averaged over the runs that had it, so newly added columns are not
+    penalized for runs that predate them.
+    """
+    totals, counts = {}, {}
+    for run in history:
+        for name, share in run.items():
+            totals[name] = totals.get(name, 0.0) + share
+            counts[name] = counts.get(name, 0) + 1
+    return {name: totals[name] / counts[name] for name in totals}
+
+def keeps_accuracy(full_rmse, pruned_rmse, max_increase=MAX_RMSE_INCREASE):
+    """True if the pruned model's validation RMSE is not worse than the full model's."""
+    return pruned_rmse <= full_rmse * (1 + max_increase)
+
+def correlation_clusters(X, feature_names, order, threshold=CORR_THRESHOLD, sample_rows=SAMPLE_ROWS, seed=42):
+    """
+    Greedy correlation clustering. Features are visited in `order` (most
+    important first); each one either starts a new cluster or joins the first
+    cluster whose representative it correlates with above `threshold`.
+    Returns {representative: [members]}.
+    """
+    if len(X) > sample_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), sample_rows, replace=False))
+        X = X[rows]
+    col = {name: i for i, name in enumerate(feature_names)}
+    sample = np.asarray(X[:, [col[n] for n in order]], dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.abs(np.corrcoef(sample, rowvar=False))
+    corr = np.nan_to_num(np.atleast_2d(corr), nan=0.0)
+
+    clusters = {}
+    reps = []
+    for i, name in enumerate(order):
+        for r in reps:
+            if corr[i, r] > threshold:
+                clusters[order[r]].append(name)
+                break
+        else:
+            reps.append(i)
+            clusters[name] = [name]
+    return clusters
+
+def select_features(gain, X, feature_names, threshold=CORR_THRESHOLD, min_gain_share=MIN_GAIN_SHARE):
+    """
+    Pick the features worth keeping from `gain` shares (e.g. mean_gain_shares
+    over recent runs, so one noisy model does not decide the spec).
+
+    Features with (almost) no gain are dropped; the rest are clustered by
+    correlation on X and only the highest-gain member of each cluster is kept.
+    Returns the kept names in their original order.
+    """
+    candidates = [n for n in feature_names
+                  if n not in NON_PRUNABLE and gain.get(n, 0.0) >= min_gain_share]
+    order = sorted(candidates, key=lambda n: gain.get(n, 0.0), reverse=True)
+    kept = set(correlation_clusters(X, feature_names, order, threshold)) if order else set()
+    kept |= (set(NON_PRUNABLE) | set(PROTECTED_FEATURES)) & set(feature_names)
+    return [n for n in feature_names if n in kept]
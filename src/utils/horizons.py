@@ -0,0 +1,65 @@
+import numpy as np
+import lightgbm as lgb
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.model_trainer import ModelTrainer
+from src.utils.dataset_cache import DatasetCache
+
+# Constants
+HORIZONS = [1, 3, 7] # Forecast horizons in bars (days for the daily model)
+VAL_FRACTION = 0.2 # Same time-ordered split as ModelTrainer.train
+
+
+def horizon_targets(close, horizons=HORIZONS):
+    """{h: log(close[t+h] / close[t])} as float64 arrays aligned with `close`."""
+    log_close = np.log(np.asarray(close, dtype=np.float64))
+    targets = {}
+    for h in horizons:
+        y = np.full(len(log_close), np.nan)
+        y[:-h] = log_close[h:] - log_close[:-h]
+        targets[h] = y
+    return targets
+
+def train_horizons(X, targets, feature_names, categorical_feature="auto", max_workers=None, dates=None,
+                   cache_dir=None):
+    """
+    Train one model per horizon from a single binned Dataset.
+
+    X holds the rows where features are valid and the shortest horizon has a
+    target; it is binned once (train + validation, time-ordered split). Each
+    horizon then takes a subset of those binned rows where its own target is
+    finite and only swaps the label, so no raw features are re-binned. The
+    horizon models train concurrently in threads (LightGBM releases the GIL).
+    For h > 1 the last h - 1 training rows are purged: their targets end on
+    validation-period closes, which would leak validation into training.
+    With `cache_dir` and the row `dates`, the binned Dataset comes from the
+    DatasetCache. Returns {h: ModelTrainer}.
+    """
+    n_val = int(np.ceil(len(X) * VAL_FRACTION))
+    n_train = len(X) - n_val
+    first = targets[min(targets)]
+    params = ModelTrainer().lgb_params()
+    if cache_dir is not None and dates is not None:
+        cache = DatasetCache(feature_names, categorical_feature, params, cache_dir)
+        train_data, val_data, _ = cache.datasets(X, first, dates, n_val)
+    else:
+        train_data = lgb.Dataset(X[:n_train], label=first[:n_train], feature_name=feature_names,
+                                 categorical_feature=categorical_feature, params=params).construct()
+        val_data = lgb.Dataset(X[n_train:], label=first[n_train:], feature_name=feature_names,
+                               categorical_feature=categorical_feature, reference=train_data,
+                               params=params).construct()
+
+    def fit(h):
+        y = targets[h]
+        # Purge rows whose h-bar target reaches past the split
+        train_rows = np.flatnonzero(np.isfinite(y[:max(n_train - (h - 1), 0)]))
+        val_rows = np.flatnonzero(np.isfinite(y[n_train:]))
+        train_h = train_data.subset(train_rows).construct()
+        train_h.set_label(y[:n_train][train_rows])
+        val_h = val_data.subset(val_rows).construct()
+        val_h.set_label(y[n_train:][val_rows])
+        trainer = ModelTrainer()
+        trainer.fit_datasets(train_h, val_h, feature_names, save_model=False)
+        return h, trainer
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(targets)) as pool:
+        return dict(pool.map(fit, sorted(targets)))
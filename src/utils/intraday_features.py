@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# Statistics produced per bucket by aggregate_bars, in column order.
+INTRADAY_STATS = ["vol_std", "rv", "range", "skew", "vwret", "gap"]
+DAY = "1D"
+# Per-day flag added next to the statistics: 1.0 if the day has intraday
+# bars, else 0.0. Statistics are filled with MISSING_FILL where undefined, and
+# 0.0 also occurs in real data (a zero gap or return), so the flag is what lets
+# the model tell a day without bars from an observed zero.
+OBSERVED = "observed"
+# Value for statistics on days without intraday bars (the daily history is
+# longer than the intraday one) or with too few bars for the statistic (e.g.
+# skew needs 3). Fixed rather than a statistic of the observed days: a window
+# mean changes every day (rewriting history rows and invalidating cached
+# Datasets) and leaks later days into earlier rows. NaN is not an option: the
+# pipelines train on NaN-free rows only.
+MISSING_FILL = 0.0
+
+
+def bucket_codes(index, period=DAY):
+    """
+    Integer bucket code per timestamp (UTC-based, e.g. days since epoch for "1D").
+    Works on nanosecond integers, so no Python date objects are created.
+    """
+    period_ns = pd.Timedelta(period).value
+    ts = np.asarray(pd.DatetimeIndex(index).values, dtype="datetime64[ns]").view(np.int64)
+    return ts // period_ns
+
+
+def _group_sum(group, values, n_groups):
+    return np.bincount(group, weights=values, minlength=n_groups)
+
+
+def _group_mean(group, values, valid, n_groups):
+    """Per-group mean over `valid` entries; returns (mean, count)."""
+    count = np.bincount(group, weights=valid.astype(np.float64), minlength=n_groups)
+    total = _group_sum(group, np.where(valid, values, 0.0), n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count, count
+
+
+def aggregate_bars(index, open_, high, low, close, volume, period=DAY):
+    """
+    Aggregate OHLCV bars of any size (15m, 1h, 4h, ...) into `period` buckets.
+
+    All statistics are computed in one vectorized pass over the bars:
+      vol_std - std of bar-to-bar log returns (same definition as the old i_vol_std)
+      rv      - realized variance, sum of squared intra-bucket log returns
+      range   - log(max high / min low)
+      skew    - bias-corrected skew of intra-bucket log returns
+      vwret   - volume-weighted mean intra-bucket return (equal-weighted if no volume)
+      gap     - log(first open / previous bucket's last close)
+
+    Intra-bucket returns exclude the jump from the previous bucket: the first
+    bar of a bucket uses log(close / open); the jump is reported as `gap`.
+    Returns (bucket_codes, stats) where stats maps INTRADAY_STATS -> arrays.
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.nan_to_num(np.asarray(volume, dtype=np.float64), nan=0.0)
+
+    codes = bucket_codes(index, period)
+    keep = ~np.isnan(close)
+    if not keep.all():
+        codes, open_, high, low, close, volume = (
+            a[keep] for a in (codes, open_, high, low, close, volume)
+        )
+    order = np.argsort(codes, kind="stable")
+    if (order != np.arange(len(order))).any():
+        codes, open_, high, low, close, volume = (
+            a[order] for a in (codes, open_, high, low, close, volume)
+        )
+
+    n = len(codes)
+    if n == 0:
+        return codes, {s: np.empty(0) for s in INTRADAY_STATS}
+
+    first = np.empty(n, dtype=bool)
+    first[0] = True
+    first[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(first)
+    group = np.cumsum(first) - 1
+    n_groups = len(starts)
+
+    log_close = np.log(close)
+    r_all = np.empty(n)
+    r_all[0] = np.nan
+    r_all[1:] = np.diff(log_close)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r_in = np.where(first, np.log(close / open_), r_all)
+    valid_all = ~np.isnan(r_all)
+    valid_in = ~np.isnan(r_in)
+
+    # std of bar-to-bar returns (two-pass, ddof=1)
+    mean_all, n_all = _group_mean(group, r_all, valid_all, n_groups)
+    dev = np.where(valid_all, r_all - mean_all[group], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vol_std = np.sqrt(_group_sum(group, dev * dev, n_groups) / (n_all - 1))
+    vol_std[n_all < 2] = np.nan
+
+    # realized variance and skew of intra-bucket returns
+    r_in0 = np.where(valid_in, r_in, 0.0)
+    rv = _group_sum(group, r_in0 * r_in0, n_groups)
+    mean_in, n_in = _group_mean(group, r_in, valid_in, n_groups)
+    dev = np.where(valid_in, r_in - mean_in[group], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m2 = _group_sum(group, dev ** 2, n_groups) / n_in
+        m3 = _group_sum(group, dev ** 3, n_groups) / n_in
+        skew = m3 / m2 ** 1.5 * np.sqrt(n_in * (n_in - 1)) / (n_in - 2)
+    skew[(n_in < 3) | ~(m2 > 0)] = np.nan
+
+    # high-low range
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rng = np.log(np.fmax.reduceat(high, starts) / np.fmin.reduceat(low, starts))
+
+    # volume-weighted return, equal-weighted where the bucket has no volume
+    w = np.where(valid_in, volume, 0.0)
+    w_sum = _group_sum(group, w, n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwret = np.where(w_sum > 0, _group_sum(group, w * r_in0, n_groups) / w_sum, mean_in)
+
+    # gap between buckets
+    gap = np.full(n_groups, np.nan)
+    if n_groups > 1:
+        last_close = close[starts[1:] - 1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gap[1:] = np.log(open_[starts[1:]] / last_close)
+
+    stats = {"vol_std": vol_std, "rv": rv, "range": rng, "skew": skew, "vwret": vwret, "gap": gap}
+    return codes[starts], stats
+
+
+def align_to_index(keys, values, index, period=DAY):
+    """Place per-bucket values onto `index` by bucket code (NaN where absent)."""
+    target = bucket_codes(index, period)
+    out = np.full(len(target), np.nan)
+    if len(keys) == 0:
+        return out
+    pos = np.searchsorted(keys, target)
+    pos_c = np.minimum(pos, len(keys) - 1)
+    hit = keys[pos_c] == target
+    out[hit] = values[pos_c[hit]]
+    return out
+
+
+def fill_missing(values, fill=MISSING_FILL):
+    """Fill gaps with the constant `fill`."""
+    return np.where(np.isnan(values), fill, values)
+
+
+def intraday_features(df_bars, index, period=DAY):
+    """
+    Aggregate one ticker's intraday bars (columns Open/High/Low/Close/Volume)
+    and align every statistic onto `index`. Returns {stat: array} with NaN
+    where a statistic is undefined, plus the OBSERVED flag (no NaN).
+    """
+    keys, stats = aggregate_bars(
+        df_bars.index,
+        df_bars['Open'], df_bars['High'], df_bars['Low'], df_bars['Close'],
+        df_bars['Volume'] if 'Volume' in df_bars.columns else np.zeros(len(df_bars)),
+        period=period,
+    )
+    out = {s: align_to_index(keys, stats[s], index, period) for s in INTRADAY_STATS}
+    out[OBSERVED] = np.isin(bucket_codes(index, period), keys).astype(np.float64)
+    return out
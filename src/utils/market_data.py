@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Constants
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance") # yfinance | local | replay
+REPLAY_LATENCY_SEC = float(os.getenv("REPLAY_LATENCY_SEC", 0.0))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", 0.0))
+REPLAY_MAX_RPS = float(os.getenv("REPLAY_MAX_RPS", 0.0)) # 0 = unlimited
+REPLAY_SEED = int(os.getenv("REPLAY_SEED", 42))
+# Reference series (reference_data's EXOG and FX_TICKER) that data/raw has no
+# fixtures for; the replay provider synthesizes them: ticker -> (level, daily vol)
+REPLAY_REFERENCE = {
+    "^VIX": (18.0, 0.05),
+    "UUP": (28.0, 0.003),
+    "GC=F": (2400.0, 0.01),
+    "^TNX": (4.2, 0.02),
+    "IDR=X": (16000.0, 0.003),
+}
+REPLAY_REFERENCE_YEARS = 5 # History synthesized per reference ticker (periods are cut from its end)
+REPLAY_REFERENCE_REVERSION = 0.98 # Daily AR(1) coefficient of the log deviation from the level
+
+
+class MarketDataProvider:
+    """
+    Source of OHLCV bars. download() returns the yfinance group_by="column"
+    layout: columns (Price, Ticker), one Ticker entry per requested symbol.
+    All market data (batch_download, EXOG, FX) goes through a provider.
+    """
+
+    name = "base"
+    writes_store = False # Whether safe_download_one should mirror results into data/raw
+    request_delay = 0.0 # Courtesy pause after each request (seconds)
+
+    def __init__(self):
+        self.stats = {"requests": 0, "errors": 0, "rows": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def download(self, tickers, period, interval):
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance."""
+
+    name = "yfinance"
+    writes_store = True
+    request_delay = 1.2
+
+    def download(self, tickers, period, interval):
+        self._count("requests")
+        df = yf.download(
+            tickers=tickers,
+            period=period,
+            interval=interval,
+            auto_adjust=False,
+            group_by="column",
+            threads=False,
+            progress=False,
+        )
+        if df is not None:
+            self._count("rows", len(df))
+        return df
+
+
+class LocalStoreProvider(MarketDataProvider):
+    """Bars from the local bar store (data/raw), no network access."""
+
+    name = "local"
+
+    def _read(self, ticker, period, interval):
+        from src.utils import data_loader
+        exact = data_loader.local_bar_file(ticker, period, interval)
+        if exact is not None:
+            return data_loader.read_local_bars(exact, ticker)
+        files = data_loader.local_bar_files(interval, [ticker])
+        if ticker not in files:
+            raise ValueError(f"{ticker} {interval} not in local store")
+        df = data_loader.read_local_bars(files[ticker], ticker)
+        # Trim a longer stored history to the requested period
+        days = data_loader._period_days(period)
+        if days and len(df):
+            df = df[df.index > df.index[-1] - pd.Timedelta(days=days)]
+        return df
+
+    def download(self, tickers, period, interval):
+        self._count("requests")
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = [self._read(t, period, interval) for t in tickers]
+        df = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+        df.columns.names = ["Price", "Ticker"]
+        self._count("rows", len(df))
+        return df
+
+
+class ReplayProvider(LocalStoreProvider):
+    """
+    Serves data/raw fixtures like an upstream API, for load tests and benchmarks.
+    Adds per-request latency, a seeded random error rate and a request-rate cap,
+    so pipeline concurrency and caching can be measured deterministically.
+
+    Daily reference tickers in REPLAY_REFERENCE that have no fixture are
+    served as seeded random walks on weekdays, ending at the last fixture
+    date, so EXOG features and USD/IDR work offline. These are synthetic
+    values, not market data.
+    """
+
+    name = "replay"
+
+    def __init__(self, latency_sec=REPLAY_LATENCY_SEC, error_rate=REPLAY_ERROR_RATE,
+                 max_rps=REPLAY_MAX_RPS, seed=REPLAY_SEED):
+        super().__init__()
+        self.latency_sec = latency_sec
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._store_end = None
+
+    def _read(self, ticker, period, interval):
+        try:
+            return super()._read(ticker, period, interval)
+        except ValueError:
+            if ticker not in REPLAY_REFERENCE or interval != "1d":
+                raise
+        return self._reference(ticker, period)
+
+    def _fixtures_end(self):
+        """Last date in the daily store, so synthetic series cover the fixtures' calendar."""
+        if self._store_end is None:
+            from src.utils import data_loader
+            ends = [data_loader.read_local_bars(path, t).index[-1]
+                    for t, path in data_loader.local_bar_files("1d").items()]
+            self._store_end = max(ends) if ends else pd.Timestamp.now().normalize()
+        return self._store_end
+
+    def _reference(self, ticker, period):
+        """Synthetic daily bars of a REPLAY_REFERENCE ticker in the stored (Ticker, Field) layout."""
+        from src.utils import data_loader
+        level, vol = REPLAY_REFERENCE[ticker]
+        end = self._fixtures_end()
+        index = pd.bdate_range(end=end, periods=REPLAY_REFERENCE_YEARS * 261, name="Date")
+        # Seeded per ticker, so every request (any period) sees the same history
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+        # Mean-reverting log deviation, so the level stays plausible over the years
+        shocks = rng.normal(0.0, vol, len(index))
+        deviation = np.empty(len(index))
+        prev = 0.0
+        for i, shock in enumerate(shocks):
+            prev = deviation[i] = REPLAY_REFERENCE_REVERSION * prev + shock
+        close = level * np.exp(deviation)
+        spread = close * vol / 2
+        df = pd.DataFrame({"Adj Close": close, "Close": close, "High": close + spread,
+                           "Low": close - spread, "Open": close, "Volume": 0.0}, index=index)
+        days = data_loader._period_days(period)
+        if days:
+            df = df[df.index > end - pd.Timedelta(days=days)]
+        return pd.concat({ticker: df}, axis=1)
+
+    def _throttle(self):
+        """Token-spacing rate limit shared by all threads."""
+        if self.max_rps <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.max_rps
+        time.sleep(max(slot - now, 0.0))
+
+    def download(self, tickers, period, interval):
+        self._throttle()
+        with self._lock:
+            fail = self._rng.random() < self.error_rate
+        time.sleep(self.latency_sec)
+        if fail:
+            self._count("requests")
+            self._count("errors")
+            raise ConnectionError(f"replay: injected error for {tickers} {period} {interval}")
+        return super().download(tickers, period, interval)
+
+
+_PROVIDERS = {"yfinance": YFinanceProvider, "local": LocalStoreProvider, "replay": ReplayProvider}
+_provider = None
+
+
+def get_provider():
+    """Process-wide provider, created from MARKET_DATA_PROVIDER on first use."""
+    global _provider
+    if _provider is None:
+        _provider = _PROVIDERS[MARKET_DATA_PROVIDER]()
+    return _provider
+
+def set_provider(provider):
+    """Swap the process-wide provider (e.g. a ReplayProvider in benchmarks)."""
+    global _provider
+    _provider = provider
+    return provider
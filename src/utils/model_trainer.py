@@ -6,6 +6,7 @@ import os
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
+from src.utils.dataset_cache import DatasetCache
 
 class ModelTrainer:
     def __init__(self, model_path="artifacts/final_lgbm_model.pkl", random_seed=42):
@@ -13,23 +14,55 @@ class ModelTrainer:
         self.random_seed = random_seed
         self.model = None
         self.selected_features = [] # Should be loaded or defined
+        self.metadata = {} # Extra artifacts persisted with the model (e.g. asset ids)
 
-    def train(self, X, y, feature_names=None, task="regression", save_model=True):
+    def train(self, X, y, feature_names=None, task="regression", save_model=True, categorical_feature="auto",
+              dates=None, cache_dir=None):
         """
         Trains a LightGBM model.
+        X may be a DataFrame or a 2D NumPy array (e.g. FeatureMatrix.values);
+        arrays require feature_names and are split into row views, not copies.
+        With `cache_dir` and the row `dates`, array datasets are loaded from (or
+        appended to) the binned DatasetCache instead of being re-binned.
         """
-        if feature_names is None:
-            feature_names = X.columns.tolist()
-            
-        # Split data
-        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, shuffle=False)
+        if isinstance(X, np.ndarray):
+            if feature_names is None:
+                raise ValueError("feature_names is required when X is an array.")
+            # Time-ordered split (same sizes as train_test_split(shuffle=False))
+            n_val = int(np.ceil(len(X) * 0.2))
+            if cache_dir is not None and dates is not None:
+                cache = DatasetCache(feature_names, categorical_feature, self.lgb_params(task), cache_dir)
+                train_data, val_data, _ = cache.datasets(X, y, dates, n_val)
+                self.fit_datasets(train_data, val_data, feature_names, task=task, save_model=save_model)
+                return
+            X_train, X_val = X[:-n_val], X[-n_val:]
+            y_train, y_val = y[:-n_val], y[-n_val:]
+        else:
+            if feature_names is None:
+                feature_names = X.columns.tolist()
+
+            # Split data
+            X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, shuffle=False)
         
         # Dataset
-        train_data = lgb.Dataset(X_train, label=y_train, feature_name=feature_names)
-        val_data = lgb.Dataset(X_val, label=y_val, feature_name=feature_names, reference=train_data)
-        
-        # Params
-        params = {
+        train_data = lgb.Dataset(X_train, label=y_train, feature_name=feature_names, categorical_feature=categorical_feature)
+        val_data = lgb.Dataset(X_val, label=y_val, feature_name=feature_names, categorical_feature=categorical_feature, reference=train_data)
+        self.fit_datasets(train_data, val_data, feature_names, task=task, save_model=save_model)
+
+    def train_sequences(self, train_seqs, y_train, val_seqs, y_val, feature_names, task="regression",
+                        save_model=True, categorical_feature="auto"):
+        """
+        Trains from lists of lgb.Sequence objects (out-of-core data).
+        LightGBM samples rows for binning and then pulls batches sequentially,
+        so the full feature matrix is never held in memory; only labels are.
+        """
+        train_data = lgb.Dataset(train_seqs, label=y_train, feature_name=feature_names, categorical_feature=categorical_feature)
+        val_data = lgb.Dataset(val_seqs, label=y_val, feature_name=feature_names, categorical_feature=categorical_feature, reference=train_data)
+        self.fit_datasets(train_data, val_data, feature_names, task=task, save_model=save_model)
+
+    def lgb_params(self, task="regression"):
+        """LightGBM parameters; Datasets binned ahead of training must use the same ones."""
+        return {
             "objective": task,
             "metric": "rmse" if task == "regression" else "binary_logloss",
             "boosting_type": "gbdt",
@@ -41,6 +74,10 @@ class ModelTrainer:
             "min_child_samples": 10, # Reduced from default 20
             "verbosity": -1 # Suppress warnings
         }
+
+    def fit_datasets(self, train_data, val_data, feature_names, task="regression", save_model=True):
+        """Trains on prebuilt train/validation lgb.Dataset objects."""
+        params = self.lgb_params(task)
         
         # Train
         self.model = lgb.train(
@@ -66,6 +103,7 @@ class ModelTrainer:
         joblib.dump(self.model, self.model_path)
         # Also save selected features if possible, or assume they are fixed/passed in
         joblib.dump(self.selected_features, self.model_path.replace(".pkl", "_features.pkl"))
+        joblib.dump(self.metadata, self.model_path.replace(".pkl", "_meta.pkl"))
 
     def load_model(self):
         """Load the trained model."""
@@ -74,15 +112,32 @@ class ModelTrainer:
             feat_path = self.model_path.replace(".pkl", "_features.pkl")
             if os.path.exists(feat_path):
                 self.selected_features = joblib.load(feat_path)
+            meta_path = self.model_path.replace(".pkl", "_meta.pkl")
+            if os.path.exists(meta_path):
+                self.metadata = joblib.load(meta_path)
             return True
         return False
 
+    def load_metadata(self):
+        """Load only the metadata saved with the model (empty dict if none)."""
+        meta_path = self.model_path.replace(".pkl", "_meta.pkl")
+        if os.path.exists(meta_path):
+            self.metadata = joblib.load(meta_path)
+        return self.metadata
+
     def predict_next_day(self, latest_features_df):
         """Predict for the next day using the latest features."""
         if self.model is None:
             if not self.load_model():
                 raise ValueError("Model not trained or found.")
         
+        if isinstance(latest_features_df, np.ndarray):
+            # Array rows are already in training column order
+            if len(latest_features_df) == 0:
+                return None
+            latest_row = np.nan_to_num(latest_features_df[-1:], nan=0.0)
+            return self.model.predict(latest_row)[0]
+
         # Ensure we have the right features
         if not self.selected_features:
              # Fallback if features not saved, might fail if mismatch
@@ -97,3 +152,22 @@ class ModelTrainer:
         latest_row = X_predict.iloc[[-1]]
         prediction = self.model.predict(latest_row)
         return prediction[0]
+
+    def predict(self, X):
+        """Batched predict on a 2D array in selected_features order (NaN -> 0)."""
+        if self.model is None:
+            if not self.load_model():
+                raise ValueError("Model not trained or found.")
+        return self.model.predict(np.nan_to_num(X, nan=0.0))
+
+    def predict_contrib(self, X):
+        """
+        Batched per-feature contributions (LightGBM pred_contrib, i.e. TreeSHAP
+        values) on a 2D array in selected_features order (NaN -> 0). Returns an
+        (n_rows, n_features + 1) array; the last column is the bias, and each
+        row sums to the prediction.
+        """
+        if self.model is None:
+            if not self.load_model():
+                raise ValueError("Model not trained or found.")
+        return self.model.predict(np.nan_to_num(X, nan=0.0), pred_contrib=True)
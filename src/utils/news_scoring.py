@@ -0,0 +1,174 @@
+import os
+import re
+
+# Constants
+# Yahoo symbol -> names (case-insensitive) and tickers (upper case only, so
+# "LINK"/"DOT" do not match the words "link"/"dot"). Longest alias wins, so
+# "Bitcoin Cash" is not counted as Bitcoin. Names that are also ordinary
+# words are in AMBIGUOUS_NAMES.
+ALIASES = {
+    "BTC-USD": ["Bitcoin", "BTC"],
+    "ETH-USD": ["Ethereum", "Ether", "ETH"],
+    "XRP-USD": ["Ripple", "XRP"],
+    "BNB-USD": ["BNB Chain", "BNB"],
+    "SOL-USD": ["Solana", "SOL"],
+    "ADA-USD": ["Cardano", "ADA"],
+    "DOGE-USD": ["Dogecoin", "DOGE"],
+    "TRX-USD": ["Tron", "TRX"],
+    "AVAX-USD": ["Avalanche", "AVAX"],
+    "LINK-USD": ["Chainlink", "LINK"],
+    "DOT-USD": ["Polkadot", "DOT"],
+    "LTC-USD": ["Litecoin", "LTC"],
+    "BCH-USD": ["Bitcoin Cash", "BCH"],
+    "ETC-USD": ["Ethereum Classic", "ETC"],
+    "SHIB-USD": ["Shiba Inu", "SHIB"],
+    "XLM-USD": ["Stellar", "XLM"],
+    "HBAR-USD": ["Hedera", "HBAR"],
+    "ATOM-USD": ["Cosmos", "ATOM"],
+    "XMR-USD": ["Monero", "XMR"],
+    "AAVE-USD": ["Aave", "AAVE"],
+    "FIL-USD": ["Filecoin", "FIL"],
+    "NEAR-USD": ["NEAR Protocol", "NEAR"],
+}
+# Capitalized only, and only counted in entries with a crypto context word or
+# another alias of the same asset ("XRP"): case alone does not help at the
+# start of a headline ("Ripple effect of..."). Entries where they are the only
+# evidence are left to the LLM.
+AMBIGUOUS_NAMES = ["Ripple", "Stellar", "Avalanche", "Cosmos", "Tron"]
+CONTEXT_WORDS = [
+    "crypto\\w*", "tokens?", "coins?", "altcoins?", "blockchains?", "defi", "stablecoins?", "staking",
+    "on-chain", "mainnet", "wallets?", "exchanges?", "etfs?", "network", "protocol",
+]
+POSITIVE_WORDS = [
+    "surge[sd]?", "surging", "soar(s|ed|ing)?", "rall(y|ies|ied|ying)", "jump(s|ed)?", "gain(s|ed)?",
+    "climb(s|ed)?", "rise[sn]?", "rising", "record high", "all-time high", "breakout", "bullish",
+    "approv(e|es|ed|al)", "partner(s|ship|ships)?", "launch(es|ed)?", "upgrade[sd]?", "adopt(s|ed|ion)?",
+    "inflows?", "integrat(es|ed|ion)", "listing", "rebound(s|ed)?",
+]
+NEGATIVE_WORDS = [
+    "plunge[sd]?", "plummet(s|ed)?", "crash(es|ed)?", "drop(s|ped)?", "fall(s|en)?", "fell", "slide[s]?",
+    "slump(s|ed)?", "tumble[sd]?", "bearish", "hack(s|ed|er|ers)?", "exploit(s|ed)?", "breach(es)?",
+    "stolen", "theft", "lawsuit[s]?", "sue[sd]?", "ban(s|ned)?", "fraud", "scam", "investigation",
+    "probe", "outflows?", "liquidat(ed|ion|ions)", "delist(s|ed|ing)?", "sell-?off", "dump(s|ed)?",
+]
+TITLE_WEIGHT = 2.0 # A headline mention counts twice a summary-only mention
+ASSET_WEIGHTS = {"BTC-USD": 0.5} # Bitcoin is in most headlines; it needs specific news to win
+SENTIMENT_LABEL = 0.15 # |sentiment| above this is reported as Bullish/Bearish
+MIN_SCORE = float(os.getenv("NEWS_MIN_SCORE", 3.0)) # Evidence the top asset needs for a local pick
+DOMINANCE_RATIO = float(os.getenv("NEWS_DOMINANCE_RATIO", 2.0)) # Top score vs the runner-up
+MIN_ENTRIES = 2 # Distinct entries mentioning the top asset
+
+
+def _compile_aliases(aliases, ambiguous=()):
+    """One precompiled alternation over every alias, plus alias -> symbol lookup."""
+    lookup = {}
+    names, exact = [], []
+    for symbol, words in aliases.items():
+        for word in words:
+            lookup[word.lower()] = symbol
+            case_sensitive = (word.isupper() and " " not in word) or word in ambiguous
+            (exact if case_sensitive else names).append(re.escape(word))
+    by_length = lambda words: "|".join(sorted(words, key=len, reverse=True))
+    pattern = rf"(?<![\w$])\$?(?:(?i:{by_length(names)})|{by_length(exact)})(?!\w)"
+    return re.compile(pattern), lookup
+
+def _compile_words(words):
+    return re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+
+ALIAS_PATTERN, ALIAS_LOOKUP = _compile_aliases(ALIASES, AMBIGUOUS_NAMES)
+CONTEXT_PATTERN = _compile_words(CONTEXT_WORDS)
+POSITIVE_PATTERN = _compile_words(POSITIVE_WORDS)
+NEGATIVE_PATTERN = _compile_words(NEGATIVE_WORDS)
+
+
+def has_context(text):
+    """True if `text` has a crypto context word, which AMBIGUOUS_NAMES need to count."""
+    return CONTEXT_PATTERN.search(text) is not None
+
+def mentions(text, context=None):
+    """
+    Symbols mentioned in `text`, with their counts. `context` says whether
+    the entry is about crypto (default: has_context(text)).
+    """
+    if context is None:
+        context = has_context(text)
+    counts, ambiguous = {}, {}
+    for match in ALIAS_PATTERN.finditer(text):
+        alias = match.group().lstrip("$")
+        symbol = ALIAS_LOOKUP[alias.lower()]
+        target = ambiguous if alias in AMBIGUOUS_NAMES else counts
+        target[symbol] = target.get(symbol, 0) + 1
+    for symbol, count in ambiguous.items():
+        if context or symbol in counts:
+            counts[symbol] = counts.get(symbol, 0) + count
+    return counts
+
+def sentiment(text):
+    """Lexicon sentiment in [-1, 1]: (positive - negative) / (positive + negative) word hits."""
+    pos = len(POSITIVE_PATTERN.findall(text))
+    neg = len(NEGATIVE_PATTERN.findall(text))
+    return (pos - neg) / (pos + neg) if pos + neg else 0.0
+
+def score_entries(entries):
+    """
+    Per-symbol news scores from RSS entries (dicts with title and summary),
+    highest first. Each entry adds TITLE_WEIGHT (mentioned in the title) or 1
+    (summary only), scaled by 1 + |entry sentiment| so strong bullish or
+    bearish catalysts count more (like the News Agent, which also picks
+    short candidates), and by ASSET_WEIGHTS. local_pick decides what a
+    bearish top asset means.
+    """
+    scores = {}
+    for entry in entries:
+        title = entry.get("title", "")
+        text = f"{title} {entry.get('summary', '')}"
+        context = has_context(text)
+        found = mentions(text, context)
+        if not found:
+            continue
+        in_title = mentions(title, context)
+        tone = sentiment(text)
+        for symbol, count in found.items():
+            s = scores.setdefault(symbol, {"ticker": symbol, "score": 0.0, "mentions": 0, "entries": 0,
+                                           "sentiment": 0.0, "headlines": []})
+            weight = TITLE_WEIGHT if symbol in in_title else 1.0
+            s["score"] += weight * (1 + abs(tone)) * ASSET_WEIGHTS.get(symbol, 1.0)
+            s["mentions"] += count
+            s["entries"] += 1
+            s["sentiment"] += tone
+            s["headlines"].append(title)
+    for s in scores.values():
+        s["sentiment"] /= s["entries"]
+    return sorted(scores.values(), key=lambda s: s["score"], reverse=True)
+
+def tone_label(value):
+    if value > SENTIMENT_LABEL:
+        return "Bullish"
+    if value < -SENTIMENT_LABEL:
+        return "Bearish"
+    return "Neutral"
+
+def local_pick(entries, exclude=()):
+    """
+    Deterministic pick from the news when one asset clearly dominates: at
+    least MIN_SCORE and MIN_ENTRIES, and DOMINANCE_RATIO times the runner-up
+    (assets in `exclude`, e.g. recent picks, are skipped). A top asset with
+    Bearish news is never picked locally: its score grew with the bad news,
+    so whether it is a short candidate is left to the LLM. Returns
+    (ticker, reason, ranked scores); ticker and reason are None when the
+    news is ambiguous or bearish and the LLM should decide.
+    """
+    exclude = set(exclude)
+    ranked = [s for s in score_entries(entries) if s["ticker"] not in exclude]
+    if not ranked:
+        return None, None, ranked
+    top = ranked[0]
+    runner_up = ranked[1]["score"] if len(ranked) > 1 else 0.0
+    if top["score"] < MIN_SCORE or top["entries"] < MIN_ENTRIES or top["score"] < DOMINANCE_RATIO * runner_up:
+        return None, None, ranked
+    if top["sentiment"] < -SENTIMENT_LABEL:
+        return None, None, ranked
+    name = ALIASES[top["ticker"]][0]
+    reason = (f"{tone_label(top['sentiment'])} news: {top['headlines'][0].rstrip('.')}. "
+              f"{top['entries']} headlines mention {name}.")
+    return top["ticker"], reason, ranked
@@ -0,0 +1,186 @@
+import os
+import numpy as np
+import lightgbm as lgb
+from pathlib import Path
+from src.utils.data_loader import load_local_bars, INTRADAY_INTERVAL, local_bar_files
+from src.utils.feature_engineering import FEATURE_DTYPE, nan_free_rows
+from src.utils.model_trainer import ModelTrainer
+from src.utils.panel import build_panel, panel_columns, ASSET_ID
+from src.utils.reference_data import align_to_calendar
+
+# Constants
+CHUNK_DIR = "data/chunks"
+OOC_MODEL_PATH = "artifacts/panel_ooc_lgbm_model.pkl"
+VAL_FRACTION = 0.2
+CHUNK_ROWS = 50_000 # Bars per feature block written to disk
+WARMUP_ROWS = 500 # Extra history per block so rolling/EWM indicators are warmed up
+
+
+class FeatureChunk:
+    """
+    One asset's valid feature rows on disk: a raw row-major float32 file plus
+    small label/timestamp arrays. Rows are time-ordered.
+    """
+
+    def __init__(self, path, n_cols, y, ts):
+        self.path = path
+        self.n_cols = n_cols
+        self.y = y
+        self.ts = ts
+
+    def __len__(self):
+        return len(self.y)
+
+    @classmethod
+    def write(cls, path, blocks):
+        """Append (values, y, ts) blocks to one file; only one block is in memory at a time."""
+        ys, tss, n_cols = [], [], None
+        with open(path, "wb") as f:
+            for values, y, ts in blocks:
+                values.astype(FEATURE_DTYPE, copy=False).tofile(f)
+                n_cols = values.shape[1]
+                ys.append(y.astype(np.float32))
+                tss.append(ts)
+        if n_cols is None or not sum(len(y) for y in ys):
+            os.remove(path)
+            return None
+        return cls(path, n_cols, np.concatenate(ys), np.concatenate(tss))
+
+
+class ChunkSequence(lgb.Sequence):
+    """
+    lgb.Sequence over rows [start, stop) of a FeatureChunk, read from disk on
+    demand with pread, so only the current batch is resident.
+    """
+
+    batch_size = 4096
+
+    def __init__(self, chunk, start, stop):
+        self.chunk = chunk
+        self.start = start
+        self.stop = stop
+        self.row_bytes = chunk.n_cols * np.dtype(FEATURE_DTYPE).itemsize
+        self._fd = os.open(chunk.path, os.O_RDONLY)
+
+    def __del__(self):
+        fd = getattr(self, "_fd", None)
+        if fd is not None:
+            os.close(fd)
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def _read(self, first, n_rows):
+        raw = os.pread(self._fd, n_rows * self.row_bytes, (self.start + first) * self.row_bytes)
+        return np.frombuffer(raw, dtype=FEATURE_DTYPE).reshape(n_rows, self.chunk.n_cols)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            first, last, _ = idx.indices(len(self))
+            return self._read(first, max(last - first, 0))
+        if isinstance(idx, list):
+            return np.vstack([self._read(i, 1) for i in idx])
+        # Single rows feed LightGBM's bin sampling, which requires float64
+        return self._read(int(idx), 1)[0].astype(np.float64)
+
+
+def _feature_blocks(tkr, bars, asset_ids, columns, exog_close):
+    """
+    Yield (values, y, ts) of valid rows for one asset, CHUNK_ROWS bars at a time.
+    Each block is computed with WARMUP_ROWS of preceding history, which is then
+    discarded, so memory does not grow with the length of the history.
+
+    The result only approximately equals a single-block build. Recursive
+    indicators (EMA/MACD, RSI, ATR) restart at each block's warm-up start;
+    by the end of the warm-up the restart's weight has decayed to about
+    (1 - 1/span)^WARMUP_ROWS, far below float32 rounding for the default
+    spans but not zero. Rolling features can differ in the last bits,
+    since pandas' rolling sums depend on where the window starts.
+    """
+    n = len(bars)
+    for start in range(0, n, CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, n)
+        window = bars.iloc[max(start - WARMUP_ROWS, 0):stop]
+        exog = align_to_calendar(exog_close, window.index) if exog_close is not None else None
+        panel = build_panel(window, None, None, [tkr], asset_ids, exog=exog, columns=columns)
+        skip = len(window) - (stop - start)
+        # The last bar of a block has its target from the next block's first bar
+        if stop < n:
+            panel.y[-1] = np.log(bars[tkr, 'Close'].iloc[stop] / bars[tkr, 'Close'].iloc[stop - 1])
+        values, y = panel.values[skip:], panel.y[skip:]
+        keep = nan_free_rows(values) & np.isfinite(y)
+        ts = np.asarray(panel.dates.values[skip:], dtype="datetime64[ns]").view(np.int64)
+        yield values[keep], y[keep], ts[keep]
+
+def write_feature_chunks(tickers, asset_ids, columns, interval=INTRADAY_INTERVAL,
+                         chunk_dir=CHUNK_DIR, exog_close=None):
+    """
+    Stream assets from the local bar store one at a time, build their panel
+    features in time blocks and append the valid rows to disk. Peak memory is
+    one asset's raw bars plus one feature block, independent of the number of
+    assets and of how many blocks the history spans.
+    """
+    Path(chunk_dir).mkdir(parents=True, exist_ok=True)
+    chunks = []
+    for tkr in tickers:
+        bars = load_local_bars([tkr], interval)
+        if bars.empty:
+            continue
+        path = os.path.join(chunk_dir, f"{tkr}_{interval}.f32")
+        chunk = FeatureChunk.write(path, _feature_blocks(tkr, bars, asset_ids, columns, exog_close))
+        if chunk is not None:
+            chunks.append(chunk)
+        del bars
+    return chunks
+
+
+def split_sequences(chunks, val_fraction=VAL_FRACTION):
+    """
+    Time-ordered split across all chunks: rows at or after the global cutoff
+    timestamp go to validation. Returns (train_seqs, y_train, val_seqs, y_val).
+    """
+    all_ts = np.concatenate([c.ts for c in chunks])
+    cutoff = np.quantile(all_ts, 1 - val_fraction, method="higher")
+    train_seqs, val_seqs, y_train, y_val = [], [], [], []
+    for c in chunks:
+        split = int(np.searchsorted(c.ts, cutoff, side="left"))
+        if split > 0:
+            train_seqs.append(ChunkSequence(c, 0, split))
+            y_train.append(c.y[:split])
+        if split < len(c):
+            val_seqs.append(ChunkSequence(c, split, len(c)))
+            y_val.append(c.y[split:])
+    return train_seqs, np.concatenate(y_train), val_seqs, np.concatenate(y_val)
+
+
+def train_out_of_core(tickers=None, interval=INTRADAY_INTERVAL, model_path=OOC_MODEL_PATH,
+                      chunk_dir=CHUNK_DIR, exog_close=None, keep_chunks=False):
+    """
+    Train the pooled panel model on long bar histories without holding the
+    full feature matrix in memory: features are streamed per asset to disk,
+    then fed to LightGBM through Sequence-based Dataset construction.
+    """
+    if tickers is None:
+        tickers = list(local_bar_files(interval))
+    asset_ids = {t: i for i, t in enumerate(tickers)}
+    exog_cols = list(exog_close.columns) if exog_close is not None else []
+    columns = panel_columns(exog_cols, weekly=False, intraday=False)
+
+    print(f"Writing feature chunks for {len(tickers)} assets ({interval})...")
+    chunks = write_feature_chunks(tickers, asset_ids, columns, interval, chunk_dir, exog_close)
+    if not chunks:
+        raise ValueError("No usable bars in the local store.")
+
+    train_seqs, y_train, val_seqs, y_val = split_sequences(chunks)
+    print(f"Training out-of-core on {len(y_train)} train / {len(y_val)} val rows...")
+    trainer = ModelTrainer(model_path=model_path)
+    trainer.metadata = {"asset_ids": asset_ids, "interval": interval}
+    try:
+        trainer.train_sequences(train_seqs, y_train, val_seqs, y_val, columns,
+                                categorical_feature=[ASSET_ID])
+    finally:
+        del train_seqs, val_seqs
+        if not keep_chunks:
+            for c in chunks:
+                os.remove(c.path)
+    return trainer
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from src.utils.feature_engineering import (
+    PRICE_FEATURES, WEEKLY_FEATURES, INTRADAY_FEATURES, RELATIVE_PRICE_FEATURES, RELATIVE_WEEKLY_FEATURES,
+    SCALE_FREE_PRICE_FEATURES, FEATURE_DTYPE, build_feature_matrix,
+)
+from src.utils.model_trainer import ModelTrainer
+from src.utils.bars import as_bars
+from src.utils.explain import split_contrib, top_drivers
+
+# Constants
+PANEL_MODEL_PATH = "artifacts/panel_lgbm_model.pkl"
+ASSET_ID = "asset_id"
+UNKNOWN_ASSET = -1 # Negative categories are treated as missing by LightGBM
+_ASSET_FEATURES = (set(PRICE_FEATURES) | set(WEEKLY_FEATURES) | set(INTRADAY_FEATURES)
+                   | set(RELATIVE_PRICE_FEATURES) | set(RELATIVE_WEEKLY_FEATURES))
+
+
+def generic_name(column, tkr):
+    """Strip the `{tkr}_` prefix so every asset shares one feature name."""
+    prefix = f"{tkr}_"
+    return column[len(prefix):] if column.startswith(prefix) else column
+
+def asset_feature_name(column, tkr):
+    """Inverse of generic_name: per-asset features get their `{tkr}_` prefix back."""
+    return f"{tkr}_{column}" if column in _ASSET_FEATURES else column
+
+def exog_feature_names(columns):
+    """Columns of a panel spec filled from the exog frame (neither asset features nor the asset id)."""
+    return [c for c in columns if c not in _ASSET_FEATURES and c != ASSET_ID]
+
+def panel_columns(exog_cols=(), weekly=True, intraday=True):
+    """
+    Asset-agnostic column layout of the pooled model. Only scale-free
+    features: raw price levels (BTC ~1e5, DOGE ~1e-1) would share split
+    thresholds across assets and mostly encode which asset a row is.
+    """
+    columns = SCALE_FREE_PRICE_FEATURES + RELATIVE_PRICE_FEATURES
+    if weekly:
+        columns += RELATIVE_WEEKLY_FEATURES
+    if intraday:
+        columns += INTRADAY_FEATURES
+    return columns + list(exog_cols) + [ASSET_ID]
+
+
+class Panel:
+    """
+    Long-format (date x asset) feature block for the pooled model.
+
+    values is a float32 array of shape (n_dates * n_assets, n_columns) in
+    time-major order (all assets for date 0, then date 1, ...), so the tail of
+    the array is the most recent period and the usual time-ordered validation
+    split still holds. y is the next-bar log return per row.
+    """
+
+    def __init__(self, values, y, dates, assets, columns):
+        self.values = values
+        self.y = y
+        self.dates = dates
+        self.assets = list(assets)
+        self.columns = list(columns)
+
+    def cube(self):
+        """(n_dates, n_assets, n_columns) view of values."""
+        return self.values.reshape(len(self.dates), len(self.assets), len(self.columns))
+
+    def latest_rows(self, daily):
+        """Most recent row per asset (the last date with a close), in asset order."""
+        daily = as_bars(daily)
+        cube = self.cube()
+        out = np.full((len(self.assets), len(self.columns)), np.nan, dtype=FEATURE_DTYPE)
+        for a, tkr in enumerate(self.assets):
+            if not daily.has(tkr, 'Close'):
+                continue
+            has_close = np.flatnonzero(~np.isnan(daily.series(tkr, 'Close').to_numpy()))
+            if len(has_close):
+                out[a] = cube[has_close[-1], a]
+        return out
+
+
+def build_panel(daily, weekly, intra, assets, asset_ids, exog=None, columns=None):
+    """
+    Stack per-asset features into one Panel with generic column names plus an
+    `asset_id` column from `asset_ids` (UNKNOWN_ASSET for unseen tickers).
+    Pass `columns` (e.g. a loaded model's feature list) to force the layout;
+    columns missing from the data stay NaN. Frames are converted to Bars once
+    here rather than once per asset.
+    """
+    daily, weekly, intra = as_bars(daily), as_bars(weekly), as_bars(intra)
+    if columns is None:
+        columns = panel_columns(exog.columns if exog is not None else [])
+    col_pos = {c: i for i, c in enumerate(columns)}
+    n_dates = len(daily.index)
+
+    cube = np.full((n_dates, len(assets), len(columns)), np.nan, dtype=FEATURE_DTYPE)
+    y = np.full((n_dates, len(assets)), np.nan)
+    for a, tkr in enumerate(assets):
+        # Only the indicators named in `columns` are computed
+        fm = build_feature_matrix(daily, weekly, intra, assets=[tkr], exog=exog, features=columns)
+        for j, col in enumerate(fm.columns):
+            pos = col_pos.get(generic_name(col, tkr))
+            if pos is not None:
+                cube[:, a, pos] = fm.values[:, j]
+        if ASSET_ID in col_pos:
+            cube[:, a, col_pos[ASSET_ID]] = asset_ids.get(tkr, UNKNOWN_ASSET)
+        if daily.has(tkr, 'Close'):
+            y[:, a] = np.log(daily.series(tkr, 'Close')).diff().shift(-1).to_numpy()
+
+    return Panel(cube.reshape(n_dates * len(assets), len(columns)), y.reshape(-1),
+                 daily.index, assets, columns)
+
+
+def load_panel_model(model_path=PANEL_MODEL_PATH):
+    """Load the persisted pooled model, or None if it has not been trained yet."""
+    trainer = ModelTrainer(model_path=model_path)
+    return trainer if trainer.load_model() else None
+
+def scoring_panel(trainer, daily, weekly, intra, assets, exog=None):
+    """Panel of the `assets` that have closes, in the column layout of `trainer`."""
+    daily = as_bars(daily)
+    assets = [t for t in assets if daily.has(t, 'Close')]
+    return build_panel(daily, weekly, intra, assets, trainer.metadata.get("asset_ids", {}),
+                       exog=exog, columns=trainer.selected_features)
+
+def score_assets(trainer, daily, weekly, intra, assets, exog=None, panel=None):
+    """
+    Score assets with the pooled model in one batched pred_contrib call.
+    Returns ({ticker: predicted next-bar log return}, latest feature rows as a
+    DataFrame indexed by ticker, {ticker: top drivers under `{tkr}_*` names})
+    for assets with data. Pass the scoring_panel `panel` if it is already built.
+    """
+    daily = as_bars(daily)
+    if panel is None:
+        panel = scoring_panel(trainer, daily, weekly, intra, assets, exog)
+    assets = panel.assets
+    if not assets:
+        return {}, pd.DataFrame(columns=trainer.selected_features), {}
+    latest = panel.latest_rows(daily)
+    preds, contrib = split_contrib(trainer.predict_contrib(latest))
+    drivers = {
+        tkr: top_drivers(contrib[a], [asset_feature_name(c, tkr) for c in panel.columns], latest[a])
+        for a, tkr in enumerate(assets)
+    }
+    return dict(zip(assets, preds)), pd.DataFrame(latest, index=assets, columns=panel.columns), drivers
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from src.utils.bars import Bars, as_bars
+from src.utils.feature_engineering import (
+    FeatureMatrix, FEATURE_DTYPE, _feature_names, _exog_columns, _resolve_layout, _write_asset_features,
+)
+
+# Constants
+FEATURE_WORKERS = int(os.getenv("FEATURE_WORKERS", os.cpu_count() or 1))
+SHARDS_PER_WORKER = 4 # Smaller shards even out assets with more work (e.g. intraday)
+
+
+class SharedArray:
+    """
+    NumPy array in a named shared-memory block. The parent creates it, workers
+    attach by spec() without copying, and the parent unlinks it when done.
+    """
+
+    def __init__(self, shm, shape, dtype, order):
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order=order)
+
+    @classmethod
+    def create(cls, shape, dtype, order="C"):
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        return cls(shared_memory.SharedMemory(create=True, size=nbytes), shape, dtype, order)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype, order = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype, order)
+
+    def spec(self):
+        order = "F" if self.array.flags.f_contiguous and not self.array.flags.c_contiguous else "C"
+        return (self.shm.name, self.array.shape, self.array.dtype.str, order)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+
+def _share_bars(bars, shared):
+    """Copy a Bars block into shared memory; returns the spec workers rebuild it from."""
+    if bars is None:
+        return None
+    block = SharedArray.create(bars.values.shape, np.float64, order="F")
+    shared.append(block)
+    block.array[:] = bars.values
+    # The index is small (int64 per row) and is pickled; the values are not
+    return (block.spec(), bars.index, bars.assets, bars.fields)
+
+def _attach_bars(spec, attached):
+    if spec is None:
+        return None
+    block_spec, index, assets, fields = spec
+    block = SharedArray.attach(block_spec)
+    attached.append(block)
+    return Bars(block.array, index, assets, fields)
+
+def _write_shard(attached, bar_specs, out_spec, col_range, columns, layout, names):
+    daily, weekly, intra = (_attach_bars(spec, attached) for spec in bar_specs)
+    out = SharedArray.attach(out_spec)
+    attached.append(out)
+    # This shard's assets own a contiguous column range of the output
+    fm = FeatureMatrix(out.array[:, col_range[0]:col_range[1]], daily.index, columns)
+    for entry in layout:
+        _write_asset_features(fm, daily, weekly, intra, entry, names)
+
+def _build_shard(task):
+    """Worker: attach the shared bars and output, compute one shard of assets in place."""
+    attached = []
+    try:
+        _write_shard(attached, *task)
+    finally:
+        # Views into the blocks are gone once _write_shard returns
+        for block in attached:
+            block.close()
+    return len(task[4])
+
+def _shards(layout, columns_per_asset, n_shards):
+    """Split the layout into contiguous asset runs with their output column ranges."""
+    bounds = np.linspace(0, len(layout), n_shards + 1).round().astype(int)
+    offsets = np.concatenate([[0], np.cumsum(columns_per_asset)])
+    return [(layout[a:b], (int(offsets[a]), int(offsets[b])))
+            for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+def build_feature_matrix_parallel(df_daily, df_weekly, df_intra=None, assets=None, exog=None, features=None,
+                                  workers=None, executor=None):
+    """
+    build_feature_matrix with the assets sharded across a process pool.
+
+    The bar arrays are copied once into shared memory and the float32 output
+    matrix is preallocated there. Each worker attaches to both (nothing large
+    is pickled), computes its contiguous run of assets and writes their
+    columns in place. Output is identical to build_feature_matrix. Pass
+    `executor` to reuse a pool across calls.
+    """
+    workers = workers or FEATURE_WORKERS
+    names = _feature_names(features)
+    daily, weekly, intra = as_bars(df_daily), as_bars(df_weekly), as_bars(df_intra)
+    if assets is None:
+        assets = daily.assets
+    layout, columns = _resolve_layout(daily, weekly, intra, assets, names)
+    exog_cols = _exog_columns(exog, features)
+
+    shared = []
+    try:
+        bar_specs = tuple(_share_bars(b, shared) for b in (daily, weekly, intra))
+        out = SharedArray.create((len(daily), len(columns) + len(exog_cols)), FEATURE_DTYPE)
+        shared.append(out)
+        out.array[:] = np.nan
+
+        per_asset = [len(names[0]) + (len(names[1]) if w else 0) + (len(names[2]) if i else 0)
+                     for _, w, i in layout]
+        tasks = [(bar_specs, out.spec(), col_range, columns[col_range[0]:col_range[1]], shard, names)
+                 for shard, col_range in _shards(layout, per_asset, workers * SHARDS_PER_WORKER)]
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            list(pool.map(_build_shard, tasks))
+        finally:
+            if executor is None:
+                pool.shutdown()
+        fm = FeatureMatrix(out.array.copy(), daily.index, columns + exog_cols)
+    finally:
+        for block in shared:
+            block.close()
+            block.shm.unlink()
+
+    for col in exog_cols:
+        fm.set(col, exog[col].reindex(fm.index))
+    return fm
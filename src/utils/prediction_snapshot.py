@@ -0,0 +1,163 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.utils.data_loader import (
+    batch_download, next_bar_close, ASSETS, PERIOD_FORECAST, DAILY_INTERVAL, WEEKLY_INTERVAL, INTRADAY_INTERVAL,
+)
+from src.utils.panel import load_panel_model, scoring_panel, score_assets
+from src.utils.drift import update_drift
+from src.utils.reference_data import reference_data
+
+# Constants
+SNAPSHOT_DIR = "artifacts/predictions"
+SNAPSHOT_VERSION = 1 # Schema version of the snapshot files
+KEEP_SNAPSHOTS = 60 # Versioned files kept next to latest.json
+LATEST = "latest.json"
+
+
+def compute_snapshot(assets=None):
+    """
+    Score all assets with the pooled panel model and build their trade setups.
+    Returns the snapshot dict, or {"error": ...} if data or model is missing.
+    """
+    assets = list(assets or ASSETS)
+    print(f"Generating predictions for {assets}...")
+    created_at = pd.Timestamp.now(tz="UTC")
+
+    # 1. Load the pooled panel model (trained once per retrain cycle)
+    # Checked first, so a missing model costs no downloads
+    trainer = load_panel_model()
+    if trainer is None:
+        return {"error": "Model not found. Please train the model first."}
+
+    # 2. Download Data
+    try:
+        daily = batch_download(assets, PERIOD_FORECAST, DAILY_INTERVAL, as_bars=True)
+        weekly = batch_download(assets, PERIOD_FORECAST, WEEKLY_INTERVAL, as_bars=True)
+        intra = batch_download(assets, PERIOD_FORECAST, INTRADAY_INTERVAL, as_bars=True)
+    except Exception as e:
+        return {"error": f"Error downloading data: {e}"}
+
+    # Exogenous Features
+    # Shared cached copy, forward-filled onto the 24/7 crypto calendar
+    exog_df = None
+    try:
+        exog_df = reference_data.exog_features(daily.index)
+    except Exception as e:
+        print(f"Warning: Exogenous features failed: {e}")
+
+    # 3. Score ALL Assets in one batched predict
+    panel = scoring_panel(trainer, daily, weekly, intra, assets, exog=exog_df)
+    scores, latest, drivers = score_assets(trainer, daily, weekly, intra, assets, panel=panel)
+
+    # 4. Drift monitor: the same panel, instead of a second download and build
+    try:
+        update_drift(trainer, panel)
+    except Exception as e:
+        print(f"Warning: Drift update failed: {e}")
+
+    # 5. Build Trade Setups
+    usd_idr = reference_data.usd_idr()
+    predictions = []
+    for asset, pred_log_return in scores.items():
+        close = daily.series(asset, 'Close').dropna()
+        current_price_usd = float(close.iloc[-1])
+
+        # SL/TP from ATR (a fraction of close in the panel) if available, else a 5% fallback
+        if "atr14_rel" in latest.columns and not np.isnan(latest.loc[asset, "atr14_rel"]):
+            atr = float(latest.loc[asset, "atr14_rel"]) * current_price_usd
+        elif "atr14" in latest.columns and not np.isnan(latest.loc[asset, "atr14"]):
+            atr = float(latest.loc[asset, "atr14"])
+        else:
+            atr = current_price_usd * 0.05
+
+        if pred_log_return > 0:
+            sl_price = current_price_usd - (1.5 * atr)
+            tp_price = current_price_usd + (2.0 * atr) # Risk Reward > 1
+        else:
+            sl_price = current_price_usd + (1.5 * atr)
+            tp_price = current_price_usd - (2.0 * atr)
+
+        predictions.append({
+            "asset": asset,
+            "pred_return": float(pred_log_return),
+            "direction": "UP" if pred_log_return > 0 else "DOWN",
+            "bar_time": close.index[-1].isoformat(),
+            "current_price_usd": current_price_usd,
+            "current_price_idr": current_price_usd * usd_idr,
+            "sl_usd": sl_price,
+            "tp_usd": tp_price,
+            "sl_idr": sl_price * usd_idr,
+            "tp_idr": tp_price * usd_idr,
+            "drivers": drivers[asset],
+        })
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "snapshot_id": created_at.strftime("%Y%m%dT%H%M%SZ"),
+        "created_at": created_at.isoformat(),
+        # Valid until the next daily bar closes
+        "expires_at": next_bar_close(created_at).isoformat(),
+        "usd_idr": usd_idr,
+        "predictions": predictions,
+    }
+
+def write_snapshot(snapshot, snapshot_dir=SNAPSHOT_DIR, keep=KEEP_SNAPSHOTS):
+    """
+    Write predictions-<id>.json and atomically point latest.json at it, so
+    readers never see a partial file. Older versions beyond `keep` are pruned.
+    """
+    out = Path(snapshot_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(snapshot, indent=1)
+    (out / f"predictions-{snapshot['snapshot_id']}.json").write_text(text)
+    tmp = out / f"{LATEST}.tmp"
+    tmp.write_text(text)
+    os.replace(tmp, out / LATEST)
+    for old in sorted(out.glob("predictions-*.json"))[:-keep]:
+        old.unlink()
+    return out / LATEST
+
+def read_snapshot(snapshot_dir=SNAPSHOT_DIR, now=None):
+    """
+    Latest snapshot with read-time `staleness_sec` (age) and `stale` (past
+    its expiry, i.e. a newer bar has closed), or None if there is none.
+    """
+    path = Path(snapshot_dir) / LATEST
+    try:
+        snapshot = json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    snapshot["staleness_sec"] = (now - pd.Timestamp(snapshot["created_at"])).total_seconds()
+    snapshot["stale"] = now >= pd.Timestamp(snapshot["expires_at"])
+    return snapshot
+
+def refresh_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    """Compute and write a new snapshot. Returns it (with staleness fields) or the error dict."""
+    snapshot = compute_snapshot()
+    if "error" in snapshot:
+        return snapshot
+    write_snapshot(snapshot, snapshot_dir)
+    print(f"[Snapshot] Wrote {snapshot['snapshot_id']} ({len(snapshot['predictions'])} assets)")
+    return read_snapshot(snapshot_dir)
+
+def latest_predictions(snapshot_dir=SNAPSHOT_DIR):
+    """
+    The current snapshot, refreshed on demand only when it is missing or
+    stale. If the refresh fails, a stale snapshot is still returned (its
+    `stale` flag set) rather than nothing.
+    """
+    snapshot = read_snapshot(snapshot_dir)
+    if snapshot is not None and not snapshot["stale"]:
+        return snapshot
+    print("[Snapshot] Missing or stale; refreshing on demand...")
+    fresh = refresh_snapshot(snapshot_dir)
+    if "error" in fresh and snapshot is not None:
+        print(f"[Snapshot] Refresh failed ({fresh['error']}); serving stale snapshot.")
+        return snapshot
+    return fresh
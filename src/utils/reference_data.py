@@ -0,0 +1,120 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.utils.market_data import get_provider
+
+# Constants
+EXOG = ["^VIX", "UUP", "GC=F", "^TNX"]
+FX_TICKER = "IDR=X"
+FX_FALLBACK = 15000.0
+# One period covering both training (1y) and prediction (90d) so they share a copy
+REFERENCE_PERIOD = "1y"
+REFERENCE_INTERVAL = "1d"
+EXOG_TTL_SEC = 6 * 3600
+FX_TTL_SEC = 3600
+CACHE_DIR = "data/reference"
+
+
+def exog_column(ticker):
+    """Feature column name for an exogenous ticker."""
+    return f"EXOG_{ticker}"
+
+def _to_ns(index):
+    """Timestamps as int64 ns (UTC for tz-aware indexes)."""
+    return np.asarray(pd.DatetimeIndex(index).values, dtype="datetime64[ns]").view(np.int64)
+
+def align_to_calendar(frame, index):
+    """
+    Align a trading-calendar frame (weekdays, exchange holidays) onto another
+    calendar such as the 24/7 crypto index, carrying the last observation
+    forward. Vectorized: one searchsorted for all target timestamps.
+    """
+    frame = frame.sort_index().ffill()
+    src = _to_ns(frame.index)
+    dst = _to_ns(index)
+    pos = np.searchsorted(src, dst, side="right") - 1
+    values = frame.to_numpy(dtype=np.float64)
+    out = np.full((len(dst), values.shape[1]), np.nan)
+    hit = pos >= 0
+    out[hit] = values[pos[hit]]
+    return pd.DataFrame(out, index=index, columns=frame.columns)
+
+
+class ReferenceData:
+    """
+    Shared exogenous (EXOG) and FX reference series.
+
+    Series are kept in memory and mirrored to CACHE_DIR; each has a TTL, and a
+    stale copy is served if a refresh fails. Training and prediction both read
+    from the same in-memory copy.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, exog_ttl=EXOG_TTL_SEC, fx_ttl=FX_TTL_SEC):
+        self.cache_dir = cache_dir
+        self.ttls = {"exog": exog_ttl, "fx": fx_ttl}
+        self._memory = {}  # name -> (fetched_at, DataFrame)
+
+    def _path(self, name):
+        return Path(self.cache_dir) / f"{name}.csv"
+
+    def _load_disk(self, name):
+        path = self._path(name)
+        if not path.exists():
+            return None
+        frame = pd.read_csv(path, index_col=0, parse_dates=True)
+        return os.path.getmtime(path), frame
+
+    def _save_disk(self, name, frame):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        frame.to_csv(self._path(name))
+
+    def _get(self, name, fetch):
+        """Return a cached frame, refreshing it when older than its TTL."""
+        entry = self._memory.get(name) or self._load_disk(name)
+        if entry is not None and time.time() - entry[0] < self.ttls[name]:
+            self._memory[name] = entry
+            return entry[1]
+        try:
+            frame = fetch()
+            if frame is None or frame.empty:
+                raise ValueError("empty dataframe")
+            self._save_disk(name, frame)
+            entry = (time.time(), frame)
+        except Exception as e:
+            if entry is None:
+                raise
+            print(f"Warning: {name} refresh failed, serving cached copy: {e}")
+        self._memory[name] = entry
+        return entry[1]
+
+    def _fetch_exog(self):
+        exog = get_provider().download(EXOG, REFERENCE_PERIOD, REFERENCE_INTERVAL)
+        if exog is None or not isinstance(exog.columns, pd.MultiIndex):
+            return None
+        return pd.DataFrame({exog_column(t): exog['Close'][t] for t in EXOG if t in exog['Close']})
+
+    def _fetch_fx(self):
+        fx = get_provider().download([FX_TICKER], "5d", REFERENCE_INTERVAL)
+        return fx['Close'][[FX_TICKER]].rename(columns={FX_TICKER: 'Close'})
+
+    def exog_close(self):
+        """Daily EXOG closes on their own trading calendar."""
+        return self._get("exog", self._fetch_exog)
+
+    def exog_features(self, index):
+        """EXOG closes aligned onto `index` (e.g. the crypto daily index)."""
+        return align_to_calendar(self.exog_close(), index)
+
+    def usd_idr(self):
+        """Latest USD/IDR rate; falls back to FX_FALLBACK if never fetched."""
+        try:
+            return float(self._get("fx", self._fetch_fx)['Close'].dropna().iloc[-1])
+        except Exception:
+            print(f"Warning: Could not fetch USD/IDR rate. Using fallback {FX_FALLBACK:.0f}.")
+            return FX_FALLBACK
+
+
+# Process-wide instance shared by training and prediction
+reference_data = ReferenceData()
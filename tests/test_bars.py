@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.bars import Bars, as_bars, UNKNOWN_TICKER
+
+FIELDS = ["Close", "High", "Low", "Open", "Volume"]
+INDEX = pd.date_range("2024-01-01", periods=6, freq="D")
+
+
+def field_value(asset, field, i):
+    """Distinct value per (asset, field, row), so any misplaced column shows."""
+    return 1000 * (["ADA", "BTC", "ETH"].index(asset) + 1) + 10 * FIELDS.index(field) + i
+
+
+def frame(assets, fields_first=False, index=INDEX):
+    data = {}
+    for a in assets:
+        for f in FIELDS:
+            data[(f, a) if fields_first else (a, f)] = [field_value(a, f, i) for i in range(len(index))]
+    return pd.DataFrame(data, index=index)
+
+
+def check(bars, assets):
+    assert bars.assets == sorted(assets) and bars.fields == FIELDS
+    for a in assets:
+        for f in FIELDS:
+            assert list(bars.series(a, f)) == [field_value(a, f, i) for i in range(len(bars))]
+
+
+def test_ticker_field_layout():
+    bars = Bars.from_frame(frame(["ETH", "BTC"]))
+    check(bars, ["BTC", "ETH"])
+
+
+def test_field_ticker_layout():
+    bars = Bars.from_frame(frame(["ETH", "BTC"], fields_first=True))
+    check(bars, ["BTC", "ETH"])
+
+
+def test_flat_layout_takes_the_ticker():
+    flat = frame(["ETH"]).droplevel(0, axis=1)
+    check(Bars.from_frame(flat, ticker="ETH"), ["ETH"])
+    assert Bars.from_frame(flat).assets == [UNKNOWN_TICKER]
+
+
+def test_single_asset_frame_is_renamed():
+    assert Bars.from_frame(frame(["ETH"]), ticker="ETH-USD").assets == ["ETH-USD"]
+
+
+def test_canonical_frame_round_trips_without_copy():
+    bars = Bars.from_frame(frame(["BTC", "ETH"]))
+    again = Bars.from_frame(bars.to_frame())
+    assert np.shares_memory(again.values, bars.values)
+    check(again, ["BTC", "ETH"])
+
+
+def test_empty_inputs():
+    assert Bars.from_frame(None).is_empty and Bars.from_frame(pd.DataFrame()).is_empty
+    assert as_bars(None) is None
+    assert Bars.concat([None, Bars.empty()]).is_empty
+
+
+def test_concat_outer_joins_unequal_indexes():
+    btc = Bars.from_frame(frame(["BTC"]))
+    eth = Bars.from_frame(frame(["ETH"], index=INDEX[2:].append(pd.DatetimeIndex(["2024-01-09"]))))
+    out = Bars.concat([btc, eth])
+    assert list(out.index) == list(INDEX) + [pd.Timestamp("2024-01-09")]
+    assert out.assets == ["BTC", "ETH"]
+    btc_close = out.series("BTC", "Close")
+    assert np.isnan(btc_close.iloc[-1]) and btc_close.iloc[0] == field_value("BTC", "Close", 0)
+    eth_close = out.series("ETH", "Close")
+    assert eth_close.iloc[:2].isna().all()
+    assert list(eth_close.iloc[2:]) == [field_value("ETH", "Close", i) for i in range(5)]
+
+
+def test_concat_later_part_wins_for_a_repeated_ticker():
+    first = Bars.from_frame(frame(["BTC"]))
+    second = Bars.from_frame(frame(["BTC"]) * 2)
+    assert Bars.concat([first, second]).series("BTC", "Close").iloc[1] == 2 * field_value("BTC", "Close", 1)
+
+
+def test_select_time_and_single_asset_are_views():
+    bars = Bars.from_frame(frame(["ADA", "BTC", "ETH"]))
+    window = bars.select(start=INDEX[1], stop=INDEX[4])
+    assert list(window.index) == list(INDEX[1:4])
+    assert np.shares_memory(window.values, bars.values)
+
+    btc = bars.select(["BTC"], start=INDEX[2])
+    assert btc.assets == ["BTC"] and np.shares_memory(btc.values, bars.values)
+    assert list(btc.series("BTC", "Open")) == [field_value("BTC", "Open", i) for i in range(2, 6)]
+
+
+def test_select_asset_subset_copies_in_order():
+    bars = Bars.from_frame(frame(["ADA", "BTC", "ETH"]))
+    sub = bars.select(["ETH", "ADA", "DOGE"])
+    assert sub.assets == ["ADA", "ETH"]
+    assert not np.shares_memory(sub.values, bars.values)
+    assert list(sub.field("Close")[0]) == [field_value("ADA", "Close", 0), field_value("ETH", "Close", 0)]
+
+
+def test_views_by_position():
+    bars = Bars.from_frame(frame(["BTC", "ETH"]))
+    assert bars.field("High").shape == (len(INDEX), 2)
+    assert list(bars.asset("ETH").columns) == FIELDS
+    assert bars.asset("DOGE") is None
+    assert bars.has("BTC", "Volume") and not bars.has("BTC", "Adj Close")
+    with pytest.raises(KeyError):
+        bars.series("DOGE", "Close")
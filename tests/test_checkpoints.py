@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+from src.utils.checkpoints import RunCheckpoints, run_stage, resume_or_new, gc_checkpoints
+
+
+def age(run, seconds):
+    """Backdate a run's last write by `seconds`."""
+    stamp = time.time() - seconds
+    os.utime(run.path, (stamp, stamp))
+
+
+def test_stage_runs_once_and_is_reused(tmp_path):
+    calls = []
+    def compute():
+        calls.append(1)
+        return {"value": 42}
+
+    run = RunCheckpoints("r1", tmp_path)
+    assert run.stage("features", compute) == {"value": 42}
+    # A resumed run (a new object on the same id) loads the checkpoint
+    assert RunCheckpoints("r1", tmp_path).stage("features", compute) == {"value": 42}
+    assert len(calls) == 1
+    assert not list(run.path.glob("*.tmp"))
+
+
+def test_failed_stage_is_not_checkpointed(tmp_path):
+    run = RunCheckpoints("r1", tmp_path)
+    def fail():
+        raise ValueError("download failed")
+    with pytest.raises(ValueError):
+        run.stage("features", fail)
+    assert not run.has("features")
+    assert run.stage("features", lambda: 1) == 1
+
+
+def test_run_stage_without_checkpoints_is_a_plain_call(tmp_path):
+    assert run_stage(None, "model", lambda: 7) == 7
+    assert not list(tmp_path.iterdir())
+    run = RunCheckpoints("r1", tmp_path)
+    assert run_stage(run, "model", lambda: 7) == 7
+    assert run_stage(run, "model", lambda: 8) == 7
+
+
+def test_resume_unfinished_run_within_window(tmp_path):
+    run = RunCheckpoints("r1", tmp_path)
+    run.save("news_pick", ("SOL-USD", "reason"))
+    assert resume_or_new(tmp_path, window_sec=3600).run_id == "r1"
+
+
+def test_finished_or_stale_runs_start_a_new_run(tmp_path):
+    run = RunCheckpoints("r1", tmp_path)
+    age(run, 7200)
+    assert resume_or_new(tmp_path, window_sec=3600).run_id != "r1"
+
+    run = RunCheckpoints("r2", tmp_path)
+    run.finish()
+    assert run.finished
+    new = resume_or_new(tmp_path, window_sec=3600)
+    assert new.run_id not in ("r1", "r2")
+
+
+def test_new_run_ids_are_unique(tmp_path):
+    ids = {resume_or_new(tmp_path, window_sec=0).run_id for _ in range(5)}
+    assert len(ids) == 5
+
+
+def test_gc_keeps_newest_and_excluded_runs(tmp_path):
+    runs = [RunCheckpoints(f"r{i}", tmp_path) for i in range(5)]
+    for i, run in enumerate(runs):
+        age(run, 100 - i) # r4 is the newest
+    removed = gc_checkpoints(tmp_path, keep=2, exclude=["r0"])
+    assert sorted(removed) == ["r1", "r2"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["r0", "r3", "r4"]
+
+
+def test_gc_removes_old_runs(tmp_path):
+    old, recent = RunCheckpoints("old", tmp_path), RunCheckpoints("recent", tmp_path)
+    age(old, 3 * 86400)
+    assert gc_checkpoints(tmp_path, keep=10, max_age_days=2) == ["old"]
+    assert recent.path.exists()
@@ -0,0 +1,179 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.utils import dataset_cache
+from src.utils.dataset_cache import DatasetCache, gc_datasets, META
+
+PARAMS = {"objective": "regression", "max_bin": 63, "verbose": -1}
+COLUMNS = [f"f{i}" for i in range(5)]
+
+
+def make_rows(n, start=0, seed=0):
+    """n feature rows for days start..start+n, the same values for the same day across calls."""
+    days = np.arange(start, start + n)
+    X = np.stack([np.sin(days * (i + 1) * 0.01) + 0.01 * i for i in range(len(COLUMNS))], axis=1)
+    X = X.astype(np.float32)
+    y = np.random.default_rng(seed).normal(size=n)
+    dates = np.datetime64("2024-01-01") + days.astype("timedelta64[D]")
+    return X, y, dates
+
+
+def n_val(n):
+    return int(np.ceil(n * 0.2))
+
+
+def run(cache, X, y, dates):
+    return cache.datasets(X, y, dates, n_val(len(X)))
+
+
+def meta(cache):
+    return json.loads((cache.path / META).read_text())
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DatasetCache(COLUMNS, "auto", PARAMS, tmp_path)
+
+
+def test_build_then_hit(cache):
+    X, y, dates = make_rows(400)
+    train, val, status = run(cache, X, y, dates)
+    assert status == "build"
+    train, val, status = run(cache, X, y, dates)
+    assert status == "hit"
+    assert train.num_data() == 400 - n_val(400) and val.num_data() == n_val(400)
+    # Labels always come from the call, not the cache
+    assert np.allclose(val.get_label(), y[-n_val(400):])
+
+
+def test_new_rows_are_appended(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    X, y, dates = make_rows(440)
+    assert run(cache, X, y, dates)[2] == "append"
+    assert meta(cache)["appended"] == 40 and meta(cache)["binned_rows"] == 400
+
+
+def test_sliding_window_is_appended(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    X, y, dates = make_rows(400, start=10)
+    assert run(cache, X, y, dates)[2] == "append"
+    assert meta(cache)["n_rows"] == 400
+
+
+def test_rebins_after_rebin_fraction(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    run(cache, *make_rows(460))
+    assert meta(cache)["appended"] == 60
+    # 60 + 60 appended rows > REBIN_FRACTION of the 400 binned rows
+    assert run(cache, *make_rows(520))[2] == "build"
+    assert meta(cache)["appended"] == 0 and meta(cache)["binned_rows"] == 520
+
+
+def test_revised_rows_reuse_bins(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    X = X.copy()
+    X[:20] += 0.01 # e.g. an indicator warm-up moved with the download window
+    assert run(cache, X, y, dates)[2] == "append"
+    assert meta(cache)["appended"] == 0
+    # The revised rows were stored, so the next call with them is a hit
+    assert run(cache, X, y, dates)[2] == "hit"
+
+
+def test_many_revised_rows_rebin(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    X = X.copy()
+    X[:300] *= 2 # more than REVISED_FRACTION of the cached rows
+    assert run(cache, X, y, dates)[2] == "build"
+
+
+def test_float_noise_is_not_a_revision(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    X = np.nextafter(X, np.float32(np.inf)) # last-bit differences only
+    assert run(cache, X, y, dates)[2] == "hit"
+
+
+def test_different_dates_rebin(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    assert run(cache, X, y, dates + np.timedelta64(12, "h"))[2] == "build"
+    assert run(cache, *make_rows(400, start=1000))[2] == "build"
+
+
+def test_unreadable_binary_rebuilds(cache):
+    X, y, dates = make_rows(400)
+    run(cache, X, y, dates)
+    (cache.path / dataset_cache.TRAIN_BIN).write_bytes(b"not a dataset")
+    assert run(cache, X, y, dates)[2] == "build"
+    assert run(cache, X, y, dates)[2] == "hit"
+
+
+def test_save_leaves_no_temp_files(cache):
+    run(cache, *make_rows(400))
+    run(cache, *make_rows(440))
+    assert not list(cache.path.glob("*.tmp"))
+    assert (cache.path.parent / f"{cache.key}{dataset_cache.LOCK_SUFFIX}").exists()
+
+
+def test_gc_removes_unused_specs_by_age(tmp_path):
+    old = DatasetCache(COLUMNS, "auto", PARAMS, tmp_path)
+    run(old, *make_rows(200))
+    stale = time.time() - (dataset_cache.MAX_AGE_DAYS + 1) * 86400
+    os.utime(old.path, (stale, stale))
+
+    # Any number of recently used specs is kept
+    recent = [DatasetCache(COLUMNS, "auto", {**PARAMS, "seed": i}, tmp_path) for i in range(25)]
+    for c in recent:
+        run(c, *make_rows(200))
+    assert not old.path.exists()
+    assert all(c.path.exists() for c in recent)
+
+
+def test_gc_size_budget_removes_least_recently_used(tmp_path):
+    caches = [DatasetCache(COLUMNS, "auto", {**PARAMS, "seed": i}, tmp_path) for i in range(3)]
+    for i, c in enumerate(caches):
+        run(c, *make_rows(200))
+        os.utime(c.path, (time.time() - 100 + i, time.time() - 100 + i))
+    size = sum(f.stat().st_size for f in caches[0].path.iterdir())
+    removed = gc_datasets(tmp_path, max_bytes=int(size * 2.5))
+    assert removed == [caches[0].key]
+
+
+def test_gc_keeps_excluded_and_locked_specs(tmp_path):
+    caches = [DatasetCache(COLUMNS, "auto", {**PARAMS, "seed": i}, tmp_path) for i in range(2)]
+    for c in caches:
+        run(c, *make_rows(200))
+    with dataset_cache._spec_lock(tmp_path, caches[1].key):
+        removed = gc_datasets(tmp_path, max_bytes=0, exclude=[caches[0].key])
+    assert removed == []
+    assert all(c.path.exists() for c in caches)
+
+
+def _build_in_process(base_dir, queue):
+    cache = DatasetCache(COLUMNS, "auto", PARAMS, base_dir)
+    queue.put(run(cache, *make_rows(2000))[2])
+
+
+def test_concurrent_processes_share_one_build(tmp_path):
+    import multiprocessing as mp
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_build_in_process, args=(tmp_path, queue)) for _ in range(2)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    # The lock serializes them: one builds, the other loads its result
+    assert sorted(queue.get(timeout=5) for _ in procs) == ["build", "hit"]
+    cache = DatasetCache(COLUMNS, "auto", PARAMS, tmp_path)
+    assert run(cache, *make_rows(2000))[2] == "hit"
+    assert not list(cache.path.glob("*.tmp"))
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import drift
+from src.utils.drift import DriftMonitor, feature_snapshot, psi, binned_ks
+
+COLUMNS = ["a", "b", "c"]
+VAL_RMSE = 0.1
+
+
+def make_rows(n, start="2024-01-01", shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, len(COLUMNS))) + shift
+    dates = pd.date_range(start, periods=n, freq="D").to_numpy()
+    preds = X[:, 0] * 0.01
+    return X, dates, preds
+
+
+@pytest.fixture
+def snapshot():
+    X, dates, preds = make_rows(1000)
+    snap = feature_snapshot(X, COLUMNS, preds, VAL_RMSE, dates[-1])
+    # Old enough for an early retrain
+    snap["trained_at"] -= timedelta(days=drift.MIN_RETRAIN_DAYS + 1)
+    return snap
+
+
+def monitor_after(snapshot, tmp_path, n, shift=0.0, y_noise=0.0, seed=1):
+    monitor = DriftMonitor(snapshot, tmp_path / "state.pkl")
+    X, dates, preds = make_rows(n, start=snapshot["last_date"] + pd.Timedelta(days=1), shift=shift, seed=seed)
+    y = preds + np.random.default_rng(seed).normal(scale=y_noise, size=n) if y_noise else preds.copy()
+    monitor.update(X, dates, preds, y)
+    return monitor
+
+
+def test_psi_and_ks():
+    expected = np.full((1, 4), 0.25)
+    assert psi(expected, expected)[0] == pytest.approx(0.0)
+    assert binned_ks(expected, expected)[0] == pytest.approx(0.0)
+    shifted = np.array([[0.0, 0.0, 0.5, 0.5]])
+    assert psi(expected, shifted)[0] > drift.PSI_THRESHOLD
+    assert binned_ks(expected, shifted)[0] == pytest.approx(0.5)
+
+
+def test_same_distribution_does_not_drift(snapshot, tmp_path):
+    monitor = monitor_after(snapshot, tmp_path, 200)
+    assert (monitor.report()["psi"] < drift.PSI_THRESHOLD).all()
+    assert monitor.retrain_reasons() == []
+
+
+def test_shifted_features_ask_for_retrain(snapshot, tmp_path):
+    monitor = monitor_after(snapshot, tmp_path, 200, shift=2.0)
+    reasons = monitor.retrain_reasons()
+    assert len(reasons) == 1 and "columns drifted" in reasons[0]
+
+
+def test_live_error_asks_for_retrain(snapshot, tmp_path):
+    monitor = monitor_after(snapshot, tmp_path, 200, y_noise=drift.RMSE_RATIO * VAL_RMSE * 2)
+    assert monitor.live_rmse() > drift.RMSE_RATIO * VAL_RMSE
+    assert any("live RMSE" in r for r in monitor.retrain_reasons())
+
+
+def test_too_few_rows_are_not_trusted(snapshot, tmp_path):
+    monitor = monitor_after(snapshot, tmp_path, drift.DRIFT_MIN_ROWS - 1, shift=2.0)
+    assert monitor.retrain_reasons() == []
+
+
+def test_young_model_is_not_retrained(snapshot, tmp_path):
+    snapshot["trained_at"] = datetime.now(timezone.utc) - timedelta(days=drift.MIN_RETRAIN_DAYS - 1)
+    monitor = monitor_after(snapshot, tmp_path, 200, shift=2.0)
+    assert monitor.retrain_reasons() == []
+
+
+def test_only_newer_rows_are_counted(snapshot, tmp_path):
+    monitor = DriftMonitor(snapshot, tmp_path / "state.pkl")
+    X, dates, preds = make_rows(100, start=snapshot["last_date"] + pd.Timedelta(days=1))
+    assert monitor.update(X[:60], dates[:60], preds[:60], preds[:60]) == (60, 60)
+    # Overlapping window: only the last 40 rows are new
+    assert monitor.update(X, dates, preds, preds) == (40, 40)
+    # Rows from the training period are never counted
+    old = make_rows(10)
+    assert monitor.update(*old[:3], old[2]) == (0, 0)
+
+
+def test_unrealized_rows_count_features_only(snapshot, tmp_path):
+    monitor = DriftMonitor(snapshot, tmp_path / "state.pkl")
+    X, dates, preds = make_rows(10, start=snapshot["last_date"] + pd.Timedelta(days=1))
+    y = preds.copy()
+    y[-1] = np.nan # the latest bar's next close is not known yet
+    assert monitor.update(X, dates, preds, y) == (10, 9)
+    assert monitor.state["error_date"] < monitor.state["feature_date"]
+
+
+def test_old_rows_decay(snapshot, tmp_path):
+    monitor = DriftMonitor(snapshot, tmp_path / "state.pkl")
+    start = snapshot["last_date"] + pd.Timedelta(days=1)
+    X, dates, preds = make_rows(1, start=start)
+    monitor.update(X, dates, preds, preds)
+    # One half-life later the first row weighs half
+    later = dates + np.timedelta64(drift.DRIFT_HALF_LIFE_DAYS, "D")
+    monitor.update(X, later, preds, preds)
+    assert monitor.state["weight"] == pytest.approx(1.5)
+    assert monitor.state["err_weight"] == pytest.approx(1.5)
+    assert monitor.state["counts"].sum(axis=1) == pytest.approx(np.full(len(COLUMNS) + 1, 1.5))
+
+
+def test_state_persists_and_resets_with_a_new_model(snapshot, tmp_path):
+    monitor = monitor_after(snapshot, tmp_path, 100)
+    monitor.save()
+    assert not list(tmp_path.glob("*.tmp"))
+    assert DriftMonitor.load(snapshot, tmp_path / "state.pkl").state["weight"] == 100
+
+    retrained = {**snapshot, "trained_at": datetime.now(timezone.utc)}
+    assert DriftMonitor.load(retrained, tmp_path / "state.pkl").state["weight"] == 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from ta.volatility import AverageTrueRange
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.feature_engineering import _average_true_range, build_feature_matrix
+from src.utils.intraday_features import MISSING_FILL
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return synthetic_bars(2, 300, freq="1D")
+
+
+@pytest.mark.parametrize("window", [3, 14])
+def test_average_true_range_matches_ta(bars, window):
+    df = bars["SYN000-USD"]
+    expected = AverageTrueRange(df["High"], df["Low"], df["Close"], window=window).average_true_range()
+    got = _average_true_range(df["High"], df["Low"], df["Close"], window=window)
+    assert got.index.equals(expected.index)
+    np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=0)
+
+
+def test_average_true_range_shorter_than_window(bars):
+    # ta raises IndexError here; the replacement returns its warm-up zeros
+    df = bars["SYN000-USD"].iloc[:10]
+    got = _average_true_range(df["High"], df["Low"], df["Close"], window=14)
+    assert got.index.equals(df.index) and (got == 0).all()
+
+
+def test_atr14_feature_matches_ta(bars):
+    fm = build_feature_matrix(bars, None, features=["atr14"])
+    for tkr in ["SYN000-USD", "SYN001-USD"]:
+        df = bars[tkr]
+        expected = AverageTrueRange(df["High"], df["Low"], df["Close"], window=14).average_true_range()
+        # The feature matrix is float32
+        np.testing.assert_allclose(fm.column(f"{tkr}_atr14"), expected.to_numpy(), rtol=1e-6)
+
+
+def test_days_without_intraday_bars_are_flagged(bars):
+    # Intraday bars cover only the last 30 of the 300 daily rows
+    intra = synthetic_bars(2, 30 * 24, freq="1h", start=bars.index[-30])
+    fm = build_feature_matrix(bars, None, intra)
+    observed = fm.column("SYN000-USD_i_observed")
+    assert (observed[:-30] == 0).all() and (observed[-30:] == 1).all()
+    # Filled days hold MISSING_FILL, and the rows stay usable for training
+    assert (fm.column("SYN000-USD_i_gap")[:-30] == MISSING_FILL).all()
+    assert fm.valid_rows()[-200:].all()
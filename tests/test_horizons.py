@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.utils import horizons
+from src.utils.horizons import horizon_targets, train_horizons
+from src.utils.model_trainer import ModelTrainer
+
+
+def test_horizon_targets():
+    close = np.exp(np.arange(10.0))
+    targets = horizon_targets(close, [1, 3])
+    assert np.allclose(targets[1][:-1], 1.0) and np.isnan(targets[1][-1])
+    assert np.allclose(targets[3][:-3], 3.0) and np.isnan(targets[3][-3:]).all()
+
+
+def test_training_rows_are_purged_before_the_split(monkeypatch):
+    fitted = {}
+    def record(self, train_data, val_data, feature_names, task="regression", save_model=True):
+        fitted[train_data.get_label()[0]] = (train_data.num_data(), val_data.num_data())
+    monkeypatch.setattr(ModelTrainer, "fit_datasets", record)
+
+    n = 200
+    X = np.random.default_rng(0).normal(size=(n, 3))
+    # Constant label per horizon identifies its dataset; the last h rows have no target
+    targets = {}
+    for h in (1, 3, 7):
+        targets[h] = np.full(n, float(h))
+        targets[h][n - h:] = np.nan
+    train_horizons(X, targets, ["a", "b", "c"])
+
+    n_val = int(np.ceil(n * horizons.VAL_FRACTION))
+    n_train = n - n_val
+    for h in (1, 3, 7):
+        # h - 1 rows before the split are dropped, their targets use validation closes
+        assert fitted[float(h)] == (n_train - (h - 1), n_val - h)
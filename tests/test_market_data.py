@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from src.utils.data_loader import load_local_bars
+from src.utils.market_data import LocalStoreProvider, ReplayProvider, REPLAY_REFERENCE
+from src.utils.reference_data import EXOG, FX_TICKER
+
+
+def test_replay_serves_reference_series_offline():
+    assert set(EXOG + [FX_TICKER]) <= set(REPLAY_REFERENCE)
+    df = ReplayProvider().download(EXOG + [FX_TICKER], "1y", "1d")
+    assert sorted(df["Close"].columns) == sorted(EXOG + [FX_TICKER])
+    assert np.isfinite(df["Close"].to_numpy()).all()
+    # Ends with the crypto fixtures, so it covers their calendar
+    assert df.index[-1] == load_local_bars(["BTC-USD"]).index[-1]
+
+
+def test_reference_series_are_deterministic_across_periods():
+    long = ReplayProvider().download(["^VIX"], "1y", "1d")["Close"]["^VIX"]
+    short = ReplayProvider().download(["^VIX"], "5d", "1d")["Close"]["^VIX"]
+    assert len(short) < len(long)
+    assert short.equals(long.loc[short.index])
+
+
+def test_local_store_has_no_reference_series():
+    with pytest.raises(ValueError):
+        LocalStoreProvider().download(["^VIX"], "1y", "1d")
+    # Unknown tickers still fail in replay
+    with pytest.raises(ValueError):
+        ReplayProvider().download(["NOPE-USD"], "1y", "1d")
@@ -0,0 +1,68 @@
+from src.utils import news_scoring
+from src.utils.news_scoring import mentions, score_entries, local_pick, MIN_SCORE
+
+
+def entry(title, summary=""):
+    return {"title": title, "summary": summary}
+
+
+def test_names_and_tickers():
+    assert mentions("Ethereum and $SOL rally as ETH climbs") == {"ETH-USD": 2, "SOL-USD": 1}
+    # Tickers only match in upper case, names in any case
+    assert mentions("click the link to see the dot chart") == {}
+    assert mentions("LINK jumps; chainlink oracles") == {"LINK-USD": 2}
+
+
+def test_longest_alias_wins():
+    assert mentions("Bitcoin Cash forks again") == {"BCH-USD": 1}
+    assert mentions("Bitcoin Cash and Bitcoin diverge") == {"BCH-USD": 1, "BTC-USD": 1}
+    assert mentions("Ethereum Classic hard fork") == {"ETC-USD": 1}
+
+
+def test_ambiguous_names_need_context():
+    assert mentions("Ripple effect of rate cuts on bonds") == {}
+    assert mentions("Stellar earnings from tech giants") == {}
+    assert mentions("Ripple token jumps after ruling") == {"XRP-USD": 1}
+    # Another alias of the same asset is context enough
+    assert mentions("Ripple says XRP payments grow") == {"XRP-USD": 2}
+    # Lower case is never the asset
+    assert mentions("a stellar week for crypto tokens") == {}
+    assert mentions("Ripple effect", context=True) == {"XRP-USD": 1}
+
+
+def test_title_mentions_weigh_more():
+    ranked = score_entries([entry("Solana upgrade", "Cardano too")])
+    scores = {s["ticker"]: s["score"] for s in ranked}
+    assert scores["SOL-USD"] == news_scoring.TITLE_WEIGHT * 2 # positive tone doubles the weight
+    assert scores["ADA-USD"] == 2
+
+
+def test_local_pick_when_one_asset_dominates():
+    entries = [entry("Solana surges to record high"), entry("Solana ETF approval"), entry("Bitcoin steady")]
+    ticker, reason, ranked = local_pick(entries)
+    assert ticker == "SOL-USD" and reason.startswith("Bullish news")
+    assert ranked[0]["score"] >= MIN_SCORE
+
+
+def test_local_pick_needs_entries_score_and_dominance():
+    # One entry is not enough, however strong
+    assert local_pick([entry("Solana surges, rallies, soars")])[0] is None
+    # Close runner-up
+    entries = [entry("Solana surges"), entry("Solana rallies"), entry("Cardano surges"), entry("Cardano rallies")]
+    assert local_pick(entries)[0] is None
+    # Below MIN_SCORE
+    assert local_pick([entry("x", "Solana"), entry("y", "Solana")])[0] is None
+
+
+def test_local_pick_skips_excluded_assets():
+    entries = [entry("Solana surges"), entry("Solana rallies"), entry("Cardano launches"), entry("Cardano rebounds")]
+    ticker, _, ranked = local_pick(entries, exclude=["SOL-USD"])
+    assert ticker == "ADA-USD"
+    assert all(s["ticker"] != "SOL-USD" for s in ranked)
+
+
+def test_bearish_news_is_left_to_the_llm():
+    entries = [entry("Solana hacked, funds stolen"), entry("Solana plunges after exploit")]
+    ticker, reason, ranked = local_pick(entries)
+    assert ticker is None and reason is None
+    assert ranked[0]["ticker"] == "SOL-USD" and ranked[0]["sentiment"] < 0
@@ -0,0 +1,26 @@
+import numpy as np
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils import out_of_core
+from src.utils.feature_engineering import nan_free_rows
+from src.utils.panel import build_panel, panel_columns
+
+TICKER = "SYN000-USD"
+
+
+def test_blocks_approximately_match_a_single_block_build(monkeypatch):
+    monkeypatch.setattr(out_of_core, "CHUNK_ROWS", 1000)
+    bars = synthetic_bars(1, 4000)
+    columns = panel_columns(weekly=False, intraday=False)
+    full = build_panel(bars, None, None, [TICKER], {TICKER: 0}, columns=columns)
+    keep = nan_free_rows(full.values) & np.isfinite(full.y)
+
+    blocks = list(out_of_core._feature_blocks(TICKER, bars, {TICKER: 0}, columns, None))
+    assert len(blocks) == 4
+    values = np.vstack([b[0] for b in blocks])
+    y = np.concatenate([b[1] for b in blocks])
+    # Same rows and labels (block-boundary targets included)...
+    assert values.shape == full.values[keep].shape
+    np.testing.assert_allclose(y, full.y[keep], rtol=1e-12)
+    # ...and features equal up to the warm-up restart and float32 rounding
+    np.testing.assert_allclose(values, full.values[keep], rtol=1e-5, atol=1e-7)
@@ -0,0 +1,49 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_bars
+from src.utils.feature_engineering import build_feature_matrix
+from src.utils.parallel_features import build_feature_matrix_parallel
+
+
+@pytest.fixture(scope="module")
+def bars():
+    daily = synthetic_bars(5, 400, freq="1D")
+    weekly = synthetic_bars(5, 60, freq="7D", seed=8)
+    intra = synthetic_bars(5, 2000, freq="1h", seed=9, start="2020-12-01")
+    exog = pd.DataFrame({"EXOG_^VIX": np.linspace(15, 30, len(daily))}, index=daily.index)
+    return daily, weekly, intra, exog
+
+
+def assert_same(serial, parallel):
+    assert parallel.columns == serial.columns
+    assert parallel.index.equals(serial.index)
+    assert parallel.values.dtype == serial.values.dtype
+    assert np.array_equal(parallel.values, serial.values, equal_nan=True)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_matches_serial_build(bars, workers):
+    daily, weekly, intra, exog = bars
+    serial = build_feature_matrix(daily, weekly, intra, exog=exog)
+    assert_same(serial, build_feature_matrix_parallel(daily, weekly, intra, exog=exog, workers=workers))
+
+
+def test_matches_serial_build_with_a_spec_and_asset_subset(bars):
+    daily, weekly, intra, _ = bars
+    assets = ["SYN003-USD", "SYN001-USD"]
+    features = ["logret", "rsi14", "atr14", "i_vol_std"]
+    serial = build_feature_matrix(daily, None, intra, assets=assets, features=features)
+    parallel = build_feature_matrix_parallel(daily, None, intra, assets=assets, features=features, workers=2)
+    assert_same(serial, parallel)
+
+
+def test_reuses_an_executor(bars):
+    daily, weekly, intra, _ = bars
+    serial = build_feature_matrix(daily, weekly)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for _ in range(2):
+            assert_same(serial, build_feature_matrix_parallel(daily, weekly, workers=2, executor=pool))